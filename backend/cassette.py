@@ -0,0 +1,178 @@
+"""
+Cassette - Record and replay LLM responses
+
+In "record" mode every completed LLMService call is appended to a JSON
+lines cassette file, keyed by a hash of the request (provider:model as
+routed for the call, messages, temperature, JSON mode) together with the
+response and how long it took. In "replay"
+mode responses are served from the cassette without any network I/O, so the
+non-LLM parts of the pipeline can be profiled deterministically, e.g. in CI.
+A request missing from the cassette fails instead of reaching a provider.
+
+Recordings of different deployments (e.g. a bench alternating model routes)
+keep their own keys, so each replays with its own responses and latency.
+LLM_CASSETTE_SHARE_MODELS=true leaves the model out of the key instead, so
+a cassette recorded against one deployment (or scripts/fake_llm_server.py)
+replays under any LLM configuration.
+
+Identical requests are answered in recorded order; once those run out the
+last recording is repeated. Streamed calls keep their chunks and the time
+each one arrived.
+
+By default replay is instant. LLM_CASSETTE_LATENCY_SCALE=1 waits as long
+as the recorded call took (0.5 half as long, and so on).
+
+Settings (environment or backend/.env):
+    LLM_CASSETTE_MODE           off, record or replay (default: off)
+    LLM_CASSETTE_PATH           Cassette file (default: backend/cassettes/llm.jsonl)
+    LLM_CASSETTE_LATENCY_SCALE  Share of the recorded latency to wait on replay (default: 0)
+    LLM_CASSETTE_SHARE_MODELS   Key recordings without provider/model (default: false)
+
+Usage:
+    LLM_CASSETTE_MODE=record python scripts/bench_evaluate.py --users 5
+    LLM_CASSETTE_MODE=replay python scripts/bench_evaluate.py --users 5
+"""
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlite_cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+DEFAULT_CASSETTE_PATH = BASE_DIR / "cassettes" / "llm.jsonl"
+
+CASSETTE_OFF = "off"
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+
+
+class CassetteMissError(Exception):
+    """Replay mode got a request that was never recorded."""
+
+
+class Cassette:
+    """JSON lines file of recorded LLM responses, keyed by request hash."""
+
+    def __init__(self, mode: str, path: Path, latency_scale: float = 0.0, share_models: bool = False):
+        self.mode = mode
+        self.path = Path(path)
+        self.latency_scale = latency_scale
+        self.share_models = share_models
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._replay_positions: Dict[str, int] = {}
+        self.counters = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == CASSETTE_REPLAY:
+            self._load()
+
+    @property
+    def active(self) -> bool:
+        return self.mode in (CASSETTE_RECORD, CASSETTE_REPLAY)
+
+    def request_key(self, model: str, messages: List[Dict[str, str]], temperature: float, use_json_format: bool) -> str:
+        """Key of a request; model is "provider:model" as resolved for the call's route"""
+        if self.share_models:
+            return make_cache_key("cassette", messages, temperature, use_json_format)
+        return make_cache_key("cassette", model, messages, temperature, use_json_format)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            logger.warning(f"LLM cassette {self.path} not found; every replayed call will fail")
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid cassette line {line_number}: {e}")
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+        logger.info(f"Loaded {sum(len(v) for v in self._entries.values())} LLM recordings from {self.path}")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.counters["recorded"] += 1
+
+    def record_call(self, key: str, endpoint: Optional[str], result: Dict, latency_ms: float) -> None:
+        self._append({
+            "key": key,
+            "endpoint": endpoint,
+            "latency_ms": round(latency_ms, 2),
+            "result": result
+        })
+
+    def record_stream(self, key: str, endpoint: Optional[str], chunks: List[Tuple[float, str]], latency_ms: float) -> None:
+        self._append({
+            "key": key,
+            "endpoint": endpoint,
+            "latency_ms": round(latency_ms, 2),
+            "chunks": [[round(offset_ms, 2), text] for offset_ms, text in chunks]
+        })
+
+    def _next_entry(self, key: str, endpoint: Optional[str]) -> Dict[str, Any]:
+        entries = self._entries.get(key)
+        if not entries:
+            self.counters["misses"] += 1
+            raise CassetteMissError(f"No recording in {self.path} for {endpoint or 'unknown'} request {key[:12]}")
+        position = self._replay_positions.get(key, 0)
+        self._replay_positions[key] = position + 1
+        self.counters["replayed"] += 1
+        return entries[min(position, len(entries) - 1)]
+
+    async def replay_call(self, key: str, endpoint: Optional[str]) -> Dict:
+        entry = self._next_entry(key, endpoint)
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry.get("latency_ms", 0) * self.latency_scale / 1000)
+        if "result" in entry:
+            return entry["result"]
+        content = "".join(text for _, text in entry.get("chunks", []))
+        return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+    async def replay_stream(self, key: str, endpoint: Optional[str]) -> AsyncIterator[str]:
+        entry = self._next_entry(key, endpoint)
+        if "chunks" in entry:
+            chunks = entry["chunks"]
+        else:
+            # Recorded by call(): one chunk at the end
+            chunks = [[entry.get("latency_ms", 0), entry["result"]["choices"][0]["message"]["content"]]]
+        started = time.perf_counter()
+        for offset_ms, text in chunks:
+            if self.latency_scale > 0:
+                delay = offset_ms * self.latency_scale / 1000 - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": str(self.path) if self.active else None,
+            "latency_scale": self.latency_scale,
+            "share_models": self.share_models,
+            "recordings_loaded": sum(len(v) for v in self._entries.values()),
+            **self.counters
+        }
+
+
+def load_cassette() -> Cassette:
+    """Cassette configured by LLM_CASSETTE_MODE / LLM_CASSETTE_PATH"""
+    from llm_service import get_setting
+
+    mode = get_setting("LLM_CASSETTE_MODE", CASSETTE_OFF).lower()
+    if mode not in (CASSETTE_OFF, CASSETTE_RECORD, CASSETTE_REPLAY):
+        logger.warning(f"Unknown LLM_CASSETTE_MODE '{mode}', using '{CASSETTE_OFF}'")
+        mode = CASSETTE_OFF
+    path = Path(get_setting("LLM_CASSETTE_PATH", "") or DEFAULT_CASSETTE_PATH)
+    latency_scale = float(get_setting("LLM_CASSETTE_LATENCY_SCALE", "0"))
+    share_models = get_setting("LLM_CASSETTE_SHARE_MODELS", "false").lower() == "true"
+    if mode != CASSETTE_OFF:
+        logger.info(f"LLM cassette: {mode} ({path})")
+    return Cassette(mode, path, latency_scale, share_models)
@@ -0,0 +1,345 @@
+"""
+Filter Engine - Declarative, compiled filters for natural language search
+
+The natural language search endpoint turns a query into a flat ``filters`` dict
+(see the prompt in main.py). Instead of checking every possible field for every
+employee, each supported field is described once in FILTER_SPECS and the
+filters of a request are compiled into a short list of column scans.
+
+Usage:
+    from filter_engine import apply_filters
+
+    matches = apply_filters(employees, {"dept_3": "AI推進室", "age_max": 30})
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Keywords that make two department names count as "related" (same rule as the
+# hard filter in /api/search/filter)
+AI_DEPT_KEYWORDS = ["ai", "機械学習", "データ", "ml", "データサイエンス", "ai推進", "aiアクセラレーション"]
+ENGINEER_KEYWORDS = ["エンジニア", "engineer"]
+
+
+class MatchKind(str, Enum):
+    """How a filter value is compared with the employee value"""
+    EXACT = "exact"                  # equality, or membership when a list is given
+    PARTIAL = "partial"              # case-insensitive substring in either direction
+    CONTAINS = "contains"            # case-insensitive, filter value inside employee value
+    DATE_RANGE = "date_range"        # <field>_min / <field>_max (YYYY-MM-DD)
+    NUMBER_RANGE = "number_range"    # <field>_min / <field>_max
+
+
+class ListMode(str, Enum):
+    """How a list-valued filter is compared for PARTIAL fields"""
+    MEMBER = "member"                # employee value must be in the list
+    ANY_PARTIAL = "any_partial"      # any list item partially matches
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Declarative description of one filterable employee field"""
+    name: str
+    kind: MatchKind
+    list_mode: ListMode = ListMode.MEMBER
+    # For list filters: extra keywords that still accept a non-member value
+    related_keywords: Tuple[str, ...] = ()
+    # True when both sides must contain the keyword, False when either side may
+    related_requires_both: bool = False
+    # Only used by range fields
+    drop_missing: bool = False
+
+
+FILTER_SPECS: List[FilterSpec] = [
+    FilterSpec("employee_id", MatchKind.EXACT),
+    FilterSpec("employee_name", MatchKind.PARTIAL, list_mode=ListMode.ANY_PARTIAL),
+    FilterSpec("mail", MatchKind.CONTAINS),
+    FilterSpec("nickname", MatchKind.EXACT),
+    FilterSpec("employment_type", MatchKind.EXACT),
+    FilterSpec("current_employee_flag", MatchKind.EXACT),
+    FilterSpec("entered_at", MatchKind.DATE_RANGE),
+    FilterSpec("last_day_at", MatchKind.EXACT),
+    FilterSpec("retired_at", MatchKind.EXACT),
+    FilterSpec("fulltime_employee_hired_at", MatchKind.EXACT),
+    FilterSpec("fulltime_employee_retired_at", MatchKind.EXACT),
+    FilterSpec("employment_category", MatchKind.EXACT),
+    FilterSpec("recruitment_category_new_graduate", MatchKind.EXACT),
+    FilterSpec("gender", MatchKind.EXACT),
+    FilterSpec("birthday", MatchKind.DATE_RANGE),
+    FilterSpec("age", MatchKind.NUMBER_RANGE, drop_missing=True),
+    FilterSpec("years_of_service", MatchKind.NUMBER_RANGE),
+    FilterSpec("dept_1", MatchKind.PARTIAL),
+    FilterSpec("dept_2", MatchKind.PARTIAL),
+    FilterSpec("dept_3", MatchKind.PARTIAL, related_keywords=tuple(AI_DEPT_KEYWORDS)),
+    FilterSpec("dept_4", MatchKind.PARTIAL),
+    FilterSpec("dept_5", MatchKind.PARTIAL),
+    FilterSpec("dept_6", MatchKind.PARTIAL),
+    FilterSpec("location", MatchKind.PARTIAL, list_mode=ListMode.ANY_PARTIAL),
+    FilterSpec("job_title", MatchKind.PARTIAL, related_keywords=tuple(ENGINEER_KEYWORDS),
+               related_requires_both=True),
+    FilterSpec("job_family", MatchKind.EXACT),
+    FilterSpec("latest_job_grade", MatchKind.EXACT),
+    FilterSpec("latest_org_grade", MatchKind.EXACT),
+    FilterSpec("grade_combined", MatchKind.EXACT),
+    FilterSpec("salary_table", MatchKind.EXACT),
+    FilterSpec("jp_non_jp_classification", MatchKind.PARTIAL),
+]
+
+FILTER_SPECS_BY_NAME: Dict[str, FilterSpec] = {spec.name: spec for spec in FILTER_SPECS}
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    """Parse a YYYY-MM-DD string, returning None for anything else"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _parse_years_text(value: Any) -> float:
+    """Parse a years_of_service string like "1年3ヵ月" into whole years"""
+    if not value or not isinstance(value, str):
+        return 0.0
+    match_years = re.search(r'(\d+)年', value)
+    return float(match_years.group(1)) if match_years else 0.0
+
+
+class EmployeeColumns:
+    """
+    Column-oriented view of the employee list.
+
+    Raw values, lower-cased strings and parsed dates are computed once per
+    dataset (not once per request and employee) and shared by every compiled
+    filter.
+    """
+
+    def __init__(self, employees: List[dict]):
+        self.employees = employees
+        self.size = len(employees)
+        self._raw: Dict[str, list] = {}
+        self._lower: Dict[str, List[str]] = {}
+        self._dates: Dict[str, List[Optional[date]]] = {}
+        self._years_text: Optional[List[float]] = None
+
+    def raw(self, name: str) -> list:
+        if name not in self._raw:
+            self._raw[name] = [emp.get(name) for emp in self.employees]
+        return self._raw[name]
+
+    def lower(self, name: str) -> List[str]:
+        if name not in self._lower:
+            self._lower[name] = [str(v).lower() if v else "" for v in self.raw(name)]
+        return self._lower[name]
+
+    def dates(self, name: str) -> List[Optional[date]]:
+        if name not in self._dates:
+            self._dates[name] = [_parse_date(v) for v in self.raw(name)]
+        return self._dates[name]
+
+    def years_of_service(self, today: date) -> List[float]:
+        """Years of service from entered_at, or the years_of_service text when there is none"""
+        if self._years_text is None:
+            self._years_text = [_parse_years_text(v) for v in self.raw("years_of_service")]
+        years = []
+        for raw, entered, fallback in zip(self.raw("entered_at"), self.dates("entered_at"), self._years_text):
+            if entered is not None:
+                years.append(round((today - entered).days / 365.25, 2))
+            elif raw:
+                # An unparseable join date counts as 0 years, as in calculate_years_of_experience
+                years.append(0.0)
+            else:
+                years.append(fallback)
+        return years
+
+
+_columns_cache: Optional[EmployeeColumns] = None
+
+
+def get_columns(employees: List[dict]) -> EmployeeColumns:
+    """Return the column view for an employee list, rebuilding it only when the list changes"""
+    global _columns_cache
+    if _columns_cache is None or _columns_cache.employees is not employees \
+            or _columns_cache.size != len(employees):
+        _columns_cache = EmployeeColumns(employees)
+    return _columns_cache
+
+
+# A compiled filter narrows a list of row indices to the rows that match
+RowFilter = Callable[[List[int]], List[int]]
+
+
+def _compile_exact(spec: FilterSpec, value: Any, cols: EmployeeColumns) -> RowFilter:
+    raw = cols.raw(spec.name)
+    if isinstance(value, list):
+        allowed = value
+        return lambda rows: [i for i in rows if raw[i] in allowed]
+    return lambda rows: [i for i in rows if raw[i] == value]
+
+
+def _compile_contains(spec: FilterSpec, value: Any, cols: EmployeeColumns) -> RowFilter:
+    lower = cols.lower(spec.name)
+    needles = [str(v).lower() for v in value] if isinstance(value, list) else [str(value).lower()]
+    return lambda rows: [i for i in rows if any(n in lower[i] for n in needles)]
+
+
+def _compile_partial(spec: FilterSpec, value: Any, cols: EmployeeColumns) -> RowFilter:
+    lower = cols.lower(spec.name)
+
+    if not isinstance(value, list):
+        needle = str(value).lower()
+        return lambda rows: [i for i in rows if needle in lower[i] or lower[i] in needle]
+
+    needles = [str(v).lower() for v in value]
+    if spec.list_mode == ListMode.ANY_PARTIAL:
+        return lambda rows: [
+            i for i in rows if any(n in lower[i] or lower[i] in n for n in needles)
+        ]
+
+    raw = cols.raw(spec.name)
+    allowed = value
+    keywords = spec.related_keywords
+    if not keywords:
+        return lambda rows: [i for i in rows if (raw[i] or "") in allowed]
+
+    if spec.related_requires_both:
+        def is_related(emp_lower: str) -> bool:
+            return any(kw in emp_lower and kw in n for n in needles for kw in keywords)
+    else:
+        # Either side containing a keyword is enough, so a keyword in the filter
+        # itself accepts every row; decide that once instead of per employee.
+        if any(kw in n for n in needles for kw in keywords):
+            return lambda rows: rows
+
+        def is_related(emp_lower: str) -> bool:
+            return any(kw in emp_lower for kw in keywords)
+
+    return lambda rows: [
+        i for i in rows if (raw[i] or "") in allowed or is_related(lower[i])
+    ]
+
+
+def _compile_date_range(spec: FilterSpec, filters: dict, cols: EmployeeColumns) -> Optional[RowFilter]:
+    min_value = filters.get(f"{spec.name}_min")
+    max_value = filters.get(f"{spec.name}_max")
+    if not min_value and not max_value:
+        return None
+    # Each bound is parsed on its own: an unparseable one is dropped and the
+    # other still applies (the old loop kept a valid min next to a bad max)
+    min_date = _parse_date(min_value) if min_value else None
+    max_date = _parse_date(max_value) if max_value else None
+    if min_date is None and max_date is None:
+        return None
+
+    column = cols.dates(spec.name)
+
+    def narrow(rows: List[int]) -> List[int]:
+        kept = []
+        for i in rows:
+            d = column[i]
+            if d is not None:
+                if min_date is not None and d < min_date:
+                    continue
+                if max_date is not None and d > max_date:
+                    continue
+            kept.append(i)
+        return kept
+
+    return narrow
+
+
+def _compile_number_range(spec: FilterSpec, filters: dict, cols: EmployeeColumns,
+                          today: date) -> Optional[RowFilter]:
+    min_value = filters.get(f"{spec.name}_min")
+    max_value = filters.get(f"{spec.name}_max")
+    if min_value is None and max_value is None:
+        return None
+
+    if spec.name == "years_of_service":
+        column = cols.years_of_service(today)
+    else:
+        column = cols.raw(spec.name)
+    drop_missing = spec.drop_missing
+
+    def narrow(rows: List[int]) -> List[int]:
+        kept = []
+        for i in rows:
+            v = column[i]
+            if v is None:
+                if not drop_missing:
+                    kept.append(i)
+                continue
+            if min_value is not None and v < min_value:
+                continue
+            if max_value is not None and v > max_value:
+                continue
+            kept.append(i)
+        return kept
+
+    return narrow
+
+
+def compile_filters(filters: Optional[dict], employees: List[dict]) -> List[RowFilter]:
+    """
+    Compile a parsed ``filters`` dict into row filters.
+
+    Fields that are unknown, null or empty produce no row filter at all, so a
+    request only pays for the criteria it actually uses.
+    """
+    filters = filters or {}
+    cols = get_columns(employees)
+    today = date.today()
+    compiled: List[RowFilter] = []
+
+    for spec in FILTER_SPECS:
+        if spec.kind == MatchKind.DATE_RANGE:
+            row_filter = _compile_date_range(spec, filters, cols)
+        elif spec.kind == MatchKind.NUMBER_RANGE:
+            row_filter = _compile_number_range(spec, filters, cols, today)
+        else:
+            value = filters.get(spec.name)
+            if not value:
+                continue
+            if spec.kind == MatchKind.EXACT:
+                row_filter = _compile_exact(spec, value, cols)
+            elif spec.kind == MatchKind.CONTAINS:
+                row_filter = _compile_contains(spec, value, cols)
+            else:
+                row_filter = _compile_partial(spec, value, cols)
+        if row_filter is not None:
+            compiled.append(row_filter)
+
+    return compiled
+
+
+def iter_matching_rows(
+    filters: Optional[dict],
+    employees: List[dict],
+    batch_size: Optional[int] = None
+) -> Iterator[List[int]]:
+    """
+    Yield matching row indices in dataset order, one list per scanned batch.
+
+    With batch_size=None the whole dataset is scanned as a single batch.
+    """
+    row_filters = compile_filters(filters, employees)
+    total = len(employees)
+    step = batch_size or total or 1
+    for start in range(0, total, step):
+        rows = list(range(start, min(start + step, total)))
+        for row_filter in row_filters:
+            if not rows:
+                break
+            rows = row_filter(rows)
+        yield rows
+
+
+def apply_filters(employees: List[dict], filters: Optional[dict]) -> List[dict]:
+    """Return the employees that match every filter, in dataset order"""
+    matches: List[dict] = []
+    for rows in iter_matching_rows(filters, employees):
+        matches.extend(employees[i] for i in rows)
+    return matches
@@ -0,0 +1,109 @@
+"""
+Keyword Index - Character n-gram inverted index over employee profile fields
+
+Used for speculative natural language search: while the LLM parses a query
+into structured filters, the query text is matched against names, job titles,
+departments and locations so that provisional results can be shown right away.
+Character bigrams work for Japanese text without a tokenizer.
+
+Usage:
+    from keyword_index import get_keyword_index
+
+    hits = get_keyword_index(employees).search("AI推進室のエンジニア", limit=20)
+    # [(row_index, score), ...] best first
+"""
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+INDEXED_FIELDS = [
+    "employee_name", "employee_name_kana", "nickname", "mail",
+    "job_title", "job_family", "location",
+    "dept_1", "dept_2", "dept_3", "dept_4", "dept_5", "dept_6",
+]
+
+# Query fragments that never identify an employee
+STOP_GRAMS = {"の", "で", "が", "を", "に", "と", "は", "人", "年", "歳"}
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def ngrams(text: str, n: int = 2) -> Set[str]:
+    """Character n-grams of every word in the text (whole word if shorter than n)"""
+    grams: Set[str] = set()
+    for word in re.split(r"[\s、。,.・/()（）>]+", _normalize(text)):
+        if not word:
+            continue
+        if len(word) < n:
+            grams.add(word)
+            continue
+        for i in range(len(word) - n + 1):
+            grams.add(word[i:i + n])
+    return grams
+
+
+class KeywordIndex:
+    """Inverted index from character bigrams to employee rows."""
+
+    def __init__(self, employees: List[dict]):
+        self.employees = employees
+        self.size = len(employees)
+        self.postings: Dict[str, Set[int]] = {}
+        for row, emp in enumerate(employees):
+            grams: Set[str] = set()
+            for field in INDEXED_FIELDS:
+                value = emp.get(field)
+                if value and isinstance(value, str) and value != "-":
+                    grams |= ngrams(value)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(row)
+
+    def search(self, query: str, limit: int = 20, min_score: float = 0.1) -> List[Tuple[int, float]]:
+        """
+        Rank rows by the IDF-weighted share of query bigrams they contain.
+
+        Returns:
+            List of (row_index, score) with score in 0..1, best first
+        """
+        grams = [g for g in ngrams(query) if g not in STOP_GRAMS and not g.isdigit()]
+        if not grams or not self.size:
+            return []
+
+        weights = {}
+        for gram in grams:
+            rows = self.postings.get(gram)
+            # Grams that match nothing still count in the denominator, so a
+            # query about unknown things scores low everywhere
+            df = len(rows) if rows else 0
+            weights[gram] = math.log(1 + self.size / (1 + df))
+        total_weight = sum(weights.values())
+        if total_weight <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        for gram in grams:
+            for row in self.postings.get(gram, ()):
+                scores[row] = scores.get(row, 0.0) + weights[gram]
+
+        ranked = [
+            (row, round(score / total_weight, 3))
+            for row, score in scores.items()
+            if score / total_weight >= min_score
+        ]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+_index_cache: Optional[KeywordIndex] = None
+
+
+def get_keyword_index(employees: List[dict]) -> KeywordIndex:
+    """Return the index for an employee list, rebuilding it only when the list changes"""
+    global _index_cache
+    if _index_cache is None or _index_cache.employees is not employees \
+            or _index_cache.size != len(employees):
+        _index_cache = KeywordIndex(employees)
+    return _index_cache
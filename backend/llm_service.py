@@ -23,17 +23,98 @@ Usage:
             temperature=0.0,
             use_json_format=False
         )
+    
+    To constrain a JSON response to a pydantic model, pass a schema
+    (see structured_output.py):
+        response = await call_llm(messages, use_json_format=True,
+                                  response_schema=response_schema(AnalysisResult))
 """
 import os
 import json
 import logging
+import time
 import asyncio
-from typing import List, Dict, Optional
+import importlib.util
+from collections import OrderedDict, deque
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from enum import Enum
 import httpx
 
+from rate_limiter import get_rate_limiter, estimate_tokens
+from sqlite_cache import SQLiteCache, make_cache_key
+from resilience import (
+    RETRYABLE_STATUS_CODES, CircuitOpenError, RetryPolicy, call_with_retry,
+    get_circuit_breaker, get_retry_stats, parse_retry_after
+)
+from telemetry import current_endpoint, get_llm_telemetry
+from log_pipeline import log_llm_response, trace_llm_call
+from cassette import CASSETTE_RECORD, CASSETTE_REPLAY, CassetteMissError, load_cassette
+from structured_output import ResponseSchema
+from model_routing import load_model_router
+
 logger = logging.getLogger(__name__)
 
+BASE_DIR = Path(__file__).parent
+ENV_FILE = BASE_DIR / ".env"
+
+# Maximum number of Gemini model objects kept per service
+GEMINI_MODEL_CACHE_SIZE = 64
+
+# Response cache policies accepted by LLMService.call(cache=...)
+CACHE_USE = "use"          # return a cached response if present, store new ones
+CACHE_REFRESH = "refresh"  # always call the provider, then overwrite the cached response
+CACHE_OFF = "off"          # bypass the cache entirely (the default)
+
+_env_file_vars: Optional[Dict[str, str]] = None
+
+# Provider calls and attempts made for the current call()/call_stream(), for telemetry.
+# Hedge tasks copy the context and so share the same counter.
+_call_attempts: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_call_attempts", default=None)
+
+
+def get_setting(name: str, default: str = "") -> str:
+    """Read a setting from the environment, falling back to backend/.env"""
+    global _env_file_vars
+    if _env_file_vars is None:
+        _env_file_vars = {}
+        if ENV_FILE.exists():
+            try:
+                with open(ENV_FILE, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if line and not line.startswith('#') and '=' in line:
+                            key, value = line.split('=', 1)
+                            _env_file_vars[key.strip()] = value.strip()
+            except Exception as e:
+                logger.warning(f"Error loading .env file: {e}")
+    return os.getenv(name, _env_file_vars.get(name, default))
+
+
+def cached_prompt_token_count(result: Optional[Dict]) -> int:
+    """Prompt tokens the provider served from its prefix cache, 0 when not reported"""
+    details = ((result or {}).get("usage") or {}).get("prompt_tokens_details") or {}
+    return int(details.get("cached_tokens") or 0)
+
+
+class LLMServiceError(Exception):
+    """LLM API failure, classified for the retry logic."""
+    
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
 
 class LLMProvider(str, Enum):
     """Supported LLM providers"""
@@ -44,7 +125,9 @@ class LLMProvider(str, Enum):
 class LLMService:
     """
     Unified LLM service that abstracts away the differences between providers.
-    Switch providers by setting the LLM_PROVIDER environment variable.
+    Switch providers by setting the LLM_PROVIDER environment variable; set
+    LLM_SECONDARY_PROVIDER and LLM_MULTI_PROVIDER_MODE to hedge or fail over
+    to the other one.
     """
     
     def __init__(self):
@@ -63,16 +146,72 @@ class LLMService:
         
         # Load provider-specific configuration
         self._load_config()
+        self._load_http_config()
+        self._load_multi_provider_config()
+        
+        # Per-stage models (LLM_MODEL_ROUTES), e.g. a small deployment for nl_parse
+        self.model_router = load_model_router(self.provider.value)
+        
+        # Record/replay of responses for reproducible benchmarks (LLM_CASSETTE_MODE)
+        self.cassette = load_cassette()
+        
+        # Shared HTTP client (created lazily on the running event loop)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # Gemini SDK state: configured once, model objects reused across calls
+        self._genai = None
+        self._gemini_models: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._gemini_executor: Optional[ThreadPoolExecutor] = None
         
         logger.info(f"LLM Service initialized with provider: {self.provider.value}")
+        if self.secondary_provider is not None:
+            logger.info(
+                f"Secondary provider: {self.secondary_provider.value} "
+                f"(mode: {self.multi_provider_mode})"
+            )
     
     def _load_config(self):
-        """Load configuration for the selected provider"""
-        if self.provider == LLMProvider.AZURE_OPENAI:
+        """Load configuration for the selected provider and the optional secondary provider"""
+        secondary_str = get_setting("LLM_SECONDARY_PROVIDER", "").lower()
+        self.secondary_provider: Optional[LLMProvider] = None
+        if secondary_str:
+            try:
+                self.secondary_provider = LLMProvider(secondary_str)
+            except ValueError:
+                logger.warning(f"Invalid LLM_SECONDARY_PROVIDER '{secondary_str}', ignoring")
+            if self.secondary_provider == self.provider:
+                logger.warning("LLM_SECONDARY_PROVIDER is the same as LLM_PROVIDER, ignoring")
+                self.secondary_provider = None
+        
+        providers = {self.provider, self.secondary_provider}
+        if LLMProvider.AZURE_OPENAI in providers:
             self._load_azure_config()
-        elif self.provider == LLMProvider.GOOGLE_GEMINI:
+        if LLMProvider.GOOGLE_GEMINI in providers:
             self._load_gemini_config()
     
+    def _load_multi_provider_config(self):
+        """Load hedging/failover settings (only used with a secondary provider)"""
+        self.multi_provider_mode = get_setting("LLM_MULTI_PROVIDER_MODE", "failover").lower()
+        if self.multi_provider_mode not in ("failover", "hedge"):
+            logger.warning(f"Unknown LLM_MULTI_PROVIDER_MODE '{self.multi_provider_mode}', using 'failover'")
+            self.multi_provider_mode = "failover"
+        # Fixed hedge delay; 0 means use the percentile of recent primary latencies
+        self.hedge_delay_seconds = float(get_setting("LLM_HEDGE_DELAY_SECONDS", "0"))
+        self.hedge_percentile = float(get_setting("LLM_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay_seconds = float(get_setting("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+        self.hedge_initial_delay_seconds = float(get_setting("LLM_HEDGE_INITIAL_DELAY_SECONDS", "10"))
+        self.hedge_min_samples = int(get_setting("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self._provider_latencies: Dict[LLMProvider, deque] = {
+            provider: deque(maxlen=200) for provider in LLMProvider
+        }
+        self.multi_provider_counters = {
+            "primary_wins": 0,
+            "secondary_wins": 0,
+            "hedges_sent": 0,
+            "hedge_wins": 0,
+            "failovers": 0
+        }
+    
     def _load_azure_config(self):
         """Load Azure OpenAI configuration"""
         from pathlib import Path
@@ -101,7 +240,7 @@ class LLMService:
             "AZURE_OPENAI_ENDPOINT",
             _env_vars.get("AZURE_OPENAI_ENDPOINT", "")
         )
-        self.api_key = os.getenv(
+        self.azure_api_key = os.getenv(
             "AZURE_OPENAI_API_KEY",
             _env_vars.get("AZURE_OPENAI_API_KEY", "")
         )
@@ -114,7 +253,7 @@ class LLMService:
             _env_vars.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
         )
         
-        if not self.endpoint or not self.api_key:
+        if not self.endpoint or not self.azure_api_key:
             logger.warning(
                 "Azure OpenAI credentials not found. "
                 "Please set AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY."
@@ -144,7 +283,7 @@ class LLMService:
         
         _env_vars = load_env_file(ENV_FILE)
         
-        self.api_key = os.getenv(
+        self.gemini_api_key = os.getenv(
             "GOOGLE_GEMINI_API_KEY",
             _env_vars.get("GOOGLE_GEMINI_API_KEY", "")
         )
@@ -153,140 +292,804 @@ class LLMService:
             _env_vars.get("GOOGLE_GEMINI_MODEL", "gemini-1.5-pro")
         )
         
-        if not self.api_key:
+        # Alternative API host (e.g. scripts/fake_llm_server.py); switches the SDK to REST
+        self.gemini_api_endpoint = get_setting("GOOGLE_GEMINI_API_ENDPOINT", "")
+        
+        # "async" uses the SDK's native coroutines; "executor" runs the blocking
+        # SDK calls on a dedicated thread pool of GEMINI_MAX_WORKERS threads
+        self.gemini_call_mode = get_setting("GEMINI_CALL_MODE", "async").lower()
+        if self.gemini_call_mode not in ("async", "executor"):
+            logger.warning(f"Unknown GEMINI_CALL_MODE '{self.gemini_call_mode}', using 'async'")
+            self.gemini_call_mode = "async"
+        self.gemini_max_workers = int(get_setting("GEMINI_MAX_WORKERS", "16"))
+        
+        if not self.gemini_api_key:
             logger.warning(
                 "Google Gemini API key not found. "
                 "Please set GOOGLE_GEMINI_API_KEY."
             )
     
+    def _load_http_config(self):
+        """Load connection pool and timeout settings for the shared HTTP client"""
+        self.http_max_connections = int(get_setting("LLM_HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive_connections = int(get_setting("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.http_keepalive_expiry = float(get_setting("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+        self.http_timeout = float(get_setting("LLM_HTTP_TIMEOUT", "30"))
+        self.http_connect_timeout = float(get_setting("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+        self.http2 = get_setting("LLM_HTTP2", "false").lower() == "true"
+        # Completion tokens assumed per call when reserving tokens-per-minute quota
+        self.estimated_completion_tokens = int(get_setting("LLM_ESTIMATED_COMPLETION_TOKENS", "500"))
+        
+        # Retries and circuit breaking
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(get_setting("LLM_RETRY_MAX_ATTEMPTS", "4")),
+            base_delay=float(get_setting("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(get_setting("LLM_RETRY_MAX_DELAY", "20"))
+        )
+        self.request_deadline = float(get_setting("LLM_REQUEST_DEADLINE_SECONDS", "90"))
+        self.circuit_failure_threshold = int(get_setting("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.circuit_reset_seconds = float(get_setting("LLM_CIRCUIT_RESET_SECONDS", "30"))
+        
+        # Opt-in response cache for deterministic (low temperature) calls
+        self.response_cache_enabled = get_setting("LLM_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+        self.response_cache_max_temperature = float(get_setting("LLM_RESPONSE_CACHE_MAX_TEMPERATURE", "0.2"))
+        self.response_cache = SQLiteCache(
+            namespace="llm_responses",
+            ttl_seconds=float(get_setting("LLM_RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_entries=int(get_setting("LLM_RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+        )
+        self.response_cache_endpoints: Dict[str, Dict[str, int]] = {}
+        
+        # Send response schemas to the provider (json_schema / response_schema);
+        # when off, schema calls fall back to plain JSON mode
+        self.structured_output_enabled = get_setting("LLM_STRUCTURED_OUTPUT_ENABLED", "true").lower() == "true"
+        
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "LLM_HTTP2=true but the 'h2' package is not installed. "
+                "Install it with: pip install 'httpx[http2]'. Falling back to HTTP/1.1."
+            )
+            self.http2 = False
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared pooled HTTP client, creating it on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.http_max_connections,
+                    max_keepalive_connections=self.http_max_keepalive_connections,
+                    keepalive_expiry=self.http_keepalive_expiry
+                ),
+                timeout=httpx.Timeout(self.http_timeout, connect=self.http_connect_timeout)
+            )
+        return self._http_client
+    
+    async def aclose(self):
+        """Close the shared HTTP client and Gemini executor (called from the app lifespan)"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        if self._gemini_executor is not None:
+            self._gemini_executor.shutdown(wait=False)
+            self._gemini_executor = None
+    
     async def call(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.0,
-        use_json_format: bool = False
+        use_json_format: bool = False,
+        deadline: Optional[float] = None,
+        cache: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        response_schema: Optional[ResponseSchema] = None
     ) -> Dict:
         """
         Unified interface to call the configured LLM provider.
         
+        Retryable failures (429, 5xx, timeouts) are retried with backoff until
+        the deadline; while the provider keeps failing its circuit breaker
+        rejects calls immediately.
+        
+        With a secondary provider configured (LLM_MULTI_PROVIDER_MODE), a
+        failed primary call fails over to the secondary, and in "hedge" mode a
+        primary call slower than the hedge delay is raced against the secondary.
+        
+        With cache="use" an identical earlier request (same provider, model,
+        messages, temperature and JSON mode) is answered from the response
+        cache without calling the provider.
+        
+        The model (deployment) is chosen per stage (endpoint) by the model
+        router: see model_routing.py.
+        
+        With a response_schema the provider is asked for output matching it
+        (structured outputs). The schema is not part of the cache key: it
+        constrains the format of the answer, not the question.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
             temperature: Temperature for response generation (0.0 to 1.0)
             use_json_format: Whether to request JSON format response
+            deadline: time.monotonic() value by which the call must finish
+                (default: now + LLM_REQUEST_DEADLINE_SECONDS)
+            cache: Response cache policy: "use", "refresh" or "off" (default)
+            endpoint: Caller name (stage) used for cache statistics and telemetry
+            response_schema: Optional schema the JSON response must follow
         
         Returns:
             Dictionary containing the LLM response
         """
-        if self.provider == LLMProvider.AZURE_OPENAI:
-            return await self._call_azure_openai(messages, temperature, use_json_format)
-        elif self.provider == LLMProvider.GOOGLE_GEMINI:
-            return await self._call_gemini(messages, temperature, use_json_format)
+        started = time.perf_counter()
+        # Cache entries are keyed by the primary provider: they answer the request, whoever served it
+        model = self._provider_model(self.provider, endpoint)
+        cache_key = None
+        if self._response_cacheable(cache, temperature):
+            cache_key = self.response_cache_key(messages, temperature, use_json_format, endpoint)
+            if cache == CACHE_USE:
+                cached = await self.response_cache.aget(cache_key)
+                self._record_cache_lookup(endpoint, cached is not None)
+                if cached is not None:
+                    self._record_telemetry(endpoint, started, messages=messages, result=cached, cache_hit=True)
+                    return cached
+        
+        cassette_key = None
+        if self.cassette.active:
+            cassette_key = self.cassette.request_key(
+                f"{self.provider.value}:{model}", messages, temperature, use_json_format
+            )
+            if self.cassette.mode == CASSETTE_REPLAY:
+                try:
+                    result = await self.cassette.replay_call(cassette_key, endpoint)
+                except CassetteMissError as e:
+                    self._record_telemetry(endpoint, started, messages=messages, error=e)
+                    raise LLMServiceError(str(e))
+                self._record_telemetry(endpoint, started, messages=messages, result=result, answered_by=self.provider)
+                return result
+        
+        if deadline is None:
+            deadline = time.monotonic() + self.request_deadline
+        schema = self._effective_schema(response_schema)
+        
+        attempts = {"calls": 0, "attempts": 0}
+        token = _call_attempts.set(attempts)
+        try:
+            if self.secondary_provider is None:
+                result = await self._call_provider(
+                    self.provider, messages, temperature, use_json_format, deadline, schema, endpoint
+                )
+                answered_by = self.provider
+            else:
+                result, answered_by = await self._call_multi_provider(
+                    messages, temperature, use_json_format, deadline, schema, endpoint
+                )
+        except Exception as e:
+            self._record_telemetry(endpoint, started, messages=messages, attempts=attempts, error=e)
+            raise
+        finally:
+            _call_attempts.reset(token)
+        self._record_telemetry(
+            endpoint, started, messages=messages, result=result, answered_by=answered_by, attempts=attempts
+        )
+        if cassette_key is not None and self.cassette.mode == CASSETTE_RECORD:
+            self.cassette.record_call(cassette_key, endpoint, result, (time.perf_counter() - started) * 1000)
+        
+        if cache_key is not None and result.get("choices"):
+            await self.response_cache.aset(
+                cache_key, result,
+                meta={
+                    "endpoint": endpoint,
+                    "provider": self.provider.value,
+                    "model": model,
+                    "answered_by": answered_by.value
+                }
+            )
+        return result
+    
+    def _provider_model(self, provider: LLMProvider, stage: Optional[str] = None) -> str:
+        """Deployment (Azure) or model name (Gemini) used for a provider, routed by stage"""
+        if provider == LLMProvider.AZURE_OPENAI:
+            default_model = self.deployment
+        elif provider == LLMProvider.GOOGLE_GEMINI:
+            default_model = self.model
         else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+            raise ValueError(f"Unsupported provider: {provider}")
+        return self.model_router.model_for(provider.value, stage, default_model)
+    
+    async def _call_provider(
+        self,
+        provider: LLMProvider,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        use_json_format: bool,
+        deadline: float,
+        response_schema: Optional[ResponseSchema] = None,
+        stage: Optional[str] = None
+    ) -> Dict:
+        """One provider call with rate limiting, retries and its circuit breaker"""
+        if provider == LLMProvider.AZURE_OPENAI:
+            call = self._call_azure_openai
+        elif provider == LLMProvider.GOOGLE_GEMINI:
+            call = self._call_gemini
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+        model = self._provider_model(provider, stage)
+        
+        # Shared per provider/deployment: waits only as long as the quota requires
+        limiter = get_rate_limiter(provider.value, model)
+        estimated_tokens = estimate_tokens(messages, self.estimated_completion_tokens)
+        
+        attempts = _call_attempts.get()
+        if attempts is not None:
+            attempts["calls"] += 1
+        
+        async def attempt():
+            if attempts is not None:
+                attempts["attempts"] += 1
+            async with limiter.acquire(estimated_tokens) as lease:
+                result = await call(messages, temperature, use_json_format, response_schema, model)
+                lease.record_usage((result.get("usage") or {}).get("total_tokens"))
+            return result
+        
+        name = f"{provider.value}:{model}"
+        started = time.monotonic()
+        try:
+            result = await call_with_retry(
+                attempt,
+                policy=self.retry_policy,
+                breaker=get_circuit_breaker(name, self.circuit_failure_threshold, self.circuit_reset_seconds),
+                deadline=deadline,
+                stats=get_retry_stats(name)
+            )
+        except asyncio.CancelledError:
+            # A call cancelled because its hedge won took at least this long.
+            # Leaving it out would only keep the fast samples, pulling the
+            # hedge delay down and hedging more and more often
+            self._provider_latencies[provider].append(time.monotonic() - started)
+            raise
+        self._provider_latencies[provider].append(time.monotonic() - started)
+        return result
+    
+    async def _call_multi_provider(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        use_json_format: bool,
+        deadline: float,
+        response_schema: Optional[ResponseSchema] = None,
+        stage: Optional[str] = None
+    ) -> Tuple[Dict, LLMProvider]:
+        """Call the primary; hedge to and/or fail over to the secondary provider"""
+        primary, secondary = self.provider, self.secondary_provider
+        stats = self.multi_provider_counters
+        primary_task = asyncio.create_task(
+            self._call_provider(primary, messages, temperature, use_json_format, deadline, response_schema, stage)
+        )
+        
+        if self.multi_provider_mode == "hedge":
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_delay())
+            if not done:
+                stats["hedges_sent"] += 1
+                secondary_task = asyncio.create_task(
+                    self._call_provider(secondary, messages, temperature, use_json_format, deadline, response_schema, stage)
+                )
+                return await self._race(primary_task, secondary_task)
+        
+        try:
+            result = await primary_task
+            stats["primary_wins"] += 1
+            return result, primary
+        except Exception as e:
+            if not self._should_fail_over(e):
+                raise
+            stats["failovers"] += 1
+            logger.warning(f"Primary provider {primary.value} failed ({e}); failing over to {secondary.value}")
+            try:
+                result = await self._call_provider(secondary, messages, temperature, use_json_format, deadline, response_schema, stage)
+            except Exception as secondary_error:
+                logger.error(f"Secondary provider {secondary.value} also failed: {secondary_error}")
+                raise e
+            stats["secondary_wins"] += 1
+            return result, secondary
+    
+    async def _race(self, primary_task: asyncio.Task, secondary_task: asyncio.Task) -> Tuple[Dict, LLMProvider]:
+        """First successful answer of a hedged pair wins; the loser is cancelled"""
+        providers = {primary_task: self.provider, secondary_task: self.secondary_provider}
+        pending = set(providers)
+        primary_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = providers[task]
+                        key = "primary_wins" if winner == self.provider else "secondary_wins"
+                        self.multi_provider_counters[key] += 1
+                        if winner != self.provider:
+                            self.multi_provider_counters["hedge_wins"] += 1
+                        return task.result(), winner
+                    if task is primary_task:
+                        primary_error = task.exception()
+            # Both failed: report the primary's error
+            raise primary_error or secondary_task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    def _should_fail_over(error: Exception) -> bool:
+        """Provider-side failures (open circuit, exhausted retries, timeouts) are worth failing over"""
+        return isinstance(error, CircuitOpenError) or getattr(error, "retryable", False)
+    
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging: fixed, or a percentile of recent latencies"""
+        if self.hedge_delay_seconds > 0:
+            return self.hedge_delay_seconds
+        latencies = sorted(self._provider_latencies[self.provider])
+        if len(latencies) < self.hedge_min_samples:
+            return self.hedge_initial_delay_seconds
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))
+        return max(self.hedge_min_delay_seconds, latencies[index])
+    
+    def multi_provider_stats(self) -> Dict:
+        """Hedging/failover configuration and counters"""
+        if self.secondary_provider is None:
+            return {"mode": "off", "primary": self.provider.value}
+        return {
+            "mode": self.multi_provider_mode,
+            "primary": self.provider.value,
+            "secondary": self.secondary_provider.value,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+            "latency_samples": len(self._provider_latencies[self.provider]),
+            **self.multi_provider_counters
+        }
+    
+    async def call_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.0,
+        use_json_format: bool = False,
+        deadline: Optional[float] = None,
+        cache: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        response_schema: Optional[ResponseSchema] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of call(): yields text deltas as the provider produces them.
+        
+        Rate limits, the circuit breaker and the response cache apply as in
+        call(). Failures before the first delta are retried, then failed over
+        to the secondary provider if one is configured (streams are not
+        hedged); a failure after text has been yielded is raised to the
+        caller. A cache hit yields the whole cached completion as a single delta.
+        """
+        started = time.perf_counter()
+        model = self._provider_model(self.provider, endpoint)
+        cache_key = None
+        if self._response_cacheable(cache, temperature):
+            cache_key = self.response_cache_key(messages, temperature, use_json_format, endpoint)
+            if cache == CACHE_USE:
+                cached = await self.response_cache.aget(cache_key)
+                self._record_cache_lookup(endpoint, cached is not None)
+                if cached is not None:
+                    self._record_telemetry(endpoint, started, messages=messages, result=cached, cache_hit=True)
+                    yield cached["choices"][0]["message"]["content"]
+                    return
+        
+        cassette_key = None
+        if self.cassette.active:
+            cassette_key = self.cassette.request_key(
+                f"{self.provider.value}:{model}", messages, temperature, use_json_format
+            )
+            if self.cassette.mode == CASSETTE_REPLAY:
+                replayed: List[str] = []
+                try:
+                    async for delta in self.cassette.replay_stream(cassette_key, endpoint):
+                        replayed.append(delta)
+                        yield delta
+                except CassetteMissError as e:
+                    self._record_telemetry(endpoint, started, messages=messages, error=e)
+                    raise LLMServiceError(str(e))
+                self._record_telemetry(
+                    endpoint, started, messages=messages, content="".join(replayed), answered_by=self.provider
+                )
+                return
+        
+        if deadline is None:
+            deadline = time.monotonic() + self.request_deadline
+        schema = self._effective_schema(response_schema)
+        
+        attempts = {"calls": 0, "attempts": 0}
+        answered_by = self.provider
+        try:
+            try:
+                stack, chunks, first = await self._open_provider_stream(
+                    self.provider, messages, temperature, use_json_format, deadline, attempts, schema, endpoint
+                )
+            except Exception as e:
+                if self.secondary_provider is None or not self._should_fail_over(e):
+                    raise
+                self.multi_provider_counters["failovers"] += 1
+                logger.warning(
+                    f"Primary provider {self.provider.value} failed ({e}); "
+                    f"failing over stream to {self.secondary_provider.value}"
+                )
+                answered_by = self.secondary_provider
+                stack, chunks, first = await self._open_provider_stream(
+                    self.secondary_provider, messages, temperature, use_json_format, deadline, attempts, schema,
+                    endpoint
+                )
+            
+            parts: List[str] = []
+            # Arrival time of each delta, for the cassette
+            offsets: List[float] = []
+            try:
+                if first is not None:
+                    parts.append(first)
+                    offsets.append((time.perf_counter() - started) * 1000)
+                    yield first
+                    async for delta in chunks:
+                        parts.append(delta)
+                        offsets.append((time.perf_counter() - started) * 1000)
+                        yield delta
+            finally:
+                await chunks.aclose()
+                await stack.aclose()
+        except Exception as e:
+            self._record_telemetry(endpoint, started, messages=messages, attempts=attempts, error=e)
+            raise
+        
+        content = "".join(parts)
+        self._record_telemetry(
+            endpoint, started, messages=messages, content=content, answered_by=answered_by, attempts=attempts
+        )
+        logger.info(f"LLM stream complete ({answered_by.value}, {self._provider_model(answered_by, endpoint)}): {len(content)} chars")
+        if cassette_key is not None and self.cassette.mode == CASSETTE_RECORD:
+            self.cassette.record_stream(
+                cassette_key, endpoint, list(zip(offsets, parts)), (time.perf_counter() - started) * 1000
+            )
+        if cache_key is not None and content:
+            await self.response_cache.aset(
+                cache_key,
+                {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                meta={
+                    "endpoint": endpoint,
+                    "provider": self.provider.value,
+                    "model": model,
+                    "answered_by": answered_by.value
+                }
+            )
+    
+    async def _open_provider_stream(
+        self,
+        provider: LLMProvider,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        use_json_format: bool,
+        deadline: float,
+        attempts: Optional[Dict[str, int]] = None,
+        response_schema: Optional[ResponseSchema] = None,
+        stage: Optional[str] = None
+    ):
+        """Open a provider stream and read its first delta, with retries and the circuit breaker"""
+        if provider == LLMProvider.AZURE_OPENAI:
+            stream = self._stream_azure_openai
+        elif provider == LLMProvider.GOOGLE_GEMINI:
+            stream = self._stream_gemini
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+        model = self._provider_model(provider, stage)
+        limiter = get_rate_limiter(provider.value, model)
+        estimated_tokens = estimate_tokens(messages, self.estimated_completion_tokens)
+        
+        if attempts is not None:
+            attempts["calls"] += 1
+        
+        async def open_stream():
+            if attempts is not None:
+                attempts["attempts"] += 1
+            # Hold the rate limiter slot for the whole stream, not just the first chunk
+            stack = AsyncExitStack()
+            await stack.enter_async_context(limiter.acquire(estimated_tokens))
+            chunks = stream(messages, temperature, use_json_format, response_schema, model)
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                await chunks.aclose()
+                await stack.aclose()
+                raise
+            return stack, chunks, first
+        
+        name = f"{provider.value}:{model}"
+        return await call_with_retry(
+            open_stream,
+            policy=self.retry_policy,
+            breaker=get_circuit_breaker(name, self.circuit_failure_threshold, self.circuit_reset_seconds),
+            deadline=deadline,
+            stats=get_retry_stats(name)
+        )
+    
+    def _effective_schema(self, response_schema: Optional[ResponseSchema]) -> Optional[ResponseSchema]:
+        return response_schema if self.structured_output_enabled else None
+    
+    def _response_cacheable(self, cache: Optional[str], temperature: float) -> bool:
+        if cache not in (CACHE_USE, CACHE_REFRESH) or not self.response_cache_enabled:
+            return False
+        if self.cassette.active:
+            # Every call goes through the cassette, so recordings are complete and replays exact
+            return False
+        # Higher temperatures are meant to vary between calls
+        return temperature <= self.response_cache_max_temperature
+    
+    def _record_telemetry(
+        self,
+        stage: Optional[str],
+        started: float,
+        messages: Optional[List[Dict[str, str]]] = None,
+        result: Optional[Dict] = None,
+        content: Optional[str] = None,
+        answered_by: Optional[LLMProvider] = None,
+        attempts: Optional[Dict[str, int]] = None,
+        cache_hit: bool = False,
+        error: Optional[Exception] = None
+    ) -> None:
+        """
+        Report one call to the telemetry (tokens are estimated when the
+        provider sent no usage) and to the request trace, if one is active
+        """
+        latency_ms = (time.perf_counter() - started) * 1000
+        retries = max(0, attempts["attempts"] - attempts["calls"]) if attempts else 0
+        model = f"{answered_by.value}:{self._provider_model(answered_by, stage)}" if answered_by else None
+        route = self.model_router.route_name()
+        if content is None and result and result.get("choices"):
+            content = result["choices"][0]["message"].get("content") or ""
+        trace_llm_call({
+            "endpoint": current_endpoint.get(),
+            "stage": stage,
+            "route": route,
+            "model": model,
+            "latency_ms": round(latency_ms, 2),
+            "retries": retries,
+            "cache_hit": cache_hit,
+            "error": str(error) if error is not None else None,
+            "usage": (result or {}).get("usage"),
+            "messages": messages,
+            "response": content
+        })
+        
+        telemetry = get_llm_telemetry()
+        if cache_hit or error is not None:
+            telemetry.record(
+                stage, latency_ms, retries=retries, cache_hit=cache_hit, error=error is not None, route=route
+            )
+            return
+        
+        usage = (result or {}).get("usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        usage_estimated = prompt_tokens is None or completion_tokens is None
+        cached_prompt_tokens = cached_prompt_token_count(result)
+        if usage_estimated:
+            prompt_tokens = estimate_tokens(messages or [])
+            # estimate_tokens adds 4 tokens of per-message overhead
+            completion_tokens = max(0, estimate_tokens([{"content": content or ""}]) - 4)
+        telemetry.record(
+            stage,
+            latency_ms,
+            model=model,
+            prompt_tokens=int(prompt_tokens),
+            completion_tokens=int(completion_tokens),
+            cached_prompt_tokens=cached_prompt_tokens,
+            usage_estimated=usage_estimated,
+            retries=retries,
+            route=route
+        )
+    
+    def response_cache_key(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        use_json_format: bool,
+        endpoint: Optional[str] = None
+    ) -> str:
+        """Key under which call(..., cache="use", endpoint=endpoint) looks up this request"""
+        return make_cache_key(
+            self.provider.value, self._provider_model(self.provider, endpoint), messages, temperature, use_json_format
+        )
+    
+    def store_response(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        use_json_format: bool,
+        result: Dict,
+        endpoint: Optional[str] = None,
+        answered_by: Optional[str] = None
+    ) -> bool:
+        """
+        Add a response obtained outside call() (e.g. from a batch job) to the
+        response cache, so a later identical call(..., cache="use") is a hit.
+        
+        Returns:
+            False if the cache is disabled or the request is not cacheable
+        """
+        if not self._response_cacheable(CACHE_USE, temperature) or not result.get("choices"):
+            return False
+        self.response_cache.set(
+            self.response_cache_key(messages, temperature, use_json_format, endpoint),
+            result,
+            meta={
+                "endpoint": endpoint,
+                "provider": self.provider.value,
+                "model": self._provider_model(self.provider, endpoint),
+                "answered_by": answered_by or self.provider.value
+            }
+        )
+        return True
+    
+    def _record_cache_lookup(self, endpoint: Optional[str], hit: bool) -> None:
+        counters = self.response_cache_endpoints.setdefault(endpoint or "unknown", {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+    
+    def response_cache_stats(self) -> Dict:
+        """Response cache size plus hit rate per calling endpoint"""
+        endpoints = {}
+        for endpoint, counters in self.response_cache_endpoints.items():
+            lookups = counters["hits"] + counters["misses"]
+            endpoints[endpoint] = {
+                **counters,
+                "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0
+            }
+        return {
+            "enabled": self.response_cache_enabled,
+            "max_temperature": self.response_cache_max_temperature,
+            **self.response_cache.stats(),
+            "endpoints": endpoints
+        }
     
     async def _call_azure_openai(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.0,
-        use_json_format: bool = False
+        use_json_format: bool = False,
+        response_schema: Optional[ResponseSchema] = None,
+        deployment: Optional[str] = None
     ) -> Dict:
         """Call Azure OpenAI API"""
-        url = f"{self.endpoint}openai/deployments/{self.deployment}/chat/completions"
+        deployment = deployment or self.deployment
+        url = f"{self.endpoint}openai/deployments/{deployment}/chat/completions"
         params = {"api-version": self.api_version}
         
         headers = {
             "Content-Type": "application/json",
-            "api-key": self.api_key
+            "api-key": self.azure_api_key
         }
         
         payload = {
-            "model": self.deployment,
+            "model": deployment,
             "messages": messages,
             "temperature": temperature
         }
         
-        if use_json_format:
+        if response_schema is not None:
+            payload["response_format"] = response_schema.azure_response_format()
+        elif use_json_format:
             payload["response_format"] = {"type": "json_object"}
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, params=params, headers=headers, json=payload, timeout=30.0)
-                response.raise_for_status()
-                result = response.json()
-                
-                # Log LLM response
-                logger.info("=" * 80)
-                logger.info("LLM API Response (Azure OpenAI):")
-                logger.info(f"Model: {self.deployment}")
-                logger.info(f"Temperature: {temperature}")
-                if "choices" in result and len(result["choices"]) > 0:
-                    content = result["choices"][0]["message"]["content"]
-                    logger.info(f"Response Content:\n{content}")
-                else:
-                    logger.warning(f"Unexpected response structure: {result}")
-                logger.info("=" * 80)
-                
-                return result
-            except httpx.HTTPStatusError as e:
-                error_detail = f"Status: {e.response.status_code}, Response: {e.response.text}"
-                logger.error(f"HTTP Error (Azure OpenAI): {error_detail}")
-                raise Exception(f"Azure OpenAI API error: {error_detail}")
-            except Exception as e:
-                logger.error(f"Error calling Azure OpenAI: {str(e)}")
-                raise Exception(f"Error calling Azure OpenAI: {str(e)}")
+        client = self._get_http_client()
+        try:
+            response = await client.post(url, params=params, headers=headers, json=payload)
+            response.raise_for_status()
+            result = response.json()
+            
+            # Log LLM response (body sampled and truncated)
+            if "choices" in result and len(result["choices"]) > 0:
+                content = result["choices"][0]["message"]["content"] or ""
+                log_llm_response(logger, "azure_openai", deployment, temperature, content)
+            else:
+                logger.warning(f"Unexpected response structure: {str(result)[:500]}")
+            
+            return result
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            error_detail = f"Status: {status_code}, Response: {e.response.text}"
+            logger.error(f"HTTP Error (Azure OpenAI): {error_detail}")
+            raise LLMServiceError(
+                f"Azure OpenAI API error: {error_detail}",
+                status_code=status_code,
+                retryable=status_code in RETRYABLE_STATUS_CODES,
+                retry_after=parse_retry_after(e.response.headers)
+            )
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            logger.error(f"Connection error calling Azure OpenAI: {type(e).__name__}: {str(e)}")
+            raise LLMServiceError(
+                f"Error calling Azure OpenAI: {type(e).__name__}: {str(e)}",
+                retryable=True
+            )
+        except Exception as e:
+            logger.error(f"Error calling Azure OpenAI: {str(e)}")
+            raise LLMServiceError(f"Error calling Azure OpenAI: {str(e)}")
+    
+    async def _stream_azure_openai(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.0,
+        use_json_format: bool = False,
+        response_schema: Optional[ResponseSchema] = None,
+        deployment: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream an Azure OpenAI chat completion (stream=true server-sent events)"""
+        deployment = deployment or self.deployment
+        url = f"{self.endpoint}openai/deployments/{deployment}/chat/completions"
+        params = {"api-version": self.api_version}
+        headers = {
+            "Content-Type": "application/json",
+            "api-key": self.azure_api_key
+        }
+        payload = {
+            "model": deployment,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        if response_schema is not None:
+            payload["response_format"] = response_schema.azure_response_format()
+        elif use_json_format:
+            payload["response_format"] = {"type": "json_object"}
+        
+        client = self._get_http_client()
+        try:
+            async with client.stream("POST", url, params=params, headers=headers, json=payload) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed stream chunk: {data[:200]}")
+                        continue
+                    for choice in chunk.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            yield delta
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            error_detail = f"Status: {status_code}, Response: {e.response.text}"
+            logger.error(f"HTTP Error (Azure OpenAI stream): {error_detail}")
+            raise LLMServiceError(
+                f"Azure OpenAI API error: {error_detail}",
+                status_code=status_code,
+                retryable=status_code in RETRYABLE_STATUS_CODES,
+                retry_after=parse_retry_after(e.response.headers)
+            )
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            logger.error(f"Connection error streaming from Azure OpenAI: {type(e).__name__}: {str(e)}")
+            raise LLMServiceError(
+                f"Error calling Azure OpenAI: {type(e).__name__}: {str(e)}",
+                retryable=True
+            )
     
     async def _call_gemini(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.0,
-        use_json_format: bool = False
+        use_json_format: bool = False,
+        response_schema: Optional[ResponseSchema] = None,
+        model_name: Optional[str] = None
     ) -> Dict:
         """Call Google Gemini API"""
-        try:
-            import google.generativeai as genai
-        except ImportError:
-            raise ImportError(
-                "google-generativeai package is required for Gemini support. "
-                "Install it with: pip install google-generativeai"
-            )
-        
-        # Configure Gemini
-        genai.configure(api_key=self.api_key)
-        
-        # Convert messages format for Gemini
-        # Gemini uses a different message format - we need to convert from OpenAI format
-        system_instruction = None
-        conversation_parts = []
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            if role == "system":
-                system_instruction = content
-            elif role == "user":
-                conversation_parts.append({"role": "user", "parts": [content]})
-            elif role == "assistant":
-                conversation_parts.append({"role": "model", "parts": [content]})
-        
-        # Create model instance
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-        )
-        
-        if use_json_format:
-            # For JSON format, we'll add it to the system instruction
-            json_instruction = "\n\nIMPORTANT: You must respond with valid JSON only. Do not include any markdown formatting, code fences, or explanatory text. Return only the JSON object."
-            if system_instruction:
-                system_instruction += json_instruction
-            else:
-                system_instruction = json_instruction
+        model_name = model_name or self.model
+        system_instruction, conversation_parts = self._gemini_request(messages, use_json_format)
         
         try:
-            model = genai.GenerativeModel(
-                model_name=self.model,
-                generation_config=generation_config,
-                system_instruction=system_instruction if system_instruction else None
-            )
+            model = self._get_gemini_model(model_name, system_instruction, temperature, use_json_format, response_schema)
             
             # Handle conversation history
             if len(conversation_parts) > 1:
@@ -294,27 +1097,29 @@ class LLMService:
                 history = conversation_parts[:-1]
                 last_message = conversation_parts[-1]["parts"][0]
                 chat = model.start_chat(history=history)
-                response = await asyncio.to_thread(chat.send_message, last_message)
+                if self.gemini_call_mode == "async":
+                    response = await chat.send_message_async(last_message)
+                else:
+                    response = await self._run_in_gemini_executor(chat.send_message, last_message)
             elif len(conversation_parts) == 1:
                 # Single message
-                response = await asyncio.to_thread(model.generate_content, conversation_parts[0]["parts"][0])
+                prompt = conversation_parts[0]["parts"][0]
+                if self.gemini_call_mode == "async":
+                    response = await model.generate_content_async(prompt)
+                else:
+                    response = await self._run_in_gemini_executor(model.generate_content, prompt)
             else:
                 raise ValueError("No messages provided to Gemini")
             
             # Extract text from response
             response_text = response.text
             
-            # Log LLM response
-            logger.info("=" * 80)
-            logger.info("LLM API Response (Google Gemini):")
-            logger.info(f"Model: {self.model}")
-            logger.info(f"Temperature: {temperature}")
-            logger.info(f"Response Content:\n{response_text}")
-            logger.info("=" * 80)
+            # Log LLM response (body sampled and truncated)
+            log_llm_response(logger, "google_gemini", model_name, temperature, response_text)
             
             # Convert Gemini response to OpenAI-compatible format
             # This allows the rest of the code to work without changes
-            return {
+            result = {
                 "choices": [{
                     "message": {
                         "role": "assistant",
@@ -322,10 +1127,199 @@ class LLMService:
                     }
                 }]
             }
+            usage_metadata = getattr(response, "usage_metadata", None)
+            if usage_metadata is not None:
+                result["usage"] = {
+                    "prompt_tokens": getattr(usage_metadata, "prompt_token_count", 0),
+                    "completion_tokens": getattr(usage_metadata, "candidates_token_count", 0),
+                    "total_tokens": getattr(usage_metadata, "total_token_count", 0),
+                    # Same shape as Azure OpenAI's prompt caching report
+                    "prompt_tokens_details": {
+                        "cached_tokens": getattr(usage_metadata, "cached_content_token_count", 0) or 0
+                    }
+                }
+            return result
             
         except Exception as e:
             logger.error(f"Error calling Google Gemini: {str(e)}")
-            raise Exception(f"Error calling Google Gemini: {str(e)}")
+            # google.api_core errors carry the HTTP status as `code`
+            status_code = getattr(e, "code", None)
+            if not isinstance(status_code, int):
+                status_code = None
+            retryable = status_code in RETRYABLE_STATUS_CODES or isinstance(
+                e, (asyncio.TimeoutError, ConnectionError)
+            )
+            raise LLMServiceError(
+                f"Error calling Google Gemini: {str(e)}",
+                status_code=status_code,
+                retryable=retryable
+            )
+    
+    async def _stream_gemini(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.0,
+        use_json_format: bool = False,
+        response_schema: Optional[ResponseSchema] = None,
+        model_name: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream a Google Gemini completion chunk by chunk"""
+        model_name = model_name or self.model
+        system_instruction, conversation_parts = self._gemini_request(messages, use_json_format)
+        if not conversation_parts:
+            raise LLMServiceError("Error calling Google Gemini: No messages provided to Gemini")
+        
+        model = self._get_gemini_model(model_name, system_instruction, temperature, use_json_format, response_schema)
+        prompt = conversation_parts[-1]["parts"][0]
+        history = conversation_parts[:-1]
+        try:
+            if self.gemini_call_mode == "async":
+                if history:
+                    response = await model.start_chat(history=history).send_message_async(prompt, stream=True)
+                else:
+                    response = await model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = self._gemini_chunk_text(chunk)
+                    if text:
+                        yield text
+            else:
+                if history:
+                    chat = model.start_chat(history=history)
+                    response = await self._run_in_gemini_executor(
+                        lambda: chat.send_message(prompt, stream=True)
+                    )
+                else:
+                    response = await self._run_in_gemini_executor(
+                        lambda: model.generate_content(prompt, stream=True)
+                    )
+                iterator = iter(response)
+                while True:
+                    chunk = await self._run_in_gemini_executor(next, iterator, None)
+                    if chunk is None:
+                        break
+                    text = self._gemini_chunk_text(chunk)
+                    if text:
+                        yield text
+        except LLMServiceError:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming from Google Gemini: {str(e)}")
+            status_code = getattr(e, "code", None)
+            if not isinstance(status_code, int):
+                status_code = None
+            retryable = status_code in RETRYABLE_STATUS_CODES or isinstance(
+                e, (asyncio.TimeoutError, ConnectionError)
+            )
+            raise LLMServiceError(
+                f"Error calling Google Gemini: {str(e)}",
+                status_code=status_code,
+                retryable=retryable
+            )
+    
+    @staticmethod
+    def _gemini_chunk_text(chunk) -> str:
+        # .text raises when a chunk carries no text part (e.g. only safety ratings)
+        try:
+            return chunk.text
+        except (ValueError, AttributeError):
+            return ""
+    
+    def _gemini_request(
+        self,
+        messages: List[Dict[str, str]],
+        use_json_format: bool
+    ) -> Tuple[Optional[str], List[Dict]]:
+        """Convert OpenAI-style messages into a Gemini system instruction and conversation"""
+        self._get_genai()
+        
+        # Gemini uses a different message format - we need to convert from OpenAI format
+        system_instruction = None
+        conversation_parts = []
+        
+        for msg in messages:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            
+            if role == "system":
+                system_instruction = content
+            elif role == "user":
+                conversation_parts.append({"role": "user", "parts": [content]})
+            elif role == "assistant":
+                conversation_parts.append({"role": "model", "parts": [content]})
+        
+        if use_json_format:
+            # For JSON format, we'll add it to the system instruction
+            json_instruction = "\n\nIMPORTANT: You must respond with valid JSON only. Do not include any markdown formatting, code fences, or explanatory text. Return only the JSON object."
+            if system_instruction:
+                system_instruction += json_instruction
+            else:
+                system_instruction = json_instruction
+        
+        return system_instruction, conversation_parts
+    
+    def _get_genai(self):
+        """Import and configure the Gemini SDK once per service"""
+        if self._genai is None:
+            try:
+                import google.generativeai as genai
+            except ImportError:
+                raise ImportError(
+                    "google-generativeai package is required for Gemini support. "
+                    "Install it with: pip install google-generativeai"
+                )
+            if self.gemini_api_endpoint:
+                genai.configure(
+                    api_key=self.gemini_api_key,
+                    transport="rest",
+                    client_options={"api_endpoint": self.gemini_api_endpoint}
+                )
+            else:
+                genai.configure(api_key=self.gemini_api_key)
+            self._genai = genai
+        return self._genai
+    
+    def _get_gemini_model(
+        self,
+        model_name: str,
+        system_instruction: Optional[str],
+        temperature: float,
+        use_json_format: bool,
+        response_schema: Optional[ResponseSchema] = None
+    ):
+        """Return a cached GenerativeModel for this model/prompt/settings combination"""
+        schema_name = response_schema.name if response_schema is not None else None
+        key = (model_name, system_instruction, temperature, use_json_format, schema_name)
+        model = self._gemini_models.get(key)
+        if model is not None:
+            self._gemini_models.move_to_end(key)
+            return model
+        
+        genai = self._get_genai()
+        generation_config = {"temperature": temperature}
+        if use_json_format or response_schema is not None:
+            generation_config["response_mime_type"] = "application/json"
+            gemini_schema = response_schema.gemini_schema() if response_schema is not None else None
+            if gemini_schema is not None:
+                generation_config["response_schema"] = gemini_schema
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=genai.types.GenerationConfig(**generation_config),
+            system_instruction=system_instruction if system_instruction else None
+        )
+        self._gemini_models[key] = model
+        if len(self._gemini_models) > GEMINI_MODEL_CACHE_SIZE:
+            self._gemini_models.popitem(last=False)
+        return model
+    
+    async def _run_in_gemini_executor(self, func, *args):
+        """Run a blocking SDK call on the dedicated Gemini thread pool"""
+        if self._gemini_executor is None:
+            self._gemini_executor = ThreadPoolExecutor(
+                max_workers=self.gemini_max_workers,
+                thread_name_prefix="gemini"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._gemini_executor, func, *args)
 
 
 # Global LLM service instance
@@ -340,10 +1334,41 @@ def get_llm_service() -> LLMService:
     return _llm_service
 
 
+async def close_llm_service():
+    """Release the global LLM service's connections, if it was created"""
+    if _llm_service is not None:
+        await _llm_service.aclose()
+
+
+async def call_llm_stream(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.0,
+    use_json_format: bool = False,
+    deadline: Optional[float] = None,
+    cache: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    response_schema: Optional[ResponseSchema] = None
+) -> AsyncIterator[str]:
+    """
+    Convenience function to stream a completion from the configured LLM.
+    Yields text deltas; see LLMService.call_stream.
+    """
+    service = get_llm_service()
+    async for delta in service.call_stream(
+        messages, temperature, use_json_format,
+        deadline=deadline, cache=cache, endpoint=endpoint, response_schema=response_schema
+    ):
+        yield delta
+
+
 async def call_llm(
     messages: List[Dict[str, str]],
     temperature: float = 0.0,
-    use_json_format: bool = False
+    use_json_format: bool = False,
+    deadline: Optional[float] = None,
+    cache: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    response_schema: Optional[ResponseSchema] = None
 ) -> Dict:
     """
     Convenience function to call the configured LLM.
@@ -353,10 +1378,17 @@ async def call_llm(
         messages: List of message dictionaries with 'role' and 'content' keys
         temperature: Temperature for response generation (0.0 to 1.0)
         use_json_format: Whether to request JSON format response
+        deadline: Optional time.monotonic() value by which the call must finish
+        cache: Response cache policy: "use", "refresh" or "off" (default)
+        endpoint: Caller name (stage) used for cache statistics and telemetry
+        response_schema: Optional schema the JSON response must follow
     
     Returns:
         Dictionary containing the LLM response in OpenAI-compatible format
     """
     service = get_llm_service()
-    return await service.call(messages, temperature, use_json_format)
+    return await service.call(
+        messages, temperature, use_json_format,
+        deadline=deadline, cache=cache, endpoint=endpoint, response_schema=response_schema
+    )
 
@@ -0,0 +1,173 @@
+"""
+Log Pipeline - Non-blocking logging and LLM payload/trace logging
+
+Log records are put on a bounded in-memory queue by a QueueHandler and
+written to stdout by a QueueListener thread, so request handlers never wait
+on stream I/O. When the queue is full, records are dropped (and counted)
+rather than blocking the event loop.
+
+LLM response bodies are large, so they are logged for a sample of calls
+only and truncated. For debugging, a request can ask for a structured
+trace: with LLM_TRACE_FILE set, every LLM call made while serving a request
+sent with "X-LLM-Trace: 1" (or every request, with LLM_TRACE_ALL_REQUESTS)
+is written as one JSON line with the full messages and response, tagged
+with the trace ID returned in the X-LLM-Trace-Id response header.
+
+Settings (environment or backend/.env):
+    LOG_LEVEL                       Root log level (default: INFO)
+    LOG_ASYNC_ENABLED               Queue-based logging (default: true)
+    LOG_QUEUE_SIZE                  Records buffered before dropping (default: 10000)
+    LLM_LOG_PAYLOAD_SAMPLE_RATE     Share of LLM responses logged at INFO (default: 0.05)
+    LLM_LOG_PAYLOAD_MAX_CHARS       Truncate logged payloads to this length (default: 1000)
+    LLM_TRACE_FILE                  JSON lines file for request traces (default: disabled)
+    LLM_TRACE_ALL_REQUESTS          Trace every request, not only flagged ones (default: false)
+
+Usage:
+    from log_pipeline import setup_logging, log_llm_response
+
+    setup_logging()
+    log_llm_response(logger, "azure_openai", "gpt-4o", 0.2, content)
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TRACE_HEADER = "X-LLM-Trace"
+TRACE_ID_HEADER = "X-LLM-Trace-Id"
+
+# Trace ID of the current request when it is being traced
+current_trace_id: ContextVar[Optional[str]] = ContextVar("llm_trace_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_settings: Dict[str, Any] = {}
+_trace_logger = logging.getLogger("llm_trace")
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _load_settings() -> Dict[str, Any]:
+    from llm_service import get_setting
+
+    return {
+        "level": get_setting("LOG_LEVEL", "INFO").upper(),
+        "async": get_setting("LOG_ASYNC_ENABLED", "true").lower() == "true",
+        "queue_size": int(get_setting("LOG_QUEUE_SIZE", "10000")),
+        "payload_sample_rate": float(get_setting("LLM_LOG_PAYLOAD_SAMPLE_RATE", "0.05")),
+        "payload_max_chars": int(get_setting("LLM_LOG_PAYLOAD_MAX_CHARS", "1000")),
+        "trace_file": get_setting("LLM_TRACE_FILE", ""),
+        "trace_all": get_setting("LLM_TRACE_ALL_REQUESTS", "false").lower() == "true",
+    }
+
+
+def setup_logging() -> None:
+    """Configure the root logger (replaces logging.basicConfig); safe to call twice"""
+    global _listener, _queue_handler, _settings
+    if _settings:
+        return
+    _settings = _load_settings()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    handlers: List[logging.Handler] = [stream_handler]
+
+    if _settings["trace_file"]:
+        trace_handler = logging.FileHandler(_settings["trace_file"], encoding="utf-8")
+        trace_handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_handler.addFilter(lambda record: record.name == "llm_trace")
+        stream_handler.addFilter(lambda record: record.name != "llm_trace")
+        handlers.append(trace_handler)
+    _trace_logger.setLevel(logging.INFO)
+
+    root = logging.getLogger()
+    root.setLevel(_settings["level"])
+    if _settings["async"]:
+        log_queue: queue.Queue = queue.Queue(maxsize=_settings["queue_size"])
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(_queue_handler)
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread (called from the app lifespan)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "async": bool(_settings.get("async")),
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "payload_sample_rate": _settings.get("payload_sample_rate"),
+        "trace_file": _settings.get("trace_file") or None,
+    }
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+
+def log_llm_response(
+    log: logging.Logger,
+    provider: str,
+    model: str,
+    temperature: float,
+    content: str
+) -> None:
+    """One summary line per response; the (truncated) body for sampled calls or at DEBUG"""
+    summary = f"LLM response ({provider}, {model}, temperature={temperature}): {len(content)} chars"
+    max_chars = _settings.get("payload_max_chars", 1000)
+    if random.random() < _settings.get("payload_sample_rate", 0.0):
+        log.info(f"{summary}\n{_truncate(content, max_chars)}")
+    elif log.isEnabledFor(logging.DEBUG):
+        log.debug(f"{summary}\n{_truncate(content, max_chars)}")
+    else:
+        log.info(summary)
+
+
+def start_trace(requested: bool) -> Optional[str]:
+    """Begin tracing the current request if asked to (and a trace file is configured)"""
+    if not _settings.get("trace_file") or not (requested or _settings.get("trace_all")):
+        return None
+    trace_id = uuid.uuid4().hex
+    current_trace_id.set(trace_id)
+    return trace_id
+
+
+def trace_llm_call(record: Dict[str, Any]) -> None:
+    """Write one LLM call of a traced request to the trace file"""
+    trace_id = current_trace_id.get()
+    if trace_id is None:
+        return
+    _trace_logger.info(json.dumps(
+        {"trace_id": trace_id, "ts": round(time.time(), 3), **record},
+        ensure_ascii=False, default=str
+    ))
@@ -7,28 +7,54 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, field_validator, ValidationError
-from typing import Optional, List
+from typing import AsyncIterator, Callable, Optional, List, Dict
 import httpx
 import json
 import os
 from pathlib import Path
+from contextlib import asynccontextmanager
 import logging
 import asyncio
+import base64
+import hashlib
+import time
+import unicodedata
 from datetime import datetime
 from review_service import ReviewService
 from face_image_service import FaceImageService
 from fastapi.responses import Response
-from llm_service import call_llm
+from llm_service import call_llm, call_llm_stream, cached_prompt_token_count, close_llm_service, get_llm_service, CACHE_USE
+from partial_json import IncrementalJSONParser
+from structured_output import StructuredOutputError, parse_counters, parse_json_response, response_schema
+from rate_limiter import estimate_tokens, get_rate_limiter_stats
+from resilience import get_resilience_stats
+from telemetry import current_endpoint, get_llm_telemetry_stats
+from prompt_templates import EvaluationPrompts, format_candidate_info, format_review_text, format_target_info
+from model_routing import ROUTE_HEADER, current_model_route
+from log_pipeline import TRACE_HEADER, TRACE_ID_HEADER, logging_stats, setup_logging, start_trace, stop_logging
 from data_validator import validate_and_log
+from filter_engine import apply_filters, iter_matching_rows
+from sqlite_cache import SQLiteCache, make_cache_key
+from query_parser import get_fast_path_parser
+from keyword_index import get_keyword_index
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (queue-based: request handlers never block on log output)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: release pooled LLM connections and flush logs on shutdown"""
+    yield
+    await close_llm_service()
+    stop_logging()
+
+
 app = FastAPI(
     title="PF Talent Search API",
     version="1.0.0",
-    description="Minimal prototype for skill-based people search with configurable LLM support (Azure OpenAI or Google Gemini)"
+    description="Minimal prototype for skill-based people search with configurable LLM support (Azure OpenAI or Google Gemini)",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -45,6 +71,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute LLM calls made while serving a request to its endpoint in the telemetry,
+# trace them when the request asks for it (X-LLM-Trace: 1, needs LLM_TRACE_FILE)
+# and use the model route it picked (X-LLM-Route, for A/B comparisons)
+@app.middleware("http")
+async def tag_llm_request_context(request: Request, call_next):
+    current_endpoint.set(request.url.path)
+    current_model_route.set(request.headers.get(ROUTE_HEADER))
+    trace_id = start_trace(request.headers.get(TRACE_HEADER) == "1")
+    response = await call_next(request)
+    if trace_id:
+        response.headers[TRACE_ID_HEADER] = trace_id
+    if request.url.path.startswith("/api/"):
+        response.headers[ROUTE_HEADER] = get_llm_service().model_router.route_name()
+    return response
+
 # Exception handler for validation errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -117,6 +158,92 @@ EMPLOYEES_FILE = BASE_DIR / "mock-data" / "employees" / "employees.json"
 PERSONAS_FILE = BASE_DIR / "mock-data" / "personas" / "personas.json"
 RESUMES_DIR = BASE_DIR / "mock-data" / "resumes"
 
+# Natural language parse cache: normalized query + language + prompt version + model route -> filters
+# Bump NL_PARSE_PROMPT_VERSION when the meaning of the parsed filters changes
+NL_PARSE_PROMPT_VERSION = "1"
+NL_PARSE_CACHE_ENABLED = os.getenv(
+    "NL_PARSE_CACHE_ENABLED",
+    _env_vars.get("NL_PARSE_CACHE_ENABLED", "true")
+).lower() == "true"
+NL_PARSE_CACHE_TTL_SECONDS = float(os.getenv(
+    "NL_PARSE_CACHE_TTL_SECONDS",
+    _env_vars.get("NL_PARSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+))
+NL_PARSE_CACHE_MAX_ENTRIES = int(os.getenv(
+    "NL_PARSE_CACHE_MAX_ENTRIES",
+    _env_vars.get("NL_PARSE_CACHE_MAX_ENTRIES", "5000")
+))
+nl_parse_cache = SQLiteCache(
+    namespace="nl_parse",
+    ttl_seconds=NL_PARSE_CACHE_TTL_SECONDS,
+    max_entries=NL_PARSE_CACHE_MAX_ENTRIES
+)
+
+# Pairwise evaluation cache: (target, candidate, soft criteria, language, data hashes) -> CandidateEvaluation
+# Bump EVALUATION_CACHE_VERSION when the meaning of the scores changes
+EVALUATION_CACHE_VERSION = "1"
+EVALUATION_CACHE_ENABLED = os.getenv(
+    "EVALUATION_CACHE_ENABLED",
+    _env_vars.get("EVALUATION_CACHE_ENABLED", "true")
+).lower() == "true"
+EVALUATION_CACHE_TTL_SECONDS = float(os.getenv(
+    "EVALUATION_CACHE_TTL_SECONDS",
+    _env_vars.get("EVALUATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+))
+EVALUATION_CACHE_MAX_ENTRIES = int(os.getenv(
+    "EVALUATION_CACHE_MAX_ENTRIES",
+    _env_vars.get("EVALUATION_CACHE_MAX_ENTRIES", "50000")
+))
+evaluation_cache = SQLiteCache(
+    namespace="evaluation",
+    ttl_seconds=EVALUATION_CACHE_TTL_SECONDS,
+    max_entries=EVALUATION_CACHE_MAX_ENTRIES
+)
+
+# Natural language search paging, sort keys and scan batch size for the SSE stream
+NL_SEARCH_RESULT_LIMIT = 100
+NL_SEARCH_MAX_PAGE_SIZE = 500
+NL_SEARCH_SORT_KEYS = ["relevance", "tenure", "grade", "name"]
+NL_STREAM_BATCH_SIZE = int(os.getenv(
+    "NL_STREAM_BATCH_SIZE",
+    _env_vars.get("NL_STREAM_BATCH_SIZE", "500")
+))
+
+# Keyword matches streamed as provisional results while the LLM parses a query
+NL_SPECULATIVE_SEARCH_ENABLED = os.getenv(
+    "NL_SPECULATIVE_SEARCH_ENABLED",
+    _env_vars.get("NL_SPECULATIVE_SEARCH_ENABLED", "true")
+).lower() == "true"
+NL_SPECULATIVE_RESULT_LIMIT = 20
+
+# Rule-based parser tried before the cache and the LLM for simple queries
+NL_FAST_PATH_ENABLED = os.getenv(
+    "NL_FAST_PATH_ENABLED",
+    _env_vars.get("NL_FAST_PATH_ENABLED", "true")
+).lower() == "true"
+
+# Candidates evaluated per LLM request (1 = one resume and one review call per candidate)
+EVALUATION_BATCH_SIZE = int(os.getenv(
+    "EVALUATION_BATCH_SIZE",
+    _env_vars.get("EVALUATION_BATCH_SIZE", "1")
+))
+EVALUATION_MAX_BATCH_SIZE = 10
+
+# Candidates (or candidate batches) evaluated at the same time per request.
+# LLM calls still go through the shared rate limiter (LLM_MAX_IN_FLIGHT, LLM_RPM, ...)
+EVALUATION_CONCURRENCY = int(os.getenv(
+    "EVALUATION_CONCURRENCY",
+    _env_vars.get("EVALUATION_CONCURRENCY", "5")
+))
+EVALUATION_MAX_CONCURRENCY = 30
+
+# Per LLM call during evaluation (resume and review are called at the same time);
+# a side that times out or fails is left out and the candidate is scored from the other
+EVALUATION_CALL_TIMEOUT_SECONDS = float(os.getenv(
+    "EVALUATION_CALL_TIMEOUT_SECONDS",
+    _env_vars.get("EVALUATION_CALL_TIMEOUT_SECONDS", "60")
+))
+
 # Initialize review service
 review_service = ReviewService()
 
@@ -394,11 +521,71 @@ class EvaluationScore(BaseModel):
     overall: int
 
 
+class CandidateScore(BaseModel):
+    """Scores of a finished evaluation; the resume dimensions are None when only reviews were analyzed"""
+    technical_skills: Optional[int] = None
+    domain_expertise: Optional[int] = None
+    experience_level: Optional[int] = None
+    role_alignment: Optional[int] = None
+    soft_skills: Optional[int] = None
+    overall: int
+
+
 class CandidateEvaluation(BaseModel):
-    scores: EvaluationScore
+    scores: CandidateScore
     strengths: List[str]
     gaps: List[str]
     explanation: str
+    sources: List[str] = []  # Analyses the scores come from: "resume" and/or "review"
+
+
+# Responses the evaluation prompts ask for, sent to the LLM as response schemas.
+# Lists and the explanation default to empty so a truncated response that
+# still has its scores is usable.
+class ResumeEvaluationOutput(BaseModel):
+    scores: EvaluationScore
+    strengths: List[str] = []
+    gaps: List[str] = []
+    explanation: str = ""
+
+
+class ReviewScore(BaseModel):
+    performance_alignment: int
+    growth_trajectory: int
+    goal_achievement: int
+    career_alignment: int
+    overall: int
+
+
+class ReviewEvaluationOutput(BaseModel):
+    scores: ReviewScore
+    strengths: List[str] = []
+    gaps: List[str] = []
+    explanation: str = ""
+
+
+class BatchResumeEvaluation(BaseModel):
+    candidate_id: str
+    scores: EvaluationScore
+    strengths: List[str] = []
+    gaps: List[str] = []
+    explanation: str = ""
+
+
+class BatchResumeEvaluationOutput(BaseModel):
+    evaluations: List[BatchResumeEvaluation]
+
+
+class BatchReviewEvaluation(BaseModel):
+    candidate_id: str
+    scores: ReviewScore
+    strengths: List[str] = []
+    gaps: List[str] = []
+    explanation: str = ""
+
+
+class BatchReviewEvaluationOutput(BaseModel):
+    evaluations: List[BatchReviewEvaluation]
 
 
 class EvaluateRequest(BaseModel):
@@ -407,6 +594,9 @@ class EvaluateRequest(BaseModel):
     candidate_ids: List[str]
     soft_criteria: dict
     language: Optional[str] = "ja"  # "ja" or "en"
+    stream_tokens: Optional[bool] = False  # /evaluate/stream: send partial results while the LLM writes
+    batch_size: Optional[int] = None  # Candidates per LLM request; defaults to EVALUATION_BATCH_SIZE
+    concurrency: Optional[int] = None  # Candidates evaluated at once; defaults to EVALUATION_CONCURRENCY
 
 
 class CandidateResult(BaseModel):
@@ -424,8 +614,12 @@ class EvaluateResponse(BaseModel):
 
 # Natural Language Search Models
 class NaturalLanguageSearchRequest(BaseModel):
-    query: str
+    query: Optional[str] = ""  # Not needed when a cursor is given
     language: Optional[str] = "ja"  # "ja" or "en"
+    cursor: Optional[str] = None  # next_cursor from a previous page (reuses the parsed filters)
+    page_size: Optional[int] = None  # 1..NL_SEARCH_MAX_PAGE_SIZE, defaults to NL_SEARCH_RESULT_LIMIT
+    sort_by: Optional[str] = None  # "relevance" (default), "tenure", "grade" or "name"
+    sort_order: Optional[str] = "asc"  # "asc" or "desc"
 
 
 class NaturalLanguageSearchResponse(BaseModel):
@@ -434,6 +628,7 @@ class NaturalLanguageSearchResponse(BaseModel):
     parsed_filters: dict
     results: List[dict]
     stats: dict
+    next_cursor: Optional[str] = None  # Pass back as cursor to fetch the next page
 
 
 # Review Models
@@ -484,17 +679,29 @@ class EmployeeReviewsResponse(BaseModel):
 
 
 # Legacy function for backward compatibility - now uses the unified LLM service
-async def call_azure_openai(messages: List[dict], temperature: float = 0.0, use_json_format: bool = False) -> dict:
+async def call_azure_openai(
+    messages: List[dict],
+    temperature: float = 0.0,
+    use_json_format: bool = False,
+    cache: Optional[str] = None,
+    endpoint: Optional[str] = None,
+    response_schema=None
+) -> dict:
     """
     Legacy function - redirects to unified LLM service.
     This function is kept for backward compatibility but now uses the configurable LLM service.
     """
     try:
-        result = await call_llm(messages, temperature, use_json_format)
+        result = await call_llm(
+            messages, temperature, use_json_format,
+            cache=cache, endpoint=endpoint, response_schema=response_schema
+        )
         return result
     except Exception as e:
         logger.error(f"Error calling LLM: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error calling LLM: {str(e)}")
+        # Provider overloaded or circuit open after retries: tell the client to come back later
+        status_code = 503 if getattr(e, "status_code", None) == 503 or getattr(e, "retryable", False) else 500
+        raise HTTPException(status_code=status_code, detail=f"Error calling LLM: {str(e)}")
 
 
 @app.get("/")
@@ -556,7 +763,10 @@ JSON形式:
     ]
 
     try:
-        response = await call_azure_openai(messages, temperature=0.0, use_json_format=True)
+        response = await call_azure_openai(
+            messages, temperature=0.0, use_json_format=True, cache=CACHE_USE, endpoint="persona",
+            response_schema=response_schema(PersonaResponse)
+        )
         
         if "choices" not in response or len(response["choices"]) == 0:
             raise HTTPException(status_code=500, detail="No response from Azure OpenAI")
@@ -565,9 +775,8 @@ JSON形式:
         
         # Parse JSON response
         try:
-            persona_data = json.loads(content)
-            return PersonaResponse(**persona_data)
-        except json.JSONDecodeError as e:
+            return parse_json_response(content, PersonaResponse)
+        except StructuredOutputError as e:
             raise HTTPException(status_code=500, detail=f"Failed to parse JSON response: {str(e)}")
             
     except HTTPException:
@@ -595,7 +804,7 @@ async def test_llm():
     ]
     
     try:
-        response = await call_llm(test_messages, temperature=0.0)
+        response = await call_llm(test_messages, temperature=0.0, endpoint="connection_test")
         if "choices" in response and len(response["choices"]) > 0:
             return {
                 "status": "success",
@@ -864,32 +1073,20 @@ Available database fields:
     ]
 
     try:
-        response = await call_azure_openai(messages, temperature=0.1, use_json_format=True)
+        response = await call_azure_openai(
+            messages, temperature=0.1, use_json_format=True, cache=CACHE_USE, endpoint="analysis",
+            response_schema=response_schema(AnalysisResult)
+        )
         
         if "choices" not in response or len(response["choices"]) == 0:
             raise HTTPException(status_code=500, detail="No response from Azure OpenAI")
         
         content = response["choices"][0]["message"]["content"]
         
-        # Clean JSON (remove markdown code fences if present)
-        content = re.sub(r'```json\s*', '', content)
-        content = re.sub(r'```\s*', '', content)
-        content = content.strip()
-        
-        # Parse JSON
+        # Parse JSON (code fences and truncation are handled by the parser)
         try:
-            analysis_data = json.loads(content)
-            
-            # Build response
-            hard_filters = HardFilter(**analysis_data.get("hard_filters", {}))
-            soft_criteria = SoftCriteria(**analysis_data.get("soft_criteria", {}))
-            thinking_text = analysis_data.get("thinking_text", "分析が完了しました。")
-            
-            analysis_result = AnalysisResult(
-                hard_filters=hard_filters,
-                soft_criteria=soft_criteria,
-                thinking_text=thinking_text
-            )
+            analysis_result = parse_json_response(content, AnalysisResult)
+            thinking_text = analysis_result.thinking_text or "分析が完了しました。"
             
             return SimilarEmployeeSearchResponse(
                 search_id=search_id,
@@ -897,7 +1094,7 @@ Available database fields:
                 thinking_text=thinking_text,
                 analysis_result=analysis_result
             )
-        except json.JSONDecodeError as e:
+        except StructuredOutputError as e:
             raise HTTPException(status_code=500, detail=f"Failed to parse JSON response: {str(e)}")
             
     except HTTPException:
@@ -930,7 +1127,7 @@ async def filter_candidates(request: FilterSearchRequest):
     for emp in employees:
         # Exclude target employee
         if emp.get("employee_id") == target_employee_id:
-            logger.info(f"Skipping target employee: {emp.get('employee_id')}")
+            logger.debug(f"Skipping target employee: {emp.get('employee_id')}")
             continue
         
         # Check current employee flag
@@ -1128,7 +1325,7 @@ async def filter_candidates(request: FilterSearchRequest):
                         continue
         
         filtered.append(emp)
-        logger.info(f"Included employee {emp.get('employee_id')} ({emp.get('employee_name')}): dept={emp.get('dept_3')}, title={emp.get('job_title')}, family={emp.get('job_family')}")
+        logger.debug(f"Included employee {emp.get('employee_id')} ({emp.get('employee_name')}): dept={emp.get('dept_3')}, title={emp.get('job_title')}, family={emp.get('job_family')}")
     
     # Limit to 50 candidates
     filtered = filtered[:50]
@@ -1167,215 +1364,643 @@ LIMIT 50"""
     )
 
 
-async def evaluate_candidates_stream(request: EvaluateRequest):
-    """
-    Stream evaluation progress as candidates are processed
-    """
-    employees = load_employees()
-    personas = load_personas()
-    
-    target_employee = request.target_employee
-    candidate_ids = request.candidate_ids[:30]  # Limit to 30 for performance
-    soft_criteria = request.soft_criteria
-    language = request.language or "ja"
-    
-    # Get target employee's persona and resume
+# Candidate Evaluation Helpers
+RESUME_SCORE_FIELDS = list(EvaluationScore.model_fields)
+REVIEW_SCORE_FIELDS = list(ReviewScore.model_fields)
+
+
+def _evaluation_content_hash(employee: dict, persona: dict, resume: str, reviews: dict) -> str:
+    """Hash of everything about one employee that goes into the evaluation prompts"""
+    return make_cache_key(employee, persona, resume, reviews)
+
+
+def _prepare_evaluation_target(language: str, target_employee: dict, soft_criteria: dict, personas: dict) -> dict:
+    """Target data plus its evaluation prompts, whose target part is formatted here once per search"""
     target_id = target_employee.get("employee_id")
     target_persona = personas.get(target_id, {})
     target_resume = load_resume(target_id) or ""
-    
-    evaluations = []
-    total = len(candidate_ids)
-    
-    async def generate():
-        for idx, candidate_id in enumerate(candidate_ids, 1):
-            # Find candidate employee
-            candidate_emp = next((e for e in employees if e.get("employee_id") == candidate_id), None)
-            if not candidate_emp:
-                # Send progress update even if candidate not found
-                progress_data = {
-                    "type": "progress",
-                    "current": idx,
-                    "total": total
-                }
-                yield f"data: {json.dumps(progress_data)}\n\n"
-                continue
-            
-            # Send progress update before processing
-            progress_data = {
-                "type": "progress",
-                "current": idx,
-                "total": total
-            }
-            yield f"data: {json.dumps(progress_data)}\n\n"
-            
-            candidate_persona = personas.get(candidate_id, {})
-            candidate_resume = load_resume(candidate_id) or ""
-            
-            # Build evaluation prompt based on language
-            if language == "en":
-                system_prompt = """You are an excellent HR evaluator. Analyze candidate resumes and evaluate similarity to the target employee across 5 dimensions.
+    target_reviews = review_service.get_all_reviews_for_employee(target_id)
+    review_text = format_review_text(target_reviews)
+    info = format_target_info(language, target_employee, target_persona, target_resume, soft_criteria)
+    prompts = EvaluationPrompts(language, info, review_text)
+    # Evaluation cache key parts shared by every candidate of this search. The
+    # prompt hash covers the instructions, the route the models that answer them
+    empty_prompts = EvaluationPrompts(language, "", "")
+    prompt_hash = make_cache_key(empty_prompts.resume_messages(""), empty_prompts.review_messages(""))[:12]
+    cache_scope = [
+        EVALUATION_CACHE_VERSION, prompt_hash, get_llm_service().model_router.route_name(), language,
+        target_id, make_cache_key(soft_criteria),
+        _evaluation_content_hash(target_employee, target_persona, target_resume, target_reviews)
+    ]
+    return {
+        "id": target_id,
+        "info": info,
+        "review_text": review_text,
+        "has_reviews": bool(target_reviews.get("monthly") or target_reviews.get("half_year")),
+        "prompts": prompts,
+        "cache_scope": cache_scope
+    }
 
-Output must be in JSON format following this structure:
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "Expert in Python and TensorFlow",
-    "Has practical experience with Azure ML"
-  ],
-  "gaps": [
-    "Lacks NLP experience",
-    "Limited leadership experience"
-  ],
-  "explanation": "This candidate scores highly in technical skills and domain knowledge, but has room for improvement in years of experience and soft skills."
-}
 
-Important:
-- Each score is an integer from 0-100
-- overall is the average of the 5 dimensions (rounded)
-- strengths: maximum 3, gaps: maximum 2
-- explanation: 1-2 sentences in natural English
-- Output JSON only, do not use markdown code blocks"""
-            else:
-                system_prompt = """あなたは優秀な人事評価者です。候補者のレジュメを分析し、ターゲット従業員との類似度を5つの次元で評価してください。
+def _prepare_evaluation_candidate(language: str, candidate_emp: dict, personas: dict) -> dict:
+    candidate_id = candidate_emp.get("employee_id")
+    candidate_persona = personas.get(candidate_id, {})
+    candidate_resume = load_resume(candidate_id) or ""
+    candidate_reviews = review_service.get_all_reviews_for_employee(candidate_id)
+    return {
+        "id": candidate_id,
+        "employee": candidate_emp,
+        "content_hash": _evaluation_content_hash(candidate_emp, candidate_persona, candidate_resume, candidate_reviews),
+        "info": format_candidate_info(language, candidate_emp, candidate_persona, candidate_resume),
+        "batch_info": format_candidate_info(
+            language, candidate_emp, candidate_persona, candidate_resume, candidate_id=candidate_id
+        ),
+        "review_text": format_review_text(candidate_reviews),
+        "has_reviews": bool(candidate_reviews.get("monthly") or candidate_reviews.get("half_year"))
+    }
 
-出力は必ずJSON形式で、以下の構造に従ってください：
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "PythonとTensorFlowに精通している",
-    "Azure MLの実務経験がある"
-  ],
-  "gaps": [
-    "NLPの経験が不足している",
-    "リーダーシップ経験が少ない"
-  ],
-  "explanation": "この候補者は技術スキルとドメイン知識で高い評価を得ていますが、経験年数とソフトスキルで改善の余地があります。"
-}
 
-重要：
-- 各スコアは0-100の整数
-- overallは5つの次元の平均（四捨五入）
-- strengthsは最大3つ、gapsは最大2つ
-- explanationは自然な日本語で1-2文
-- JSONのみを出力し、マークダウンコードブロックは使用しない"""
+def _evaluation_cache_key(target: dict, candidate: dict) -> str:
+    return make_cache_key(*target["cache_scope"], candidate["id"], candidate["content_hash"])
 
-            if language == "en":
-                target_info = f"""
-Target Employee:
-- Name: {target_employee.get('employee_name')}
-- Position: {target_employee.get('job_title')}
-- Department: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- Resume: {target_resume[:500]}...
-
-Search Criteria:
-- Key Skills: {', '.join(soft_criteria.get('key_skills', []))}
-- Domain Expertise: {', '.join(soft_criteria.get('domain_expertise', []))}
-- Experience Level: {soft_criteria.get('experience_level', '')}
-"""
 
-                candidate_info = f"""
-Candidate:
-- Name: {candidate_emp.get('employee_name')}
-- Position: {candidate_emp.get('job_title')}
-- Department: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- Resume: {candidate_resume[:500]}...
-"""
+async def _cached_evaluations(target: dict, candidates: List[dict]) -> Dict[str, dict]:
+    """Cached results by candidate ID; any change to a key input is a miss"""
+    if not EVALUATION_CACHE_ENABLED:
+        return {}
+    keys = {_evaluation_cache_key(target, candidate): candidate["id"] for candidate in candidates}
+    values = await evaluation_cache.aget_many(list(keys))
+    return {
+        keys[key]: {
+            "evaluation": CandidateEvaluation(**value["evaluation"]),
+            "review_analyzed": value["review_analyzed"]
+        }
+        for key, value in values.items()
+    }
+
+
+async def _store_evaluation(language: str, target: dict, candidate: dict, result: Optional[dict]) -> None:
+    """Cache a result unless a side of it failed (it is retried next time instead)"""
+    if not EVALUATION_CACHE_ENABLED or result is None:
+        return
+    sources = result["evaluation"].sources
+    if "resume" not in sources or ((target["has_reviews"] or candidate["has_reviews"]) and "review" not in sources):
+        return
+    await evaluation_cache.aset(
+        _evaluation_cache_key(target, candidate),
+        {"evaluation": result["evaluation"].model_dump(), "review_analyzed": result["review_analyzed"]},
+        meta={"target_id": target["id"], "candidate_id": candidate["id"], "language": language}
+    )
+
+
+def _new_evaluation_counters() -> dict:
+    return {"llm_requests": 0, "input_tokens_estimate": 0, "cached_input_tokens": 0, "individual_retries": 0}
 
-                user_prompt = f"""{target_info}
 
-{candidate_info}
+def _count_llm_request(counters: dict, messages: List[dict]) -> None:
+    counters["llm_requests"] += 1
+    counters["input_tokens_estimate"] += estimate_tokens(messages)
 
-Evaluate how similar this candidate is to the target employee across 5 dimensions."""
+
+def _count_llm_usage(counters: dict, response: dict) -> None:
+    """Prompt tokens the provider reported as served from its prefix cache"""
+    counters["cached_input_tokens"] += cached_prompt_token_count(response)
+
+
+async def _evaluation_call(messages: List[dict], endpoint: str, output_model, counters: dict) -> str:
+    """One evaluation LLM call, bounded by EVALUATION_CALL_TIMEOUT_SECONDS; returns the content"""
+    _count_llm_request(counters, messages)
+    try:
+        response = await asyncio.wait_for(
+            call_azure_openai(
+                messages, temperature=0.2, use_json_format=True, cache=CACHE_USE, endpoint=endpoint,
+                response_schema=response_schema(output_model)
+            ),
+            timeout=EVALUATION_CALL_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise ValueError(f"{endpoint} call timed out after {EVALUATION_CALL_TIMEOUT_SECONDS:g}s")
+    _count_llm_usage(counters, response)
+    if "choices" not in response or len(response["choices"]) == 0:
+        raise ValueError("No choices in LLM response")
+    return response["choices"][0]["message"]["content"]
+
+
+def _parse_resume_evaluation(content: str) -> dict:
+    output = parse_json_response(content, ResumeEvaluationOutput)
+    return {
+        "scores": output.scores,
+        "strengths": output.strengths[:3],
+        "gaps": output.gaps[:2],
+        "explanation": output.explanation
+    }
+
+
+def _parse_review_evaluation(content: str) -> dict:
+    output = parse_json_response(content, ReviewEvaluationOutput)
+    return {
+        "scores": output.scores.model_dump(),
+        "strengths": output.strengths[:2],
+        "gaps": output.gaps[:2],
+        "explanation": output.explanation
+    }
+
+
+def _validate_batch_evaluations(data, expected_ids: List[str], score_fields: List[str]) -> Dict[str, dict]:
+    """
+    Strictly validate a batched evaluation response.
+
+    Returns the valid entries by candidate_id. Entries with unknown or
+    duplicate IDs, missing or out-of-range scores, or wrongly typed fields
+    are dropped (and logged) so the caller can retry those candidates.
+    """
+    items = data.get("evaluations") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("Batch response has no 'evaluations' array")
+
+    expected = set(expected_ids)
+    valid: Dict[str, dict] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        candidate_id = str(item.get("candidate_id", ""))
+        problem = None
+        scores = item.get("scores")
+        if candidate_id not in expected:
+            problem = "unexpected candidate_id"
+        elif candidate_id in valid:
+            problem = "duplicate candidate_id"
+        elif not isinstance(scores, dict):
+            problem = "missing scores"
+        else:
+            for field in score_fields:
+                value = scores.get(field)
+                if isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+                    problem = f"invalid score {field}={scores.get(field)!r}"
+                    break
+                scores[field] = value
+        if problem is None:
+            if not isinstance(item.get("strengths", []), list) or not isinstance(item.get("gaps", []), list):
+                problem = "strengths/gaps must be arrays"
+            elif not isinstance(item.get("explanation", ""), str):
+                problem = "explanation must be a string"
+        if problem:
+            logger.warning(f"Dropping batch evaluation entry for '{candidate_id}': {problem}")
+            continue
+        valid[candidate_id] = {
+            "scores": {field: scores[field] for field in score_fields},
+            "strengths": [str(s) for s in item.get("strengths", [])],
+            "gaps": [str(g) for g in item.get("gaps", [])],
+            "explanation": item.get("explanation", "")
+        }
+    return valid
+
+
+def _ranking_key(evaluation: CandidateEvaluation) -> tuple:
+    """
+    Higher overall first, but review-only results rank after every
+    resume-based one: their overall is not on the same scale
+    """
+    return ("resume" not in evaluation.sources, -evaluation.scores.overall)
+
+
+def _combine_evaluation(language: str, resume: Optional[dict], review: Optional[dict]) -> CandidateEvaluation:
+    """Combine resume and review results (70% resume, 30% review)"""
+    if resume is None:
+        # Review only: the resume dimensions were not evaluated
+        return CandidateEvaluation(
+            scores=CandidateScore(overall=review["scores"]["overall"]),
+            strengths=review["strengths"][:3],
+            gaps=review["gaps"][:2],
+            explanation=review["explanation"],
+            sources=["review"]
+        )
+    resume_scores = resume["scores"]
+    sources = ["resume"]
+    review_scores = review["scores"] if review else None
+    if review_scores and review_scores.get("overall"):
+        resume_overall = resume_scores.overall
+        review_overall = review_scores.get("overall", resume_overall)
+        combined_overall = int((resume_overall * 0.7) + (review_overall * 0.3))
+
+        # Update overall score
+        resume_scores.overall = combined_overall
+
+        # Combine explanations
+        if review["explanation"]:
+            if language == "en":
+                combined_explanation = f"{resume['explanation']} Additionally, review analysis shows: {review['explanation']}"
             else:
-                target_info = f"""
-ターゲット従業員:
-- 名前: {target_employee.get('employee_name')}
-- 役職: {target_employee.get('job_title')}
-- 部署: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- レジュメ: {target_resume[:500]}...
-
-検索条件:
-- 重要スキル: {', '.join(soft_criteria.get('key_skills', []))}
-- ドメイン専門性: {', '.join(soft_criteria.get('domain_expertise', []))}
-- 経験レベル: {soft_criteria.get('experience_level', '')}
-"""
+                combined_explanation = f"{resume['explanation']} さらに、レビュー分析では: {review['explanation']}"
+        else:
+            combined_explanation = resume["explanation"]
 
-                candidate_info = f"""
-候補者:
-- 名前: {candidate_emp.get('employee_name')}
-- 役職: {candidate_emp.get('job_title')}
-- 部署: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- レジュメ: {candidate_resume[:500]}...
-"""
+        # Combine strengths and gaps
+        all_strengths = resume["strengths"] + review["strengths"]
+        all_gaps = resume["gaps"] + review["gaps"]
+        sources.append("review")
+    else:
+        combined_explanation = resume["explanation"]
+        all_strengths = resume["strengths"]
+        all_gaps = resume["gaps"]
+
+    return CandidateEvaluation(
+        scores=CandidateScore(**resume_scores.model_dump()),
+        strengths=all_strengths[:3],
+        gaps=all_gaps[:2],
+        explanation=combined_explanation,
+        sources=sources
+    )
 
-                user_prompt = f"""{target_info}
 
-{candidate_info}
+async def _evaluate_resume(target: dict, candidate: dict, counters: dict) -> Optional[dict]:
+    """Resume similarity for one candidate; None if there is no usable result"""
+    try:
+        messages = target["prompts"].resume_messages(candidate["info"])
+        return _parse_resume_evaluation(
+            await _evaluation_call(messages, "evaluation", ResumeEvaluationOutput, counters)
+        )
+    except Exception as e:
+        logger.error(f"Failed to evaluate resume of {candidate['id']}: {e}")
+    return None
 
-この候補者がターゲット従業員とどの程度類似しているか、5つの次元で評価してください。"""
 
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            
+async def _evaluate_reviews(language: str, target: dict, candidate: dict, counters: dict) -> Optional[dict]:
+    """Review similarity for one candidate; None if there is no review data or no usable result"""
+    if not (target["has_reviews"] or candidate["has_reviews"]):
+        return None
+    try:
+        review_messages = target["prompts"].review_messages(candidate["review_text"])
+        return _parse_review_evaluation(
+            await _evaluation_call(review_messages, "evaluation_review", ReviewEvaluationOutput, counters)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to analyze review data for {candidate['id']}: {e}")
+        # Continue without review scores if analysis fails
+    return None
+
+
+def _evaluation_result(language: str, candidate: dict, resume: Optional[dict], review: Optional[dict]) -> Optional[dict]:
+    """Result from whichever analyses succeeded; None if neither did"""
+    if resume is None and review is None:
+        return None
+    if resume is None:
+        logger.warning(f"Scoring {candidate['id']} from review data only")
+    return {
+        "evaluation": _combine_evaluation(language, resume, review),
+        "review_analyzed": bool(review and review["scores"].get("overall"))
+    }
+
+
+async def _complete_candidate_evaluation(
+    language: str,
+    target: dict,
+    candidate: dict,
+    resume: Optional[dict],
+    counters: dict,
+    review: Optional[dict] = None
+) -> Optional[dict]:
+    """Add the review analysis (when review data exists) to a resume result"""
+    if review is None:
+        review = await _evaluate_reviews(language, target, candidate, counters)
+    return _evaluation_result(language, candidate, resume, review)
+
+
+async def _evaluate_candidate(
+    language: str,
+    target: dict,
+    candidate: dict,
+    counters: dict,
+    review: Optional[dict] = None
+) -> Optional[dict]:
+    """
+    Resume and review evaluation for one candidate: both LLM calls run at
+    the same time (only the resume call when the review is already known).
+    None if neither gave a result.
+    """
+    if review is None:
+        resume, review = await asyncio.gather(
+            _evaluate_resume(target, candidate, counters),
+            _evaluate_reviews(language, target, candidate, counters)
+        )
+    else:
+        resume = await _evaluate_resume(target, candidate, counters)
+    return _evaluation_result(language, candidate, resume, review)
+
+
+async def _evaluate_candidate_batch(
+    language: str,
+    target: dict,
+    candidates: List[dict],
+    counters: dict
+) -> Dict[str, Optional[dict]]:
+    """
+    Evaluate several candidates with one resume call and one review call.
+
+    Candidates missing from (or invalid in) the batched responses are
+    evaluated individually, so a bad batch costs extra calls, not candidates.
+    """
+    ids = [candidate["id"] for candidate in candidates]
+    review_candidates = [c for c in candidates if target["has_reviews"] or c["has_reviews"]]
+
+    async def evaluate_resumes() -> Dict[str, dict]:
+        try:
+            messages = target["prompts"].batch_resume_messages([c["batch_info"] for c in candidates])
+            content = await _evaluation_call(messages, "evaluation_batch", BatchResumeEvaluationOutput, counters)
+            # Not validated as a whole: valid entries of a partly bad (or truncated) batch are kept
+            return _validate_batch_evaluations(parse_json_response(content), ids, RESUME_SCORE_FIELDS)
+        except Exception as e:
+            logger.error(f"Batched resume evaluation failed for {len(ids)} candidates: {e}")
+        return {}
+
+    async def evaluate_reviews() -> Dict[str, dict]:
+        if not review_candidates:
+            return {}
+        try:
+            review_messages = target["prompts"].batch_review_messages(
+                [(c["id"], c["review_text"]) for c in review_candidates]
+            )
+            review_content = await _evaluation_call(
+                review_messages, "evaluation_review_batch", BatchReviewEvaluationOutput, counters
+            )
+            return _validate_batch_evaluations(
+                parse_json_response(review_content),
+                [c["id"] for c in review_candidates], REVIEW_SCORE_FIELDS
+            )
+        except Exception as e:
+            logger.warning(f"Batched review evaluation failed for {len(review_candidates)} candidates: {e}")
+        return {}
+
+    # The two batches are independent, so they run at the same time
+    resume_items, review_items = await asyncio.gather(evaluate_resumes(), evaluate_reviews())
+
+    async def finish(candidate: dict) -> Optional[dict]:
+        review = None
+        review_item = review_items.get(candidate["id"])
+        if review_item is not None:
+            review = {
+                "scores": review_item["scores"],
+                "strengths": review_item["strengths"][:2],
+                "gaps": review_item["gaps"][:2],
+                "explanation": review_item["explanation"]
+            }
+        resume_item = resume_items.get(candidate["id"])
+        if resume_item is None:
+            counters["individual_retries"] += 1
+            return await _evaluate_candidate(language, target, candidate, counters, review=review)
+        resume = {
+            "scores": EvaluationScore(**resume_item["scores"]),
+            "strengths": resume_item["strengths"][:3],
+            "gaps": resume_item["gaps"][:2],
+            "explanation": resume_item["explanation"]
+        }
+        if review is None and candidate in review_candidates:
+            counters["individual_retries"] += 1
+        return await _complete_candidate_evaluation(
+            language, target, candidate, resume, counters, review=review
+        )
+
+    # Candidates missing from a batch are retried individually, all at once
+    finished = await asyncio.gather(*(finish(candidate) for candidate in candidates))
+    return dict(zip(ids, finished))
+
+
+def _evaluation_batch_size(requested: Optional[int]) -> int:
+    batch_size = requested if requested is not None else EVALUATION_BATCH_SIZE
+    return max(1, min(batch_size, EVALUATION_MAX_BATCH_SIZE))
+
+
+def _evaluation_concurrency(requested: Optional[int]) -> int:
+    concurrency = requested if requested is not None else EVALUATION_CONCURRENCY
+    return max(1, min(concurrency, EVALUATION_MAX_CONCURRENCY))
+
+
+async def _evaluate_unit(language: str, target: dict, unit: List[dict], batch_size: int, counters: dict) -> Dict[str, Optional[dict]]:
+    """Results by candidate ID for one batch (or single candidate)"""
+    if batch_size > 1:
+        return await _evaluate_candidate_batch(language, target, unit, counters)
+    return {unit[0]["id"]: await _evaluate_candidate(language, target, unit[0], counters)}
+
+
+async def _merge_as_completed(producers: List[Callable[[], AsyncIterator]], concurrency: int) -> AsyncIterator:
+    """
+    Run async generators with at most `concurrency` of them active and
+    yield their items as they arrive. Remaining work is cancelled when the
+    consumer stops early (e.g. the client disconnected).
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = object()
+
+    async def run(producer):
+        try:
+            async with semaphore:
+                async for item in producer():
+                    await queue.put(item)
+        except Exception as e:
+            logger.error(f"Evaluation worker failed: {e}")
+        finally:
+            queue.put_nowait(finished)
+
+    tasks = [asyncio.create_task(run(producer)) for producer in producers]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _evaluation_dict(evaluation: CandidateEvaluation) -> dict:
+    return {
+        "scores": evaluation.scores.model_dump(),
+        "strengths": evaluation.strengths,
+        "gaps": evaluation.gaps,
+        "explanation": evaluation.explanation,
+        "sources": evaluation.sources
+    }
+
+
+def _evaluation_progress_events(language: str, idx: int, total: int, result: Optional[dict]) -> List[dict]:
+    """Progress events for one finished candidate (same shape as before batching)"""
+    if result is None:
+        return [{"type": "progress", "current": idx, "total": total}]
+    events = [{
+        "type": "progress",
+        "current": idx,
+        "total": total,
+        "stage": "resume",
+        "message": f"Analyzing resume ({idx}/{total})" if language == "en" else f"レジュメ分析中 ({idx}/{total})"
+    }]
+    if result["review_analyzed"]:
+        events.append({
+            "type": "progress",
+            "current": idx,
+            "total": total,
+            "stage": "review",
+            "message": f"Analyzing review data ({idx}/{total})" if language == "en" else f"レビューデータ分析中 ({idx}/{total})"
+        })
+    return events
+
+
+def _partial_evaluation(data) -> Optional[dict]:
+    """Complete scores and the explanation so far, from a partially parsed evaluation response"""
+    if not isinstance(data, dict):
+        return None
+    scores = data.get("scores")
+    scores = {k: v for k, v in scores.items() if isinstance(v, (int, float))} if isinstance(scores, dict) else {}
+    explanation = data.get("explanation") if isinstance(data.get("explanation"), str) else ""
+    if not scores and not explanation:
+        return None
+    return {"scores": scores, "explanation": explanation}
+
+
+@app.post("/api/search/evaluate/stream")
+async def evaluate_candidates_stream(request: EvaluateRequest):
+    """
+    Stream evaluation progress as candidates are processed in real-time
+    """
+    employees = load_employees()
+    personas = load_personas()
+    
+    target_employee = request.target_employee
+    candidate_ids = request.candidate_ids[:30]  # Limit to 30 for performance
+    soft_criteria = request.soft_criteria
+    language = request.language or "ja"
+    
+    target = _prepare_evaluation_target(language, target_employee, soft_criteria, personas)
+    
+    evaluations = []
+    total = len(candidate_ids)
+    batch_size = _evaluation_batch_size(request.batch_size)
+    # Partial results need one candidate per response
+    stream_tokens = bool(request.stream_tokens) and batch_size == 1
+    counters = _new_evaluation_counters()
+    
+    employees_by_id = {e.get("employee_id"): e for e in employees}
+    indexed_candidates = [
+        (idx, _prepare_evaluation_candidate(language, employees_by_id[candidate_id], personas))
+        for idx, candidate_id in enumerate(candidate_ids, 1)
+        if candidate_id in employees_by_id
+    ]
+    
+    # Cached pairs are sent right away; only the rest are evaluated
+    cached = await _cached_evaluations(target, [candidate for _, candidate in indexed_candidates])
+    cached_unit = [(idx, c) for idx, c in indexed_candidates if c["id"] in cached]
+    fresh_candidates = [(idx, c) for idx, c in indexed_candidates if c["id"] not in cached]
+    units = [
+        fresh_candidates[start:start + batch_size]
+        for start in range(0, len(fresh_candidates), batch_size)
+    ]
+    concurrency = _evaluation_concurrency(request.concurrency)
+    
+    async def generate():
+        started = time.perf_counter()
+        first_token_ms = None
+        
+        async def stream_candidate(idx: int, candidate: dict):
+            """Resume evaluation streamed token by token: partial events, then the result"""
+            nonlocal first_token_ms
+            # The review call runs while the resume streams
+            review_task = asyncio.create_task(_evaluate_reviews(language, target, candidate, counters))
             try:
-                response = await call_azure_openai(messages, temperature=0.2, use_json_format=True)
-                
-                if "choices" in response and len(response["choices"]) > 0:
-                    content = response["choices"][0]["message"]["content"]
-                    
-                    # Clean JSON
-                    content = re.sub(r'```json\s*', '', content)
-                    content = re.sub(r'```\s*', '', content)
-                    content = content.strip()
-                    
-                    try:
-                        eval_data = json.loads(content)
-                        
-                        scores = EvaluationScore(**eval_data.get("scores", {}))
-                        evaluation = CandidateEvaluation(
-                            scores=scores,
-                            strengths=eval_data.get("strengths", [])[:3],
-                            gaps=eval_data.get("gaps", [])[:2],
-                            explanation=eval_data.get("explanation", "")
-                        )
-                        
-                        evaluations.append({
-                            "candidate": candidate_emp,
-                            "evaluation": evaluation
-                        })
-                    except (json.JSONDecodeError, Exception) as e:
-                        logger.error(f"Failed to parse evaluation for {candidate_id}: {e}")
-                        continue
-            except Exception as e:
-                logger.error(f"Failed to evaluate {candidate_id}: {e}")
+                resume = None
+                try:
+                    # Forward scores and explanation text as the JSON arrives
+                    messages = target["prompts"].resume_messages(candidate["info"])
+                    _count_llm_request(counters, messages)
+                    parser = IncrementalJSONParser()
+                    last_partial = None
+                    async with asyncio.timeout(EVALUATION_CALL_TIMEOUT_SECONDS):
+                        async for delta in call_llm_stream(
+                            messages, temperature=0.2, use_json_format=True, cache=CACHE_USE, endpoint="evaluation",
+                            response_schema=response_schema(ResumeEvaluationOutput)
+                        ):
+                            if first_token_ms is None:
+                                first_token_ms = round((time.perf_counter() - started) * 1000, 2)
+                            partial = _partial_evaluation(parser.feed(delta))
+                            if partial and partial != last_partial:
+                                last_partial = partial
+                                yield "partial", {
+                                    "type": "partial",
+                                    "candidate_id": candidate["id"],
+                                    "current": idx,
+                                    "total": total,
+                                    "stage": "resume",
+                                    **partial
+                                }
+                    resume = _parse_resume_evaluation(parser.text)
+                except Exception as e:
+                    logger.error(f"Failed to evaluate resume of {candidate['id']}: {e}")
+                result = _evaluation_result(language, candidate, resume, await review_task)
+            finally:
+                # Client went away mid-stream
+                review_task.cancel()
+            yield "results", {candidate["id"]: result}
+        
+        def producer(unit):
+            async def run():
+                if stream_tokens:
+                    idx, candidate = unit[0]
+                    async for kind, data in stream_candidate(idx, candidate):
+                        yield kind, unit, data
+                    return
+                try:
+                    results = await _evaluate_unit(language, target, [c for _, c in unit], batch_size, counters)
+                except Exception as e:
+                    logger.error(f"Failed to evaluate {len(unit)} candidate(s): {e}")
+                    results = {}
+                yield "results", unit, results
+            return run
+        
+        async def results():
+            if cached_unit:
+                yield "cached", cached_unit, cached
+            async for item in _merge_as_completed([producer(unit) for unit in units], concurrency):
+                yield item
+        
+        # Results are sent as each candidate (or batch) finishes, not in request order
+        completed = 0
+        async for kind, unit, data in results():
+            if kind == "partial":
+                yield f"data: {json.dumps(data)}\n\n"
                 continue
-            
-            # Small delay to avoid rate limiting
-            await asyncio.sleep(0.3)
+            for idx, candidate in unit:
+                result = data.get(candidate["id"])
+                if kind == "results":
+                    await _store_evaluation(language, target, candidate, result)
+                completed += 1
+                if result is not None:
+                    evaluations.append({
+                        "index": idx,
+                        "candidate": candidate["employee"],
+                        "evaluation": result["evaluation"]
+                    })
+                candidate_data = {
+                    "type": "candidate",
+                    "candidate_id": candidate["id"],
+                    "current": completed,
+                    "total": total,
+                    "evaluated": result is not None,
+                    "cached": kind == "cached",
+                    "candidate": candidate["employee"] if result is not None else None,
+                    "evaluation": _evaluation_dict(result["evaluation"]) if result is not None else None
+                }
+                yield f"data: {json.dumps(candidate_data)}\n\n"
+                # Progress is still sent when a candidate could not be evaluated
+                for progress_data in _evaluation_progress_events(language, completed, total, result):
+                    yield f"data: {json.dumps(progress_data)}\n\n"
         
-        # Sort by overall score
-        evaluations.sort(key=lambda x: x["evaluation"].scores.overall, reverse=True)
+        # Sort by overall score (ties in request order, however the results arrived)
+        evaluations.sort(key=lambda x: (*_ranking_key(x["evaluation"]), x["index"]))
         
         # Get top 3
         top_3 = evaluations[:3]
@@ -1385,12 +2010,7 @@ Evaluate how similar this candidate is to the target employee across 5 dimension
             top_3_results.append({
                 "rank": rank,
                 "candidate": item["candidate"],
-                "evaluation": {
-                    "scores": item["evaluation"].scores.dict(),
-                    "strengths": item["evaluation"].strengths,
-                    "gaps": item["evaluation"].gaps,
-                    "explanation": item["evaluation"].explanation
-                }
+                "evaluation": _evaluation_dict(item["evaluation"])
             })
         
         if language == "en":
@@ -1402,465 +2022,53 @@ Evaluate how similar this candidate is to the target employee across 5 dimension
         final_data = {
             "type": "complete",
             "thinking_text": thinking_text,
-            "top_3_candidates": top_3_results
+            "top_3_candidates": top_3_results,
+            "total": total,
+            "stats": {
+                "evaluated_count": len(evaluations),
+                "cached_count": len(cached),
+                "fresh_count": len(evaluations) - len(cached),
+                "stream_tokens": stream_tokens,
+                "batch_size": batch_size,
+                "concurrency": concurrency,
+                **counters,
+                "first_token_ms": first_token_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
         }
         yield f"data: {json.dumps(final_data)}\n\n"
     
     return StreamingResponse(generate(), media_type="text/event-stream")
 
 
-@app.post("/api/search/evaluate/stream")
-async def evaluate_candidates_stream(request: EvaluateRequest):
+@app.post("/api/search/evaluate", response_model=EvaluateResponse)
+async def evaluate_candidates(request: EvaluateRequest):
     """
-    Stream evaluation progress as candidates are processed in real-time
+    Layer 3: Deep Resume Matching (Legacy endpoint - kept for compatibility)
+    Evaluate each candidate's resume against target profile
     """
     employees = load_employees()
     personas = load_personas()
     
     target_employee = request.target_employee
-    candidate_ids = request.candidate_ids[:30]  # Limit to 30 for performance
+    candidate_ids = request.candidate_ids
     soft_criteria = request.soft_criteria
     language = request.language or "ja"
     
-    # Get target employee's persona and resume
-    target_id = target_employee.get("employee_id")
-    target_persona = personas.get(target_id, {})
-    target_resume = load_resume(target_id) or ""
+    target = _prepare_evaluation_target(language, target_employee, soft_criteria, personas)
     
+    progress_messages = []
     evaluations = []
-    total = len(candidate_ids)
-    
-    async def generate():
-        for idx, candidate_id in enumerate(candidate_ids, 1):
-            # Find candidate employee
-            candidate_emp = next((e for e in employees if e.get("employee_id") == candidate_id), None)
-            if not candidate_emp:
-                continue
-            
-            candidate_persona = personas.get(candidate_id, {})
-            candidate_resume = load_resume(candidate_id) or ""
-            
-            # Build evaluation prompt (same as before)
-            if language == "en":
-                system_prompt = """You are an excellent HR evaluator. Analyze candidate resumes and evaluate similarity to the target employee across 5 dimensions.
-
-Output must be in JSON format following this structure:
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "Expert in Python and TensorFlow",
-    "Has practical experience with Azure ML"
-  ],
-  "gaps": [
-    "Lacks NLP experience",
-    "Limited leadership experience"
-  ],
-  "explanation": "This candidate scores highly in technical skills and domain knowledge, but has room for improvement in years of experience and soft skills."
-}
-
-Important:
-- Each score is an integer from 0-100
-- overall is the average of the 5 dimensions (rounded)
-- strengths: maximum 3, gaps: maximum 2
-- explanation: 1-2 sentences in natural English
-- Output JSON only, do not use markdown code blocks"""
-            else:
-                system_prompt = """あなたは優秀な人事評価者です。候補者のレジュメを分析し、ターゲット従業員との類似度を5つの次元で評価してください。
-
-出力は必ずJSON形式で、以下の構造に従ってください：
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "PythonとTensorFlowに精通している",
-    "Azure MLの実務経験がある"
-  ],
-  "gaps": [
-    "NLPの経験が不足している",
-    "リーダーシップ経験が少ない"
-  ],
-  "explanation": "この候補者は技術スキルとドメイン知識で高い評価を得ていますが、経験年数とソフトスキルで改善の余地があります。"
-}
-
-重要：
-- 各スコアは0-100の整数
-- overallは5つの次元の平均（四捨五入）
-- strengthsは最大3つ、gapsは最大2つ
-- explanationは自然な日本語で1-2文
-- JSONのみを出力し、マークダウンコードブロックは使用しない"""
-
-            if language == "en":
-                target_info = f"""
-Target Employee:
-- Name: {target_employee.get('employee_name')}
-- Position: {target_employee.get('job_title')}
-- Department: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- Resume: {target_resume[:500]}...
-
-Search Criteria:
-- Key Skills: {', '.join(soft_criteria.get('key_skills', []))}
-- Domain Expertise: {', '.join(soft_criteria.get('domain_expertise', []))}
-- Experience Level: {soft_criteria.get('experience_level', '')}
-"""
-
-                candidate_info = f"""
-Candidate:
-- Name: {candidate_emp.get('employee_name')}
-- Position: {candidate_emp.get('job_title')}
-- Department: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- Resume: {candidate_resume[:500]}...
-"""
-
-                user_prompt = f"""{target_info}
-
-{candidate_info}
-
-Evaluate how similar this candidate is to the target employee across 5 dimensions."""
-            else:
-                target_info = f"""
-ターゲット従業員:
-- 名前: {target_employee.get('employee_name')}
-- 役職: {target_employee.get('job_title')}
-- 部署: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- レジュメ: {target_resume[:500]}...
-
-検索条件:
-- 重要スキル: {', '.join(soft_criteria.get('key_skills', []))}
-- ドメイン専門性: {', '.join(soft_criteria.get('domain_expertise', []))}
-- 経験レベル: {soft_criteria.get('experience_level', '')}
-"""
-
-                candidate_info = f"""
-候補者:
-- 名前: {candidate_emp.get('employee_name')}
-- 役職: {candidate_emp.get('job_title')}
-- 部署: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- レジュメ: {candidate_resume[:500]}...
-"""
-
-                user_prompt = f"""{target_info}
-
-{candidate_info}
-
-この候補者がターゲット従業員とどの程度類似しているか、5つの次元で評価してください。"""
-
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            
-            try:
-                response = await call_azure_openai(messages, temperature=0.2, use_json_format=True)
-                
-                if "choices" in response and len(response["choices"]) > 0:
-                    content = response["choices"][0]["message"]["content"]
-                    
-                    # Clean JSON
-                    content = re.sub(r'```json\s*', '', content)
-                    content = re.sub(r'```\s*', '', content)
-                    content = content.strip()
-                    
-                    try:
-                        eval_data = json.loads(content)
-                        resume_scores = EvaluationScore(**eval_data.get("scores", {}))
-                        resume_strengths = eval_data.get("strengths", [])[:3]
-                        resume_gaps = eval_data.get("gaps", [])[:2]
-                        resume_explanation = eval_data.get("explanation", "")
-                        
-                        # Step 2: Analyze review data
-                        target_reviews = review_service.get_all_reviews_for_employee(target_id)
-                        candidate_reviews = review_service.get_all_reviews_for_employee(candidate_id)
-                        
-                        review_scores = None
-                        review_strengths = []
-                        review_gaps = []
-                        review_explanation = ""
-                        
-                        if target_reviews.get("monthly") or target_reviews.get("half_year") or \
-                           candidate_reviews.get("monthly") or candidate_reviews.get("half_year"):
-                            
-                            # Build review analysis prompt
-                            if language == "en":
-                                review_system_prompt = """You are an excellent HR evaluator. Analyze employee review data (monthly and half-year reviews) and evaluate similarity to the target employee's performance and growth trajectory.
-
-Output must be in JSON format following this structure:
-{
-  "scores": {
-    "performance_alignment": 85,
-    "growth_trajectory": 80,
-    "goal_achievement": 75,
-    "career_alignment": 90,
-    "overall": 82
-  },
-  "strengths": [
-    "Similar performance patterns",
-    "Aligned career goals"
-  ],
-  "gaps": [
-    "Different growth trajectory",
-    "Different performance focus"
-  ],
-  "explanation": "This candidate shows similar performance patterns and career alignment, but has a different growth trajectory."
-}
-
-Important:
-- Each score is an integer from 0-100
-- overall is the average of the 4 dimensions (rounded)
-- strengths: maximum 2, gaps: maximum 2
-- explanation: 1-2 sentences in natural English
-- Output JSON only, do not use markdown code blocks"""
-                            else:
-                                review_system_prompt = """あなたは優秀な人事評価者です。従業員のレビューデータ（月次レビューと半期レビュー）を分析し、ターゲット従業員のパフォーマンスと成長軌道との類似度を評価してください。
-
-出力は必ずJSON形式で、以下の構造に従ってください：
-{
-  "scores": {
-    "performance_alignment": 85,
-    "growth_trajectory": 80,
-    "goal_achievement": 75,
-    "career_alignment": 90,
-    "overall": 82
-  },
-  "strengths": [
-    "類似したパフォーマンスパターン",
-    "一致したキャリア目標"
-  ],
-  "gaps": [
-    "異なる成長軌道",
-    "異なるパフォーマンス焦点"
-  ],
-  "explanation": "この候補者は類似したパフォーマンスパターンとキャリアの一致を示していますが、成長軌道が異なります。"
-}
-
-重要：
-- 各スコアは0-100の整数
-- overallは4つの次元の平均（四捨五入）
-- strengthsは最大2つ、gapsは最大2つ
-- explanationは自然な日本語で1-2文
-- JSONのみを出力し、マークダウンコードブロックは使用しない"""
-                            
-                            # Format review data for prompt
-                            target_review_text = ""
-                            if target_reviews.get("monthly"):
-                                m = target_reviews["monthly"]
-                                target_review_text += f"Monthly Review: Goal: {m.get('monthly_goal', '')}, Review: {m.get('monthly_review', '')[:200]}\n"
-                            if target_reviews.get("half_year"):
-                                h = target_reviews["half_year"]
-                                target_review_text += f"Half-Year Review: Score: {h.get('self_assessment_score', '')}, Growth: {h.get('half_year_self_review_achievement_growth', '')[:200]}, Career: {h.get('career_intentions', '')}\n"
-                            
-                            candidate_review_text = ""
-                            if candidate_reviews.get("monthly"):
-                                m = candidate_reviews["monthly"]
-                                candidate_review_text += f"Monthly Review: Goal: {m.get('monthly_goal', '')}, Review: {m.get('monthly_review', '')[:200]}\n"
-                            if candidate_reviews.get("half_year"):
-                                h = candidate_reviews["half_year"]
-                                candidate_review_text += f"Half-Year Review: Score: {h.get('self_assessment_score', '')}, Growth: {h.get('half_year_self_review_achievement_growth', '')[:200]}, Career: {h.get('career_intentions', '')}\n"
-                            
-                            if language == "en":
-                                review_user_prompt = f"""Target Employee Reviews:
-{target_review_text if target_review_text else "No review data available"}
-
-Candidate Reviews:
-{candidate_review_text if candidate_review_text else "No review data available"}
-
-Evaluate how similar this candidate's performance and growth trajectory is to the target employee."""
-                            else:
-                                review_user_prompt = f"""ターゲット従業員のレビュー:
-{target_review_text if target_review_text else "レビューデータなし"}
-
-候補者のレビュー:
-{candidate_review_text if candidate_review_text else "レビューデータなし"}
-
-この候補者のパフォーマンスと成長軌道がターゲット従業員とどの程度類似しているか評価してください。"""
-                            
-                            try:
-                                review_messages = [
-                                    {"role": "system", "content": review_system_prompt},
-                                    {"role": "user", "content": review_user_prompt}
-                                ]
-                                
-                                review_response = await call_azure_openai(review_messages, temperature=0.2, use_json_format=True)
-                                
-                                if "choices" in review_response and len(review_response["choices"]) > 0:
-                                    review_content = review_response["choices"][0]["message"]["content"]
-                                    review_content = re.sub(r'```json\s*', '', review_content)
-                                    review_content = re.sub(r'```\s*', '', review_content)
-                                    review_content = review_content.strip()
-                                    
-                                    review_eval_data = json.loads(review_content)
-                                    review_scores = review_eval_data.get("scores", {})
-                                    review_strengths = review_eval_data.get("strengths", [])[:2]
-                                    review_gaps = review_eval_data.get("gaps", [])[:2]
-                                    review_explanation = review_eval_data.get("explanation", "")
-                            except Exception as e:
-                                logger.warning(f"Failed to analyze review data for {candidate_id}: {e}")
-                                # Continue without review scores if analysis fails
-                        
-                        # Combine resume and review scores (70% resume, 30% review)
-                        if review_scores and review_scores.get("overall"):
-                            resume_overall = resume_scores.overall
-                            review_overall = review_scores.get("overall", resume_overall)
-                            combined_overall = int((resume_overall * 0.7) + (review_overall * 0.3))
-                            
-                            # Update overall score
-                            resume_scores.overall = combined_overall
-                            
-                            # Combine explanations
-                            if review_explanation:
-                                if language == "en":
-                                    combined_explanation = f"{resume_explanation} Additionally, review analysis shows: {review_explanation}"
-                                else:
-                                    combined_explanation = f"{resume_explanation} さらに、レビュー分析では: {review_explanation}"
-                            else:
-                                combined_explanation = resume_explanation
-                            
-                            # Combine strengths and gaps
-                            all_strengths = resume_strengths + review_strengths
-                            all_gaps = resume_gaps + review_gaps
-                        else:
-                            combined_explanation = resume_explanation
-                            all_strengths = resume_strengths
-                            all_gaps = resume_gaps
-                        
-                        evaluation = CandidateEvaluation(
-                            scores=resume_scores,
-                            strengths=all_strengths[:3],
-                            gaps=all_gaps[:2],
-                            explanation=combined_explanation
-                        )
-                        
-                        evaluations.append({
-                            "candidate": candidate_emp,
-                            "evaluation": evaluation
-                        })
-                        
-                        # Send progress update after resume analysis completes
-                        resume_progress_data = {
-                            "type": "progress",
-                            "current": idx,
-                            "total": total,
-                            "stage": "resume",
-                            "message": f"Analyzing resume ({idx}/{total})" if language == "en" else f"レジュメ分析中 ({idx}/{total})"
-                        }
-                        yield f"data: {json.dumps(resume_progress_data)}\n\n"
-                        
-                        # Send progress update after review analysis completes (if review data exists)
-                        if review_scores and review_scores.get("overall"):
-                            review_progress_data = {
-                                "type": "progress",
-                                "current": idx,
-                                "total": total,
-                                "stage": "review",
-                                "message": f"Analyzing review data ({idx}/{total})" if language == "en" else f"レビューデータ分析中 ({idx}/{total})"
-                            }
-                            yield f"data: {json.dumps(review_progress_data)}\n\n"
-                    except (json.JSONDecodeError, Exception) as e:
-                        logger.error(f"Failed to parse evaluation for {candidate_id}: {e}")
-                        # Still send progress update even if parsing fails
-                        progress_data = {
-                            "type": "progress",
-                            "current": idx,
-                            "total": total
-                        }
-                        yield f"data: {json.dumps(progress_data)}\n\n"
-                        continue
-            except Exception as e:
-                logger.error(f"Failed to evaluate {candidate_id}: {e}")
-                # Still send progress update even if API call fails
-                progress_data = {
-                    "type": "progress",
-                    "current": idx,
-                    "total": total
-                }
-                yield f"data: {json.dumps(progress_data)}\n\n"
-                continue
-            
-            # Small delay to avoid rate limiting
-            await asyncio.sleep(0.3)
-        
-        # Sort by overall score
-        evaluations.sort(key=lambda x: x["evaluation"].scores.overall, reverse=True)
-        
-        # Get top 3
-        top_3 = evaluations[:3]
-        
-        top_3_results = []
-        for rank, item in enumerate(top_3, 1):
-            top_3_results.append({
-                "rank": rank,
-                "candidate": item["candidate"],
-                "evaluation": {
-                    "scores": item["evaluation"].scores.dict(),
-                    "strengths": item["evaluation"].strengths,
-                    "gaps": item["evaluation"].gaps,
-                    "explanation": item["evaluation"].explanation
-                }
-            })
-        
-        if language == "en":
-            thinking_text = f"Resume and review analysis complete. Evaluated {len(evaluations)} candidates and selected the top 3 most similar employees."
-        else:
-            thinking_text = f"レジュメとレビュー分析が完了しました。{len(evaluations)}人の候補者を評価し、最も類似した3人を選出しました。"
-        
-        # Send final results
-        final_data = {
-            "type": "complete",
-            "thinking_text": thinking_text,
-            "top_3_candidates": top_3_results
-        }
-        yield f"data: {json.dumps(final_data)}\n\n"
-    
-    return StreamingResponse(generate(), media_type="text/event-stream")
-
-
-@app.post("/api/search/evaluate", response_model=EvaluateResponse)
-async def evaluate_candidates(request: EvaluateRequest):
-    """
-    Layer 3: Deep Resume Matching (Legacy endpoint - kept for compatibility)
-    Evaluate each candidate's resume against target profile
-    """
-    employees = load_employees()
-    personas = load_personas()
-    
-    target_employee = request.target_employee
-    candidate_ids = request.candidate_ids
-    soft_criteria = request.soft_criteria
-    language = request.language or "ja"
-    
-    # Get target employee's persona and resume
-    target_id = target_employee.get("employee_id")
-    target_persona = personas.get(target_id, {})
-    target_resume = load_resume(target_id) or ""
-    
-    progress_messages = []
-    evaluations = []
+    batch_size = _evaluation_batch_size(request.batch_size)
+    counters = _new_evaluation_counters()
     
+    candidates = []
     for idx, candidate_id in enumerate(candidate_ids[:30], 1):  # Limit to 30 for performance
         # Find candidate employee
         candidate_emp = next((e for e in employees if e.get("employee_id") == candidate_id), None)
         if not candidate_emp:
             continue
         
-        candidate_persona = personas.get(candidate_id, {})
-        candidate_resume = load_resume(candidate_id) or ""
-        
         if language == "en":
             progress_messages.append(f"Analyzing resume {idx} of {len(candidate_ids)}: {candidate_emp.get('employee_name', candidate_id)}")
         else:
@@ -1872,329 +2080,40 @@ async def evaluate_candidates(request: EvaluateRequest):
         else:
             progress_messages.append(f"レビューデータを分析中: {candidate_emp.get('employee_name', candidate_id)}")
         
-        # Build evaluation prompt based on language
-        if language == "en":
-            system_prompt = """You are an excellent HR evaluator. Analyze candidate resumes and evaluate similarity to the target employee across 5 dimensions.
-
-Output must be in JSON format following this structure:
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "Expert in Python and TensorFlow",
-    "Has practical experience with Azure ML"
-  ],
-  "gaps": [
-    "Lacks NLP experience",
-    "Limited leadership experience"
-  ],
-  "explanation": "This candidate scores highly in technical skills and domain knowledge, but has room for improvement in years of experience and soft skills."
-}
-
-Important:
-- Each score is an integer from 0-100
-- overall is the average of the 5 dimensions (rounded)
-- strengths: maximum 3, gaps: maximum 2
-- explanation: 1-2 sentences in natural English
-- Output JSON only, do not use markdown code blocks"""
-        else:
-            system_prompt = """あなたは優秀な人事評価者です。候補者のレジュメを分析し、ターゲット従業員との類似度を5つの次元で評価してください。
-
-出力は必ずJSON形式で、以下の構造に従ってください：
-{
-  "scores": {
-    "technical_skills": 85,
-    "domain_expertise": 90,
-    "experience_level": 75,
-    "role_alignment": 80,
-    "soft_skills": 70,
-    "overall": 82
-  },
-  "strengths": [
-    "PythonとTensorFlowに精通している",
-    "Azure MLの実務経験がある"
-  ],
-  "gaps": [
-    "NLPの経験が不足している",
-    "リーダーシップ経験が少ない"
-  ],
-  "explanation": "この候補者は技術スキルとドメイン知識で高い評価を得ていますが、経験年数とソフトスキルで改善の余地があります。"
-}
-
-重要：
-- 各スコアは0-100の整数
-- overallは5つの次元の平均（四捨五入）
-- strengthsは最大3つ、gapsは最大2つ
-- explanationは自然な日本語で1-2文
-- JSONのみを出力し、マークダウンコードブロックは使用しない"""
-
-        if language == "en":
-            target_info = f"""
-Target Employee:
-- Name: {target_employee.get('employee_name')}
-- Position: {target_employee.get('job_title')}
-- Department: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- Resume: {target_resume[:500]}...
-
-Search Criteria:
-- Key Skills: {', '.join(soft_criteria.get('key_skills', []))}
-- Domain Expertise: {', '.join(soft_criteria.get('domain_expertise', []))}
-- Experience Level: {soft_criteria.get('experience_level', '')}
-"""
-
-            candidate_info = f"""
-Candidate:
-- Name: {candidate_emp.get('employee_name')}
-- Position: {candidate_emp.get('job_title')}
-- Department: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- Skills: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- Resume: {candidate_resume[:500]}...
-"""
-
-            user_prompt = f"""{target_info}
-
-{candidate_info}
-
-Evaluate how similar this candidate is to the target employee across 5 dimensions."""
-        else:
-            target_info = f"""
-ターゲット従業員:
-- 名前: {target_employee.get('employee_name')}
-- 役職: {target_employee.get('job_title')}
-- 部署: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
-- レジュメ: {target_resume[:500]}...
-
-検索条件:
-- 重要スキル: {', '.join(soft_criteria.get('key_skills', []))}
-- ドメイン専門性: {', '.join(soft_criteria.get('domain_expertise', []))}
-- 経験レベル: {soft_criteria.get('experience_level', '')}
-"""
-
-            candidate_info = f"""
-候補者:
-- 名前: {candidate_emp.get('employee_name')}
-- 役職: {candidate_emp.get('job_title')}
-- 部署: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
-- スキル: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
-- レジュメ: {candidate_resume[:500]}...
-"""
-
-            user_prompt = f"""{target_info}
-
-{candidate_info}
-
-この候補者がターゲット従業員とどの程度類似しているか、5つの次元で評価してください。"""
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
-        
-        try:
-            response = await call_azure_openai(messages, temperature=0.2, use_json_format=True)
-            
-            if "choices" in response and len(response["choices"]) > 0:
-                content = response["choices"][0]["message"]["content"]
-                
-                # Clean JSON
-                content = re.sub(r'```json\s*', '', content)
-                content = re.sub(r'```\s*', '', content)
-                content = content.strip()
-                
-                try:
-                    eval_data = json.loads(content)
-                    resume_scores = EvaluationScore(**eval_data.get("scores", {}))
-                    resume_strengths = eval_data.get("strengths", [])[:3]
-                    resume_gaps = eval_data.get("gaps", [])[:2]
-                    resume_explanation = eval_data.get("explanation", "")
-                    
-                    # Step 2: Analyze review data
-                    target_reviews = review_service.get_all_reviews_for_employee(target_id)
-                    candidate_reviews = review_service.get_all_reviews_for_employee(candidate_id)
-                    
-                    review_scores = None
-                    review_strengths = []
-                    review_gaps = []
-                    review_explanation = ""
-                    
-                    if target_reviews.get("monthly") or target_reviews.get("half_year") or \
-                       candidate_reviews.get("monthly") or candidate_reviews.get("half_year"):
-                        
-                        # Build review analysis prompt
-                        if language == "en":
-                            review_system_prompt = """You are an excellent HR evaluator. Analyze employee review data (monthly and half-year reviews) and evaluate similarity to the target employee's performance and growth trajectory.
-
-Output must be in JSON format following this structure:
-{
-  "scores": {
-    "performance_alignment": 85,
-    "growth_trajectory": 80,
-    "goal_achievement": 75,
-    "career_alignment": 90,
-    "overall": 82
-  },
-  "strengths": [
-    "Similar performance patterns",
-    "Aligned career goals"
-  ],
-  "gaps": [
-    "Different growth trajectory",
-    "Different performance focus"
-  ],
-  "explanation": "This candidate shows similar performance patterns and career alignment, but has a different growth trajectory."
-}
-
-Important:
-- Each score is an integer from 0-100
-- overall is the average of the 4 dimensions (rounded)
-- strengths: maximum 2, gaps: maximum 2
-- explanation: 1-2 sentences in natural English
-- Output JSON only, do not use markdown code blocks"""
-                        else:
-                            review_system_prompt = """あなたは優秀な人事評価者です。従業員のレビューデータ（月次レビューと半期レビュー）を分析し、ターゲット従業員のパフォーマンスと成長軌道との類似度を評価してください。
-
-出力は必ずJSON形式で、以下の構造に従ってください：
-{
-  "scores": {
-    "performance_alignment": 85,
-    "growth_trajectory": 80,
-    "goal_achievement": 75,
-    "career_alignment": 90,
-    "overall": 82
-  },
-  "strengths": [
-    "類似したパフォーマンスパターン",
-    "一致したキャリア目標"
-  ],
-  "gaps": [
-    "異なる成長軌道",
-    "異なるパフォーマンス焦点"
-  ],
-  "explanation": "この候補者は類似したパフォーマンスパターンとキャリアの一致を示していますが、成長軌道が異なります。"
-}
-
-重要：
-- 各スコアは0-100の整数
-- overallは4つの次元の平均（四捨五入）
-- strengthsは最大2つ、gapsは最大2つ
-- explanationは自然な日本語で1-2文
-- JSONのみを出力し、マークダウンコードブロックは使用しない"""
-                        
-                        # Format review data for prompt
-                        target_review_text = ""
-                        if target_reviews.get("monthly"):
-                            m = target_reviews["monthly"]
-                            target_review_text += f"Monthly Review: Goal: {m.get('monthly_goal', '')}, Review: {m.get('monthly_review', '')[:200]}\n"
-                        if target_reviews.get("half_year"):
-                            h = target_reviews["half_year"]
-                            target_review_text += f"Half-Year Review: Score: {h.get('self_assessment_score', '')}, Growth: {h.get('half_year_self_review_achievement_growth', '')[:200]}, Career: {h.get('career_intentions', '')}\n"
-                        
-                        candidate_review_text = ""
-                        if candidate_reviews.get("monthly"):
-                            m = candidate_reviews["monthly"]
-                            candidate_review_text += f"Monthly Review: Goal: {m.get('monthly_goal', '')}, Review: {m.get('monthly_review', '')[:200]}\n"
-                        if candidate_reviews.get("half_year"):
-                            h = candidate_reviews["half_year"]
-                            candidate_review_text += f"Half-Year Review: Score: {h.get('self_assessment_score', '')}, Growth: {h.get('half_year_self_review_achievement_growth', '')[:200]}, Career: {h.get('career_intentions', '')}\n"
-                        
-                        if language == "en":
-                            review_user_prompt = f"""Target Employee Reviews:
-{target_review_text if target_review_text else "No review data available"}
-
-Candidate Reviews:
-{candidate_review_text if candidate_review_text else "No review data available"}
-
-Evaluate how similar this candidate's performance and growth trajectory is to the target employee."""
-                        else:
-                            review_user_prompt = f"""ターゲット従業員のレビュー:
-{target_review_text if target_review_text else "レビューデータなし"}
-
-候補者のレビュー:
-{candidate_review_text if candidate_review_text else "レビューデータなし"}
-
-この候補者のパフォーマンスと成長軌道がターゲット従業員とどの程度類似しているか評価してください。"""
-                        
-                        try:
-                            review_messages = [
-                                {"role": "system", "content": review_system_prompt},
-                                {"role": "user", "content": review_user_prompt}
-                            ]
-                            
-                            review_response = await call_azure_openai(review_messages, temperature=0.2, use_json_format=True)
-                            
-                            if "choices" in review_response and len(review_response["choices"]) > 0:
-                                review_content = review_response["choices"][0]["message"]["content"]
-                                review_content = re.sub(r'```json\s*', '', review_content)
-                                review_content = re.sub(r'```\s*', '', review_content)
-                                review_content = review_content.strip()
-                                
-                                review_eval_data = json.loads(review_content)
-                                review_scores = review_eval_data.get("scores", {})
-                                review_strengths = review_eval_data.get("strengths", [])[:2]
-                                review_gaps = review_eval_data.get("gaps", [])[:2]
-                                review_explanation = review_eval_data.get("explanation", "")
-                        except Exception as e:
-                            logger.warning(f"Failed to analyze review data for {candidate_id}: {e}")
-                            # Continue without review scores if analysis fails
-                    
-                    # Combine resume and review scores (70% resume, 30% review)
-                    if review_scores and review_scores.get("overall"):
-                        resume_overall = resume_scores.overall
-                        review_overall = review_scores.get("overall", resume_overall)
-                        combined_overall = int((resume_overall * 0.7) + (review_overall * 0.3))
-                        
-                        # Update overall score
-                        resume_scores.overall = combined_overall
-                        
-                        # Combine explanations
-                        if review_explanation:
-                            if language == "en":
-                                combined_explanation = f"{resume_explanation} Additionally, review analysis shows: {review_explanation}"
-                            else:
-                                combined_explanation = f"{resume_explanation} さらに、レビュー分析では: {review_explanation}"
-                        else:
-                            combined_explanation = resume_explanation
-                        
-                        # Combine strengths and gaps
-                        all_strengths = resume_strengths + review_strengths
-                        all_gaps = resume_gaps + review_gaps
-                    else:
-                        combined_explanation = resume_explanation
-                        all_strengths = resume_strengths
-                        all_gaps = resume_gaps
-                    
-                    evaluation = CandidateEvaluation(
-                        scores=resume_scores,
-                        strengths=all_strengths[:3],
-                        gaps=all_gaps[:2],
-                        explanation=combined_explanation
-                    )
-                    
-                    evaluations.append({
-                        "candidate": candidate_emp,
-                        "evaluation": evaluation
-                    })
-                except (json.JSONDecodeError, Exception) as e:
-                    # Skip this candidate if parsing fails
-                    continue
-        except Exception as e:
-            # Skip this candidate if API call fails
-            continue
-        
-        # Small delay to avoid rate limiting
-        import asyncio
-        await asyncio.sleep(0.3)
+        candidates.append(_prepare_evaluation_candidate(language, candidate_emp, personas))
+    
+    results = await _cached_evaluations(target, candidates)
+    cached_count = len(results)
+    fresh_candidates = [c for c in candidates if c["id"] not in results]
+    units = [fresh_candidates[start:start + batch_size] for start in range(0, len(fresh_candidates), batch_size)]
+    concurrency = _evaluation_concurrency(request.concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def evaluate_unit(unit: List[dict]) -> Dict[str, Optional[dict]]:
+        async with semaphore:
+            return await _evaluate_unit(language, target, unit, batch_size, counters)
+    
+    for unit_results in await asyncio.gather(*(evaluate_unit(unit) for unit in units)):
+        results.update(unit_results)
+    for candidate in fresh_candidates:
+        await _store_evaluation(language, target, candidate, results.get(candidate["id"]))
+    for candidate in candidates:
+        # Skip candidates whose evaluation failed
+        result = results.get(candidate["id"])
+        if result is not None:
+            evaluations.append({
+                "candidate": candidate["employee"],
+                "evaluation": result["evaluation"]
+            })
+    
+    logger.info(
+        f"Evaluated {len(evaluations)}/{len(candidates)} candidates ({cached_count} cached) with "
+        f"{counters['llm_requests']} LLM requests "
+        f"(batch size {batch_size}, concurrency {concurrency}, ~{counters['input_tokens_estimate']} input tokens)"
+    )
     
     # Sort by overall score
-    evaluations.sort(key=lambda x: x["evaluation"].scores.overall, reverse=True)
+    evaluations.sort(key=lambda x: _ranking_key(x["evaluation"]))
     
     # Get top 3
     top_3 = evaluations[:3]
@@ -2220,24 +2139,8 @@ Evaluate how similar this candidate's performance and growth trajectory is to th
     )
 
 
-@app.post("/api/search/natural-language", response_model=NaturalLanguageSearchResponse)
-async def natural_language_search(request: NaturalLanguageSearchRequest):
-    """
-    Natural language search for employees
-    Layer 1: Parse natural language query into structured filters using LLM
-    Layer 2: Apply filters to search employees
-    """
-    employees = load_employees()
-    if not employees:
-        raise HTTPException(status_code=404, detail="No employee data available")
-    
-    query = request.query.strip()
-    language = request.language or "ja"
-    
-    if not query:
-        raise HTTPException(status_code=400, detail="Query is required")
-    
-    # Layer 1: Parse natural language query using LLM
+def _build_nl_parse_messages(query: str, language: str) -> List[dict]:
+    """Build the LLM messages that turn a natural language query into filters"""
     if language == "en":
         system_prompt = """You are an excellent HR search assistant. Parse natural language queries about employees into structured search filters.
 
@@ -2433,420 +2336,253 @@ You can filter by any field in the employee profile schema. Extract all mentione
         {"role": "user", "content": user_prompt}
     ]
     
+    return messages
+
+
+def _nl_parse_cache_key(query: str, language: str) -> str:
+    """Cache key for a parsed query: normalized text, language, prompt version and model route"""
+    normalized = " ".join(unicodedata.normalize("NFKC", query).lower().split())
+    system_prompt = _build_nl_parse_messages("", language)[0]["content"]
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+    # Routes may parse with different models; their results must not be shared
+    route = get_llm_service().model_router.route_name()
+    return make_cache_key(normalized, language, NL_PARSE_PROMPT_VERSION, prompt_hash, route)
+
+
+async def _parse_natural_language_query(query: str, language: str) -> dict:
+    """
+    Layer 1: Parse a natural language query into structured filters.
+    
+    Simple queries are understood by the rule-based fast path parser; the rest
+    are served from the persistent NL parse cache when possible. Both skip the
+    LLM call entirely.
+    
+    Returns:
+        Dictionary with filters, thinking_text, parse_path ("fast_path", "cache"
+        or "llm") and parse_ms
+    """
+    started = time.perf_counter()
+    if language == "en":
+        thinking_text_parsing = "🤔 Analyzing your search query..."
+    else:
+        thinking_text_parsing = "🤔 検索クエリを分析中..."
+    
+    if NL_FAST_PATH_ENABLED:
+        fast_parsed = get_fast_path_parser(load_employees()).parse(query, language)
+        if fast_parsed is not None:
+            return {
+                "filters": fast_parsed["filters"],
+                "thinking_text": fast_parsed["thinking_text"],
+                "parse_path": "fast_path",
+                "parse_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+    
+    cache_key = _nl_parse_cache_key(query, language) if NL_PARSE_CACHE_ENABLED else None
+    if cache_key:
+        cached = await nl_parse_cache.aget(cache_key)
+        if cached is not None:
+            return {
+                "filters": cached.get("filters", {}),
+                "thinking_text": cached.get("thinking_text", thinking_text_parsing),
+                "parse_path": "cache",
+                "parse_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+    
+    messages = _build_nl_parse_messages(query, language)
+    response = await call_azure_openai(messages, temperature=0.1, use_json_format=True, endpoint="nl_parse")
+    
+    if "choices" not in response or len(response["choices"]) == 0:
+        raise HTTPException(status_code=500, detail="No response from Azure OpenAI")
+    
+    content = response["choices"][0]["message"]["content"]
+    
+    # Parse JSON (no response schema: the filters object is free-form)
     try:
-        # Parse query
-        if language == "en":
-            thinking_text_parsing = "🤔 Analyzing your search query..."
+        parsed_data = parse_json_response(content)
+        if not isinstance(parsed_data, dict):
+            raise StructuredOutputError("Expected a JSON object")
+        filters = parsed_data.get("filters", {})
+        thinking_text = parsed_data.get("thinking_text", thinking_text_parsing)
+    except StructuredOutputError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse JSON response: {str(e)}")
+    
+    if cache_key:
+        await nl_parse_cache.aset(
+            cache_key,
+            {"filters": filters, "thinking_text": thinking_text},
+            meta={"query": query, "language": language, "prompt_version": NL_PARSE_PROMPT_VERSION}
+        )
+    
+    return {
+        "filters": filters,
+        "thinking_text": thinking_text,
+        "parse_path": "llm",
+        "parse_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def _nl_filtering_thinking_text(language: str, thinking_text: str) -> str:
+    """Thinking text shown once the query is understood and the database scan starts"""
+    if language == "en":
+        return f"✅ Query understood: {thinking_text}\n🔍 Searching database..."
+    return f"✅ クエリを理解しました: {thinking_text}\n🔍 データベースを検索中..."
+
+
+def _nl_complete_thinking_text(language: str, thinking_text: str, filtered_count: int, total_count: int) -> str:
+    """Thinking text shown when the natural language search is complete"""
+    thinking_text_filtering = _nl_filtering_thinking_text(language, thinking_text)
+    if language == "en":
+        return f"{thinking_text_filtering}\n✅ Found {filtered_count} employees matching your criteria (from {total_count} total employees)."
+    return f"{thinking_text_filtering}\n✅ {total_count}人の従業員から{filtered_count}人の結果が見つかりました。"
+
+
+def _encode_nl_cursor(state: dict) -> str:
+    """Encode pagination state (parsed filters, sort, offset) into an opaque cursor"""
+    payload = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def _decode_nl_cursor(cursor: str) -> dict:
+    """Decode a cursor from _encode_nl_cursor, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(state, dict) or not isinstance(state.get("filters"), dict):
+            raise ValueError("missing filters")
+        offset = state.setdefault("offset", 0)
+        if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+            raise ValueError("offset must be a non-negative integer")
+        page_size = state.setdefault("page_size", NL_SEARCH_RESULT_LIMIT)
+        if isinstance(page_size, bool) or not isinstance(page_size, int) or not 1 <= page_size <= NL_SEARCH_MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be an integer from 1 to {NL_SEARCH_MAX_PAGE_SIZE}")
+        return state
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+
+def _nl_page_size(page_size: Optional[int]) -> int:
+    """page_size from a request body: the default when omitted, 400 when out of range (as in a cursor)"""
+    if page_size is None:
+        return NL_SEARCH_RESULT_LIMIT
+    if not 1 <= page_size <= NL_SEARCH_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page_size must be an integer from 1 to {NL_SEARCH_MAX_PAGE_SIZE}")
+    return page_size
+
+
+def _nl_sort_key(sort_by: str):
+    """Key function for a sort field; returns None for employees without a value"""
+    if sort_by == "tenure":
+        return lambda emp: calculate_years_of_experience(emp.get("entered_at")) if emp.get("entered_at") else None
+    if sort_by == "grade":
+        return lambda emp: emp.get("latest_job_grade") or None
+    if sort_by == "name":
+        return lambda emp: emp.get("employee_name_kana") or emp.get("employee_name") or None
+    return None
+
+
+def _sort_nl_results(results: List[dict], sort_by: str, sort_order: str) -> List[dict]:
+    """Sort results by a sort field, keeping employees without a value at the end"""
+    key = _nl_sort_key(sort_by)
+    if key is None:
+        return results
+    with_value = [emp for emp in results if key(emp) is not None]
+    without_value = [emp for emp in results if key(emp) is None]
+    with_value.sort(key=key, reverse=(sort_order == "desc"))
+    return with_value + without_value
+
+
+@app.post("/api/search/natural-language", response_model=NaturalLanguageSearchResponse)
+async def natural_language_search(request: NaturalLanguageSearchRequest):
+    """
+    Natural language search for employees
+    Layer 1: Parse natural language query into structured filters using LLM
+    Layer 2: Apply filters to search employees
+    
+    Results are paginated: pass next_cursor back as cursor to get the next page.
+    A cursor carries the parsed filters, so later pages never call the LLM.
+    """
+    employees = load_employees()
+    if not employees:
+        raise HTTPException(status_code=404, detail="No employee data available")
+    
+    if request.cursor:
+        state = _decode_nl_cursor(request.cursor)
+        query = state.get("query", "")
+        language = state.get("language", "ja")
+        sort_by = state.get("sort_by", "relevance")
+        sort_order = state.get("sort_order", "asc")
+        page_size = state["page_size"]
+        offset = state["offset"]
+    else:
+        query = (request.query or "").strip()
+        language = request.language or "ja"
+        sort_by = request.sort_by or "relevance"
+        sort_order = request.sort_order or "asc"
+        page_size = _nl_page_size(request.page_size)
+        offset = 0
+        if not query:
+            raise HTTPException(status_code=400, detail="Query is required")
+    
+    if sort_by not in NL_SEARCH_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(NL_SEARCH_SORT_KEYS)}")
+    if sort_order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="sort_order must be 'asc' or 'desc'")
+    
+    try:
+        if request.cursor:
+            parsed = {
+                "filters": state["filters"],
+                "thinking_text": state.get("thinking_text", ""),
+                "parse_path": "cursor",
+                "parse_ms": 0.0
+            }
         else:
-            thinking_text_parsing = "🤔 検索クエリを分析中..."
-        
-        response = await call_azure_openai(messages, temperature=0.1, use_json_format=True)
-        
-        if "choices" not in response or len(response["choices"]) == 0:
-            raise HTTPException(status_code=500, detail="No response from Azure OpenAI")
-        
-        content = response["choices"][0]["message"]["content"]
-        
-        # Clean JSON
-        content = re.sub(r'```json\s*', '', content)
-        content = re.sub(r'```\s*', '', content)
-        content = content.strip()
-        
-        # Parse JSON
-        try:
-            parsed_data = json.loads(content)
-            filters = parsed_data.get("filters", {})
-            thinking_text = parsed_data.get("thinking_text", thinking_text_parsing)
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=500, detail=f"Failed to parse JSON response: {str(e)}")
+            parsed = await _parse_natural_language_query(query, language)
+        filters = parsed["filters"]
+        thinking_text = parsed["thinking_text"]
         
         # Layer 2: Apply filters to search employees
-        if language == "en":
-            thinking_text_filtering = f"✅ Query understood: {thinking_text}\n🔍 Searching database..."
-        else:
-            thinking_text_filtering = f"✅ クエリを理解しました: {thinking_text}\n🔍 データベースを検索中..."
-        
-        filtered_employees = []
-        
-        for emp in employees:
-            match = True
-            
-            # Check employee_id
-            if filters.get("employee_id"):
-                filter_id = filters.get("employee_id")
-                if isinstance(filter_id, list):
-                    if emp.get("employee_id") not in filter_id:
-                        match = False
-                else:
-                    if emp.get("employee_id") != filter_id:
-                        match = False
-            
-            # Check employee_name (partial match)
-            if match and filters.get("employee_name"):
-                filter_name = filters.get("employee_name")
-                emp_name = emp.get("employee_name", "")
-                if isinstance(filter_name, list):
-                    if not any(fn.lower() in emp_name.lower() or emp_name.lower() in fn.lower() for fn in filter_name):
-                        match = False
-                else:
-                    if filter_name.lower() not in emp_name.lower() and emp_name.lower() not in filter_name.lower():
-                        match = False
-            
-            # Check mail (partial match)
-            if match and filters.get("mail"):
-                filter_mail = filters.get("mail")
-                emp_mail = emp.get("mail", "")
-                if isinstance(filter_mail, list):
-                    if not any(fm.lower() in emp_mail.lower() for fm in filter_mail):
-                        match = False
-                else:
-                    if filter_mail.lower() not in emp_mail.lower():
-                        match = False
-            
-            # Check nickname
-            if match and filters.get("nickname"):
-                filter_nickname = filters.get("nickname")
-                emp_nickname = emp.get("nickname", "")
-                if isinstance(filter_nickname, list):
-                    if emp_nickname not in filter_nickname:
-                        match = False
-                else:
-                    if emp_nickname != filter_nickname:
-                        match = False
-            
-            # Check employment_type
-            if match and filters.get("employment_type"):
-                filter_emp_type = filters.get("employment_type")
-                emp_emp_type = emp.get("employment_type", "")
-                if isinstance(filter_emp_type, list):
-                    if emp_emp_type not in filter_emp_type:
-                        match = False
-                else:
-                    if emp_emp_type != filter_emp_type:
-                        match = False
-            
-            # Check current_employee_flag
-            if match and filters.get("current_employee_flag"):
-                if emp.get("current_employee_flag") != filters.get("current_employee_flag"):
-                    match = False
-            
-            # Check entered_at (date range)
-            if match and (filters.get("entered_at_min") or filters.get("entered_at_max")):
-                entered_at = emp.get("entered_at")
-                if entered_at:
-                    try:
-                        entered_date = datetime.strptime(entered_at, "%Y-%m-%d").date()
-                        if filters.get("entered_at_min"):
-                            min_date = datetime.strptime(filters.get("entered_at_min"), "%Y-%m-%d").date()
-                            if entered_date < min_date:
-                                match = False
-                        if match and filters.get("entered_at_max"):
-                            max_date = datetime.strptime(filters.get("entered_at_max"), "%Y-%m-%d").date()
-                            if entered_date > max_date:
-                                match = False
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Check last_day_at
-            if match and filters.get("last_day_at"):
-                filter_date = filters.get("last_day_at")
-                emp_date = emp.get("last_day_at")
-                if emp_date != filter_date:
-                    match = False
-            
-            # Check retired_at
-            if match and filters.get("retired_at"):
-                filter_date = filters.get("retired_at")
-                emp_date = emp.get("retired_at")
-                if emp_date != filter_date:
-                    match = False
-            
-            # Check fulltime_employee_hired_at
-            if match and filters.get("fulltime_employee_hired_at"):
-                filter_date = filters.get("fulltime_employee_hired_at")
-                emp_date = emp.get("fulltime_employee_hired_at")
-                if emp_date != filter_date:
-                    match = False
-            
-            # Check fulltime_employee_retired_at
-            if match and filters.get("fulltime_employee_retired_at"):
-                filter_date = filters.get("fulltime_employee_retired_at")
-                emp_date = emp.get("fulltime_employee_retired_at")
-                if emp_date != filter_date:
-                    match = False
-            
-            # Check employment_category
-            if match and filters.get("employment_category"):
-                filter_cat = filters.get("employment_category")
-                emp_cat = emp.get("employment_category", "")
-                if isinstance(filter_cat, list):
-                    if emp_cat not in filter_cat:
-                        match = False
-                else:
-                    if emp_cat != filter_cat:
-                        match = False
-            
-            # Check recruitment_category_new_graduate
-            if match and filters.get("recruitment_category_new_graduate"):
-                filter_cat = filters.get("recruitment_category_new_graduate")
-                emp_cat = emp.get("recruitment_category_new_graduate", "")
-                if isinstance(filter_cat, list):
-                    if emp_cat not in filter_cat:
-                        match = False
-                else:
-                    if emp_cat != filter_cat:
-                        match = False
-            
-            # Check gender
-            if match and filters.get("gender"):
-                if emp.get("gender", "") != filters.get("gender"):
-                    match = False
-            
-            # Check birthday (date range)
-            if match and (filters.get("birthday_min") or filters.get("birthday_max")):
-                birthday = emp.get("birthday")
-                if birthday:
-                    try:
-                        birth_date = datetime.strptime(birthday, "%Y-%m-%d").date()
-                        if filters.get("birthday_min"):
-                            min_date = datetime.strptime(filters.get("birthday_min"), "%Y-%m-%d").date()
-                            if birth_date < min_date:
-                                match = False
-                        if match and filters.get("birthday_max"):
-                            max_date = datetime.strptime(filters.get("birthday_max"), "%Y-%m-%d").date()
-                            if birth_date > max_date:
-                                match = False
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Check age (numeric range)
-            if match and (filters.get("age_min") is not None or filters.get("age_max") is not None):
-                emp_age = emp.get("age")
-                if emp_age is not None:
-                    if filters.get("age_min") is not None:
-                        if emp_age < filters.get("age_min"):
-                            match = False
-                    if match and filters.get("age_max") is not None:
-                        if emp_age > filters.get("age_max"):
-                            match = False
-                elif filters.get("age_min") is not None or filters.get("age_max") is not None:
-                    # If age filter is set but employee age is null, exclude
-                    match = False
-            
-            # Check years_of_service (numeric range)
-            if match and (filters.get("years_of_service_min") is not None or filters.get("years_of_service_max") is not None):
-                years_str = emp.get("years_of_service", "")
-                entered_at = emp.get("entered_at")
-                years = 0.0
-                
-                if entered_at:
-                    years = calculate_years_of_experience(entered_at)
-                elif years_str:
-                    # Parse string like "1年3ヵ月" or "1 year 3 months"
-                    match_years = re.search(r'(\d+)年', years_str)
-                    if match_years:
-                        years = float(match_years.group(1))
-                
-                if filters.get("years_of_service_min") is not None:
-                    if years < filters.get("years_of_service_min"):
-                        match = False
-                
-                if match and filters.get("years_of_service_max") is not None:
-                    if years > filters.get("years_of_service_max"):
-                        match = False
-            
-            # Check dept_1
-            if match and filters.get("dept_1"):
-                filter_dept = filters.get("dept_1")
-                emp_dept = emp.get("dept_1", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check dept_2
-            if match and filters.get("dept_2"):
-                filter_dept = filters.get("dept_2")
-                emp_dept = emp.get("dept_2", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check dept_3
-            if match and filters.get("dept_3"):
-                filter_dept = filters.get("dept_3")
-                emp_dept = emp.get("dept_3", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        # Allow flexible matching for AI/data-related departments
-                        dept_lower = emp_dept.lower()
-                        is_related = False
-                        for fd in filter_dept:
-                            fd_lower = fd.lower()
-                            ai_keywords = ["ai", "機械学習", "データ", "ml", "データサイエンス", "ai推進", "aiアクセラレーション"]
-                            if any(keyword in dept_lower or keyword in fd_lower for keyword in ai_keywords):
-                                is_related = True
-                                break
-                        if not is_related:
-                            match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check dept_4
-            if match and filters.get("dept_4"):
-                filter_dept = filters.get("dept_4")
-                emp_dept = emp.get("dept_4", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check dept_5
-            if match and filters.get("dept_5"):
-                filter_dept = filters.get("dept_5")
-                emp_dept = emp.get("dept_5", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check dept_6
-            if match and filters.get("dept_6"):
-                filter_dept = filters.get("dept_6")
-                emp_dept = emp.get("dept_6", "")
-                if isinstance(filter_dept, list):
-                    if emp_dept not in filter_dept:
-                        match = False
-                else:
-                    if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
-                        match = False
-            
-            # Check location
-            if match and filters.get("location"):
-                filter_location = filters.get("location")
-                emp_location = emp.get("location", "")
-                if isinstance(filter_location, list):
-                    if not any(fl.lower() in emp_location.lower() or emp_location.lower() in fl.lower() for fl in filter_location):
-                        match = False
-                else:
-                    if filter_location.lower() not in emp_location.lower() and emp_location.lower() not in filter_location.lower():
-                        match = False
-            
-            # Check job_title
-            if match and filters.get("job_title"):
-                filter_title = filters.get("job_title")
-                emp_title = emp.get("job_title", "")
-                if isinstance(filter_title, list):
-                    if emp_title not in filter_title:
-                        # Allow similar roles
-                        is_similar = False
-                        engineer_keywords = ["エンジニア", "engineer"]
-                        emp_title_lower = emp_title.lower()
-                        for ft in filter_title:
-                            ft_lower = ft.lower()
-                            if any(kw in emp_title_lower and kw in ft_lower for kw in engineer_keywords):
-                                is_similar = True
-                                break
-                        if not is_similar:
-                            match = False
-                else:
-                    if filter_title.lower() not in emp_title.lower() and emp_title.lower() not in filter_title.lower():
-                        match = False
-            
-            # Check job_family
-            if match and filters.get("job_family"):
-                if emp.get("job_family", "") != filters.get("job_family"):
-                    match = False
-            
-            # Check latest_job_grade
-            if match and filters.get("latest_job_grade"):
-                filter_grade = filters.get("latest_job_grade")
-                emp_grade = emp.get("latest_job_grade", "")
-                if isinstance(filter_grade, list):
-                    if emp_grade not in filter_grade:
-                        match = False
-                else:
-                    if emp_grade != filter_grade:
-                        match = False
-            
-            # Check latest_org_grade
-            if match and filters.get("latest_org_grade"):
-                filter_grade = filters.get("latest_org_grade")
-                emp_grade = emp.get("latest_org_grade", "")
-                if isinstance(filter_grade, list):
-                    if emp_grade not in filter_grade:
-                        match = False
-                else:
-                    if emp_grade != filter_grade:
-                        match = False
-            
-            # Check grade_combined
-            if match and filters.get("grade_combined"):
-                filter_grade = filters.get("grade_combined")
-                emp_grade = emp.get("grade_combined", "")
-                if isinstance(filter_grade, list):
-                    if emp_grade not in filter_grade:
-                        match = False
-                else:
-                    if emp_grade != filter_grade:
-                        match = False
-            
-            # Check salary_table
-            if match and filters.get("salary_table"):
-                filter_table = filters.get("salary_table")
-                emp_table = emp.get("salary_table", "")
-                if isinstance(filter_table, list):
-                    if emp_table not in filter_table:
-                        match = False
-                else:
-                    if emp_table != filter_table:
-                        match = False
-            
-            # Check jp_non_jp_classification
-            if match and filters.get("jp_non_jp_classification"):
-                filter_class = filters.get("jp_non_jp_classification")
-                emp_class = emp.get("jp_non_jp_classification", "")
-                if isinstance(filter_class, list):
-                    if emp_class not in filter_class:
-                        match = False
-                else:
-                    if filter_class.lower() not in emp_class.lower() and emp_class.lower() not in filter_class.lower():
-                        match = False
-            
-            if match:
-                filtered_employees.append(emp)
-        
-        # Limit results
-        filtered_employees = filtered_employees[:100]
+        filtered_employees = apply_filters(employees, filters)
+        filtered_employees = _sort_nl_results(filtered_employees, sort_by, sort_order)
         
         total_count = len(employees)
         filtered_count = len(filtered_employees)
+        page = filtered_employees[offset:offset + page_size]
+        has_more = offset + len(page) < filtered_count
+        thinking_text_complete = _nl_complete_thinking_text(language, thinking_text, filtered_count, total_count)
         
-        if language == "en":
-            thinking_text_complete = f"{thinking_text_filtering}\n✅ Found {filtered_count} employees matching your criteria (from {total_count} total employees)."
-        else:
-            thinking_text_complete = f"{thinking_text_filtering}\n✅ {total_count}人の従業員から{filtered_count}人の結果が見つかりました。"
+        next_cursor = None
+        if has_more:
+            next_cursor = _encode_nl_cursor({
+                "query": query,
+                "language": language,
+                "filters": filters,
+                "thinking_text": thinking_text,
+                "sort_by": sort_by,
+                "sort_order": sort_order,
+                "page_size": page_size,
+                "offset": offset + len(page)
+            })
         
         return NaturalLanguageSearchResponse(
             stage="complete",
             thinking_text=thinking_text_complete,
             parsed_filters=filters,
-            results=filtered_employees,
+            results=page,
             stats={
                 "total_employees": total_count,
                 "filtered_count": filtered_count,
-                "query": query
-            }
+                "returned_count": len(page),
+                "offset": offset,
+                "page_size": page_size,
+                "has_more": has_more,
+                "sort_by": sort_by,
+                "sort_order": sort_order,
+                "query": query,
+                "parse_path": parsed["parse_path"],
+                "parse_ms": parsed["parse_ms"]
+            },
+            next_cursor=next_cursor
         )
         
     except HTTPException:
@@ -2856,6 +2592,235 @@ You can filter by any field in the employee profile schema. Extract all mentione
         raise HTTPException(status_code=500, detail=f"Error processing natural language search: {str(e)}")
 
 
+@app.post("/api/search/natural-language/stream")
+async def natural_language_search_stream(request: NaturalLanguageSearchRequest):
+    """
+    Stream natural language search as Server-Sent Events
+    
+    Events (in order):
+    - parsing: the query was received and is being parsed
+    - provisional: keyword matches found while the LLM parse is still running
+      (only sent when the query needs the LLM; replaced by the results events)
+    - parsed: the structured filters, as soon as the parse returns
+    - results: a batch of matching employees, as the scan proceeds
+    - complete: final thinking text, exact stats and next_cursor
+    - error: parsing or filtering failed
+    
+    The stream sends the first page in dataset order; fetch later pages from
+    /api/search/natural-language with the next_cursor of the complete event.
+    """
+    employees = load_employees()
+    if not employees:
+        raise HTTPException(status_code=404, detail="No employee data available")
+    
+    query = (request.query or "").strip()
+    language = request.language or "ja"
+    page_size = _nl_page_size(request.page_size)
+    
+    if not query:
+        raise HTTPException(status_code=400, detail="Query is required")
+    
+    async def generate():
+        started = time.perf_counter()
+        thinking_text_parsing = "🤔 Analyzing your search query..." if language == "en" else "🤔 検索クエリを分析中..."
+        yield f"data: {json.dumps({'type': 'parsing', 'thinking_text': thinking_text_parsing})}\n\n"
+        
+        # Start the parse, then let it run until its first await: fast path and
+        # cache hits finish right here, LLM parses are still in flight
+        parse_task = asyncio.create_task(_parse_natural_language_query(query, language))
+        try:
+            await asyncio.sleep(0)
+        
+            provisional_count = 0
+            if not parse_task.done() and NL_SPECULATIVE_SEARCH_ENABLED:
+                # Speculative keyword search while the LLM parses the query
+                keyword_started = time.perf_counter()
+                hits = get_keyword_index(employees).search(query, limit=NL_SPECULATIVE_RESULT_LIMIT)
+                provisional_count = len(hits)
+                provisional_data = {
+                    "type": "provisional",
+                    "results": [employees[row] for row, _ in hits],
+                    "scores": [score for _, score in hits],
+                    "keyword_ms": round((time.perf_counter() - keyword_started) * 1000, 2),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+                yield f"data: {json.dumps(provisional_data)}\n\n"
+        
+            try:
+                parsed = await parse_task
+            except HTTPException as e:
+                yield f"data: {json.dumps({'type': 'error', 'detail': e.detail})}\n\n"
+                return
+            except Exception as e:
+                logger.error(f"Error in natural language search stream: {str(e)}")
+                yield f"data: {json.dumps({'type': 'error', 'detail': f'Error processing natural language search: {str(e)}'})}\n\n"
+                return
+        finally:
+            # The client went away before the parse finished: nobody is waiting for it
+            if not parse_task.done():
+                parse_task.cancel()
+        
+        filters = parsed["filters"]
+        thinking_text = parsed["thinking_text"]
+        parsed_data = {
+            "type": "parsed",
+            "thinking_text": _nl_filtering_thinking_text(language, thinking_text),
+            "parsed_filters": filters,
+            "parse_path": parsed["parse_path"],
+            "parse_ms": parsed["parse_ms"],
+            "replaces_provisional": provisional_count > 0
+        }
+        yield f"data: {json.dumps(parsed_data)}\n\n"
+        
+        # Layer 2: Scan in batches and emit matches as soon as each batch is done.
+        # Scanning continues past the first page so filtered_count stays exact.
+        filtered_count = 0
+        returned_count = 0
+        scanned = 0
+        first_result_ms = None
+        for rows in iter_matching_rows(filters, employees, batch_size=NL_STREAM_BATCH_SIZE):
+            scanned = min(scanned + NL_STREAM_BATCH_SIZE, len(employees))
+            filtered_count += len(rows)
+            batch = [employees[i] for i in rows[:page_size - returned_count]]
+            if batch:
+                returned_count += len(batch)
+                if first_result_ms is None:
+                    first_result_ms = round((time.perf_counter() - started) * 1000, 2)
+                results_data = {
+                    "type": "results",
+                    "results": batch,
+                    "scanned": scanned,
+                    "filtered_count": filtered_count
+                }
+                yield f"data: {json.dumps(results_data)}\n\n"
+            # Let the server flush the batch before scanning the next one
+            await asyncio.sleep(0)
+        
+        next_cursor = None
+        if returned_count < filtered_count:
+            next_cursor = _encode_nl_cursor({
+                "query": query,
+                "language": language,
+                "filters": filters,
+                "thinking_text": thinking_text,
+                "sort_by": "relevance",
+                "sort_order": "asc",
+                "page_size": page_size,
+                "offset": returned_count
+            })
+        
+        total_count = len(employees)
+        final_data = {
+            "type": "complete",
+            "thinking_text": _nl_complete_thinking_text(language, thinking_text, filtered_count, total_count),
+            "next_cursor": next_cursor,
+            "stats": {
+                "total_employees": total_count,
+                "filtered_count": filtered_count,
+                "returned_count": returned_count,
+                "has_more": next_cursor is not None,
+                "query": query,
+                "parse_path": parsed["parse_path"],
+                "parse_ms": parsed["parse_ms"],
+                "provisional_count": provisional_count,
+                "first_result_ms": first_result_ms,
+                "total_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
+        yield f"data: {json.dumps(final_data)}\n\n"
+    
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+# NL Parse Cache Admin Endpoints
+@app.get("/api/admin/nl-parse-cache")
+async def get_nl_parse_cache(limit: int = 50):
+    """Inspect the natural language parse cache (stats and most recently used entries)"""
+    return {
+        "enabled": NL_PARSE_CACHE_ENABLED,
+        "prompt_version": NL_PARSE_PROMPT_VERSION,
+        "stats": await nl_parse_cache.astats(),
+        "entries": await nl_parse_cache.aentries(limit=max(1, min(limit, 1000)))
+    }
+
+
+@app.delete("/api/admin/nl-parse-cache")
+async def clear_nl_parse_cache():
+    """Remove every entry from the natural language parse cache"""
+    removed = await nl_parse_cache.aclear()
+    logger.info(f"Cleared NL parse cache ({removed} entries)")
+    return {"status": "cleared", "removed": removed}
+
+
+@app.delete("/api/admin/nl-parse-cache/{key}")
+async def delete_nl_parse_cache_entry(key: str):
+    """Remove a single entry from the natural language parse cache"""
+    if not await nl_parse_cache.adelete(key):
+        raise HTTPException(status_code=404, detail=f"Cache entry not found: {key}")
+    return {"status": "deleted", "key": key}
+
+
+# Evaluation Cache Admin Endpoints
+@app.get("/api/admin/evaluation-cache")
+async def get_evaluation_cache(limit: int = 50):
+    """Inspect the pairwise evaluation cache (stats and most recently used entries)"""
+    return {
+        "enabled": EVALUATION_CACHE_ENABLED,
+        "version": EVALUATION_CACHE_VERSION,
+        "stats": await evaluation_cache.astats(),
+        "entries": await evaluation_cache.aentries(limit=max(1, min(limit, 1000)))
+    }
+
+
+@app.delete("/api/admin/evaluation-cache")
+async def clear_evaluation_cache():
+    """Remove every cached candidate evaluation"""
+    removed = await evaluation_cache.aclear()
+    logger.info(f"Cleared evaluation cache ({removed} entries)")
+    return {"status": "cleared", "removed": removed}
+
+
+# LLM Response Cache Admin Endpoints
+@app.get("/api/admin/llm-response-cache")
+async def get_llm_response_cache(limit: int = 50):
+    """Inspect the LLM response cache (stats, per-endpoint hit rate and recent entries)"""
+    service = get_llm_service()
+    return {
+        "stats": await asyncio.to_thread(service.response_cache_stats),
+        "entries": await service.response_cache.aentries(limit=max(1, min(limit, 1000)))
+    }
+
+
+@app.delete("/api/admin/llm-response-cache")
+async def clear_llm_response_cache():
+    """Remove every cached LLM response"""
+    removed = await get_llm_service().response_cache.aclear()
+    logger.info(f"Cleared LLM response cache ({removed} entries)")
+    return {"status": "cleared", "removed": removed}
+
+
+# Metrics Endpoints
+@app.get("/api/metrics/llm")
+async def get_llm_metrics():
+    """Telemetry, rate limiter, retry, circuit breaker, cache, hedging, cassette, parsing and model routing statistics for LLM calls in this process"""
+    resilience_stats = get_resilience_stats()
+    return {
+        "telemetry": get_llm_telemetry_stats(),
+        "rate_limiters": get_rate_limiter_stats(),
+        "retries": resilience_stats["retries"],
+        "circuit_breakers": resilience_stats["circuit_breakers"],
+        "response_cache": await asyncio.to_thread(get_llm_service().response_cache_stats),
+        "multi_provider": get_llm_service().multi_provider_stats(),
+        "model_routing": get_llm_service().model_router.stats(),
+        "cassette": get_llm_service().cassette.stats(),
+        "structured_output": {
+            "enabled": get_llm_service().structured_output_enabled,
+            **parse_counters
+        },
+        "logging": logging_stats()
+    }
+
+
 # Face Image Endpoints
 @app.get("/api/person/{employee_id}/face")
 async def get_face_image(employee_id: str):
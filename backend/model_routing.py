@@ -0,0 +1,135 @@
+"""
+Model Routing - Pick the model (Azure deployment or Gemini model) per pipeline stage
+
+Every LLMService call names its stage (analysis, persona, nl_parse,
+evaluation, evaluation_review, ...). A route maps stages to models, so
+simple stages can run on a fast, cheap deployment while the large model is
+kept for the ranking itself. Stages a route does not list (and "*" is not
+set) use AZURE_OPENAI_DEPLOYMENT / GOOGLE_GEMINI_MODEL as before.
+
+A model is either a name, used with the primary provider, or one name per
+provider:
+    {"default": {
+        "nl_parse": "gpt-4o-mini",
+        "evaluation_review": {"azure_openai": "gpt-4o-mini", "google_gemini": "gemini-1.5-flash"}
+    }}
+
+Several named routes can be configured. LLM_MODEL_ROUTE picks the one used
+by default; a request can pick another with the X-LLM-Route header, so two
+routes can be compared side by side (GET /api/metrics/llm reports telemetry
+per route). An unknown route name falls back to the default route; the
+response's X-LLM-Route header names the route that was used. The built-in
+route "base" uses the configured model everywhere.
+
+Settings (environment or backend/.env):
+    LLM_MODEL_ROUTES       JSON object of routes (see above)
+    LLM_MODEL_ROUTES_FILE  The same as a .json or .yaml file (YAML needs PyYAML);
+                           LLM_MODEL_ROUTES entries take precedence
+    LLM_MODEL_ROUTE        Route used when the request does not pick one (default: "default")
+
+Usage:
+    from model_routing import current_model_route, load_model_router
+
+    router = load_model_router("azure_openai")
+    current_model_route.set("base")
+    router.model_for("azure_openai", "nl_parse", "gpt-4o")
+"""
+import json
+import logging
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+
+ROUTE_HEADER = "X-LLM-Route"
+DEFAULT_ROUTE = "default"
+BASE_ROUTE = "base"
+ALL_STAGES = "*"
+
+# Route picked by the current request (X-LLM-Route); None uses the default route
+current_model_route: ContextVar[Optional[str]] = ContextVar("llm_model_route", default=None)
+
+
+class ModelRouter:
+    """Stage -> model tables by route name."""
+
+    def __init__(self, routes: Dict[str, Dict[str, Any]], default_route: str, primary_provider: str):
+        self.routes = {BASE_ROUTE: {}, **routes}
+        self.default_route = default_route
+        self.primary_provider = primary_provider
+
+    def route_name(self) -> str:
+        """Route of the current request: the one it picked, if configured, else the default"""
+        requested = current_model_route.get()
+        return requested if requested in self.routes else self.default_route
+
+    def model_for(self, provider: str, stage: Optional[str], default_model: str) -> str:
+        table = self.routes.get(self.route_name()) or {}
+        entry = table.get(stage or "", table.get(ALL_STAGES))
+        if isinstance(entry, dict):
+            return entry.get(provider) or default_model
+        if isinstance(entry, str) and entry and provider == self.primary_provider:
+            return entry
+        return default_model
+
+    def stats(self) -> Dict[str, Any]:
+        return {"default_route": self.default_route, "routes": self.routes}
+
+
+def _read_routes_file(path: Path) -> Dict[str, Any]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError(
+                "PyYAML is required for a YAML LLM_MODEL_ROUTES_FILE. "
+                "Install it with: pip install pyyaml, or use a .json file"
+            )
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+def _valid_routes(raw: Any, source: str) -> Dict[str, Dict[str, Any]]:
+    if not isinstance(raw, dict):
+        logger.warning(f"{source} must be an object of routes, ignoring")
+        return {}
+    routes = {}
+    for name, table in raw.items():
+        if not isinstance(table, dict) or not all(isinstance(v, (str, dict)) for v in table.values()):
+            logger.warning(f"Invalid model route '{name}' in {source}, ignoring")
+            continue
+        routes[str(name)] = table
+    return routes
+
+
+def load_model_router(primary_provider: str) -> ModelRouter:
+    """Router configured by LLM_MODEL_ROUTES / LLM_MODEL_ROUTES_FILE / LLM_MODEL_ROUTE"""
+    from llm_service import get_setting
+
+    routes: Dict[str, Dict[str, Any]] = {}
+    routes_file = get_setting("LLM_MODEL_ROUTES_FILE", "")
+    if routes_file:
+        path = Path(routes_file)
+        if not path.is_absolute():
+            path = BASE_DIR / path
+        try:
+            routes.update(_valid_routes(_read_routes_file(path), str(path)))
+        except Exception as e:
+            logger.warning(f"Could not read LLM_MODEL_ROUTES_FILE {path}, ignoring: {e}")
+    raw = get_setting("LLM_MODEL_ROUTES", "")
+    if raw:
+        try:
+            routes.update(_valid_routes(json.loads(raw), "LLM_MODEL_ROUTES"))
+        except json.JSONDecodeError as e:
+            logger.warning(f"Invalid LLM_MODEL_ROUTES, ignoring: {e}")
+
+    default_route = get_setting("LLM_MODEL_ROUTE", DEFAULT_ROUTE)
+    if default_route not in routes and default_route not in (DEFAULT_ROUTE, BASE_ROUTE):
+        logger.warning(f"LLM_MODEL_ROUTE '{default_route}' is not configured; stages use the configured model")
+    if routes:
+        logger.info(f"LLM model routes: {', '.join(sorted(routes))} (default: {default_route})")
+    return ModelRouter(routes, default_route, primary_provider)
@@ -0,0 +1,213 @@
+"""
+Partial JSON - Parse the longest valid prefix of a JSON document
+
+Used while an LLM response is still streaming: the text received so far is
+closed off (open strings, objects and arrays) and parsed, so complete fields
+can be shown before the response finishes. Incomplete numbers and literals
+are dropped rather than guessed, so a score of "8" is never reported while
+"85" is still arriving. Strings are returned as far as they have arrived.
+
+The same repair recovers a response that was cut off (e.g. by the output
+token limit): every field that arrived complete is kept.
+
+Usage:
+    from partial_json import IncrementalJSONParser, parse_partial_json
+
+    parse_partial_json('{"scores": {"overall": 82, "tech')
+    # {'scores': {'overall': 82}}
+
+    parser = IncrementalJSONParser()
+    for delta in stream:
+        partial = parser.feed(delta)
+"""
+import json
+import re
+from collections import deque
+from typing import Any, Deque, List, Optional, Tuple
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*")
+# A \uXXXX escape cut before its fourth hex digit, with the backslashes before it
+_PARTIAL_UNICODE_ESCAPE = re.compile(r"(\\+)u[0-9a-fA-F]{0,3}$")
+
+# How many earlier cut points to try before giving up
+MAX_BACKTRACK = 12
+
+# IncrementalJSONParser re-parses once the text has grown by this fraction
+# since the last parse (and by at least MIN_REPARSE_CHARS), so a stream of n
+# characters costs O(n) parsing in total rather than one parse per delta
+REPARSE_GROWTH = 0.125
+MIN_REPARSE_CHARS = 16
+
+
+class _Scanner:
+    """
+    Walks the text once, left to right, and keeps the open container stack,
+    the inside-string state and the latest cut points. A cut point is an
+    index where the prefix ends right after an opening bracket or a
+    separating comma, so closing it yields valid JSON; each one is stored
+    with the stack at that point. Scanning can resume where it stopped when
+    more text arrives.
+    """
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.cuts: Deque[Tuple[int, Tuple[str, ...]]] = deque(maxlen=MAX_BACKTRACK)
+        self.position = 0
+        # Index just past the top-level value, once it is complete
+        self.end: Optional[int] = None
+
+    def scan(self, text: str) -> None:
+        self.scan_chunk(text[self.position:])
+
+    def scan_chunk(self, chunk: str) -> None:
+        """Scan text that follows what has been scanned so far"""
+        for offset, ch in enumerate(chunk):
+            if self.end is not None:
+                break
+            i = self.position + offset
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.stack.append("}" if ch == "{" else "]")
+                self.cuts.append((i + 1, tuple(self.stack)))
+            elif ch in "}]":
+                if self.stack:
+                    self.stack.pop()
+                self.cuts.append((i + 1, tuple(self.stack)))
+                if not self.stack:
+                    self.end = i + 1
+            elif ch == ",":
+                self.cuts.append((i, tuple(self.stack)))
+        self.position += len(chunk)
+
+    def parse(self, text: str) -> Optional[Any]:
+        """Parse the scanned text, closing it off where it is incomplete"""
+        if self.end is not None:
+            try:
+                return json.loads(text[:self.end])
+            except json.JSONDecodeError:
+                pass
+
+        candidates: List[Tuple[str, Tuple[str, ...], bool]] = []
+        stripped = text.rstrip()
+        # Take the whole text unless it ends inside a number or literal (true/null)
+        if self.in_string or (stripped and stripped[-1] in '"{}[],:'):
+            candidates.append((text, tuple(self.stack), self.in_string))
+        candidates.extend((text[:cut], stack, False) for cut, stack in reversed(self.cuts))
+
+        for prefix, stack, in_string in candidates:
+            closed = _close(prefix, stack, in_string, self.escaped and in_string)
+            if not closed:
+                continue
+            try:
+                return json.loads(closed)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+
+def _close(prefix: str, stack: Tuple[str, ...], in_string: bool, escaped: bool = False) -> str:
+    if in_string:
+        # Drop a dangling escape so the closing quote is not swallowed
+        if escaped:
+            prefix = prefix[:-1]
+        else:
+            # ...and a cut \uXXXX escape, unless its backslash is itself escaped
+            match = _PARTIAL_UNICODE_ESCAPE.search(prefix)
+            if match and len(match.group(1)) % 2 == 1:
+                prefix = prefix[:match.end(1) - 1]
+        prefix += '"'
+    prefix = prefix.rstrip()
+    if prefix.endswith(":"):
+        return ""
+    prefix = prefix.rstrip(",")
+    return prefix + "".join(reversed(stack))
+
+
+def _value_start(text: str) -> int:
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return min(starts) if starts else -1
+
+
+def parse_partial_json(text: str) -> Optional[Any]:
+    """Parse as much of a possibly truncated JSON object/array as is complete"""
+    if not text:
+        return None
+    text = _CODE_FENCE.sub("", text)
+    start = _value_start(text)
+    if start < 0:
+        return None
+    text = text[start:]
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    scanner = _Scanner()
+    scanner.scan(text)
+    return scanner.parse(text)
+
+
+class IncrementalJSONParser:
+    """
+    parse_partial_json for text that arrives in pieces. Only the new piece
+    is scanned on each feed, and the text is parsed again only once it has
+    grown by REPARSE_GROWTH (or the value is complete); in between, feed
+    returns the previous result. Following a long stream stays linear.
+    Anything after the top-level value (a closing code fence, trailing
+    prose) is ignored.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._body: List[str] = []
+        self._started = False
+        self._body_length = 0
+        self._parsed_length = 0
+        self._complete = False
+        self._value: Optional[Any] = None
+        self._scanner = _Scanner()
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, delta: str) -> Optional[Any]:
+        """Add streamed text and return what can be parsed so far"""
+        self._parts.append(delta)
+        if self._complete:
+            return self._value
+        if not self._started:
+            # An opening bracket is one character, so it never spans two deltas
+            start = _value_start(delta)
+            if start < 0:
+                return None
+            self._started = True
+            delta = delta[start:]
+        self._body.append(delta)
+        self._body_length += len(delta)
+        self._scanner.scan_chunk(delta)
+
+        self._complete = self._scanner.end is not None
+        growth = self._body_length - self._parsed_length
+        if not self._complete and growth < max(MIN_REPARSE_CHARS, self._parsed_length * REPARSE_GROWTH):
+            return self._value
+        body = "".join(self._body)
+        self._body = [body]
+        self._parsed_length = self._body_length
+        self._value = self._scanner.parse(body)
+        return self._value
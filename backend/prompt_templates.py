@@ -0,0 +1,440 @@
+"""
+Prompt Templates - Candidate evaluation prompts assembled from precomputed parts
+
+Providers cache prompt prefixes (Azure OpenAI and Gemini both do it
+automatically for long prompts and report the cached input tokens in the
+usage block), so every evaluation prompt is laid out stable part first:
+
+    system message      Evaluation instructions; identical for every request,
+                        built once per process (SYSTEM_PROMPTS)
+    user message        Target block, identical for every candidate of a
+                        search, formatted once per search (EvaluationPrompts)
+                        + the candidate block and the closing instruction
+
+Only the candidate suffix is formatted per request. The resulting text is
+the same as the prompts used before this module existed, so response cache
+entries and pre-evaluated results stay valid.
+
+Usage:
+    from prompt_templates import EvaluationPrompts, format_candidate_info, format_target_info
+
+    prompts = EvaluationPrompts("ja", format_target_info(...), target_review_text)
+    messages = prompts.resume_messages(format_candidate_info(...))
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+def _resume_eval_system_prompt(language: str) -> str:
+    if language == "en":
+        return """You are an excellent HR evaluator. Analyze candidate resumes and evaluate similarity to the target employee across 5 dimensions.
+
+Output must be in JSON format following this structure:
+{
+  "scores": {
+    "technical_skills": 85,
+    "domain_expertise": 90,
+    "experience_level": 75,
+    "role_alignment": 80,
+    "soft_skills": 70,
+    "overall": 82
+  },
+  "strengths": [
+    "Expert in Python and TensorFlow",
+    "Has practical experience with Azure ML"
+  ],
+  "gaps": [
+    "Lacks NLP experience",
+    "Limited leadership experience"
+  ],
+  "explanation": "This candidate scores highly in technical skills and domain knowledge, but has room for improvement in years of experience and soft skills."
+}
+
+Important:
+- Each score is an integer from 0-100
+- overall is the average of the 5 dimensions (rounded)
+- strengths: maximum 3, gaps: maximum 2
+- explanation: 1-2 sentences in natural English
+- Output JSON only, do not use markdown code blocks"""
+    return """あなたは優秀な人事評価者です。候補者のレジュメを分析し、ターゲット従業員との類似度を5つの次元で評価してください。
+
+出力は必ずJSON形式で、以下の構造に従ってください：
+{
+  "scores": {
+    "technical_skills": 85,
+    "domain_expertise": 90,
+    "experience_level": 75,
+    "role_alignment": 80,
+    "soft_skills": 70,
+    "overall": 82
+  },
+  "strengths": [
+    "PythonとTensorFlowに精通している",
+    "Azure MLの実務経験がある"
+  ],
+  "gaps": [
+    "NLPの経験が不足している",
+    "リーダーシップ経験が少ない"
+  ],
+  "explanation": "この候補者は技術スキルとドメイン知識で高い評価を得ていますが、経験年数とソフトスキルで改善の余地があります。"
+}
+
+重要：
+- 各スコアは0-100の整数
+- overallは5つの次元の平均（四捨五入）
+- strengthsは最大3つ、gapsは最大2つ
+- explanationは自然な日本語で1-2文
+- JSONのみを出力し、マークダウンコードブロックは使用しない"""
+
+
+def _review_eval_system_prompt(language: str) -> str:
+    if language == "en":
+        return """You are an excellent HR evaluator. Analyze employee review data (monthly and half-year reviews) and evaluate similarity to the target employee's performance and growth trajectory.
+
+Output must be in JSON format following this structure:
+{
+  "scores": {
+    "performance_alignment": 85,
+    "growth_trajectory": 80,
+    "goal_achievement": 75,
+    "career_alignment": 90,
+    "overall": 82
+  },
+  "strengths": [
+    "Similar performance patterns",
+    "Aligned career goals"
+  ],
+  "gaps": [
+    "Different growth trajectory",
+    "Different performance focus"
+  ],
+  "explanation": "This candidate shows similar performance patterns and career alignment, but has a different growth trajectory."
+}
+
+Important:
+- Each score is an integer from 0-100
+- overall is the average of the 4 dimensions (rounded)
+- strengths: maximum 2, gaps: maximum 2
+- explanation: 1-2 sentences in natural English
+- Output JSON only, do not use markdown code blocks"""
+    return """あなたは優秀な人事評価者です。従業員のレビューデータ（月次レビューと半期レビュー）を分析し、ターゲット従業員のパフォーマンスと成長軌道との類似度を評価してください。
+
+出力は必ずJSON形式で、以下の構造に従ってください：
+{
+  "scores": {
+    "performance_alignment": 85,
+    "growth_trajectory": 80,
+    "goal_achievement": 75,
+    "career_alignment": 90,
+    "overall": 82
+  },
+  "strengths": [
+    "類似したパフォーマンスパターン",
+    "一致したキャリア目標"
+  ],
+  "gaps": [
+    "異なる成長軌道",
+    "異なるパフォーマンス焦点"
+  ],
+  "explanation": "この候補者は類似したパフォーマンスパターンとキャリアの一致を示していますが、成長軌道が異なります。"
+}
+
+重要：
+- 各スコアは0-100の整数
+- overallは4つの次元の平均（四捨五入）
+- strengthsは最大2つ、gapsは最大2つ
+- explanationは自然な日本語で1-2文
+- JSONのみを出力し、マークダウンコードブロックは使用しない"""
+
+
+def _batch_resume_eval_system_prompt(language: str) -> str:
+    if language == "en":
+        return """You are an excellent HR evaluator. Analyze the resumes of several candidates and evaluate each candidate's similarity to the target employee across 5 dimensions.
+
+Output must be in JSON format following this structure:
+{
+  "evaluations": [
+    {
+      "candidate_id": "12345",
+      "scores": {
+        "technical_skills": 85,
+        "domain_expertise": 90,
+        "experience_level": 75,
+        "role_alignment": 80,
+        "soft_skills": 70,
+        "overall": 82
+      },
+      "strengths": [
+        "Expert in Python and TensorFlow",
+        "Has practical experience with Azure ML"
+      ],
+      "gaps": [
+        "Lacks NLP experience"
+      ],
+      "explanation": "This candidate scores highly in technical skills and domain knowledge, but has room for improvement in years of experience."
+    }
+  ]
+}
+
+Important:
+- Return exactly one entry per candidate, with candidate_id copied from the candidate's heading
+- Evaluate every candidate independently against the target employee
+- Each score is an integer from 0-100
+- overall is the average of the 5 dimensions (rounded)
+- strengths: maximum 3, gaps: maximum 2
+- explanation: 1-2 sentences in natural English
+- Output JSON only, do not use markdown code blocks"""
+    return """あなたは優秀な人事評価者です。複数の候補者のレジュメを分析し、候補者ごとにターゲット従業員との類似度を5つの次元で評価してください。
+
+出力は必ずJSON形式で、以下の構造に従ってください：
+{
+  "evaluations": [
+    {
+      "candidate_id": "12345",
+      "scores": {
+        "technical_skills": 85,
+        "domain_expertise": 90,
+        "experience_level": 75,
+        "role_alignment": 80,
+        "soft_skills": 70,
+        "overall": 82
+      },
+      "strengths": [
+        "PythonとTensorFlowに精通している",
+        "Azure MLの実務経験がある"
+      ],
+      "gaps": [
+        "NLPの経験が不足している"
+      ],
+      "explanation": "この候補者は技術スキルとドメイン知識で高い評価を得ていますが、経験年数で改善の余地があります。"
+    }
+  ]
+}
+
+重要：
+- 候補者ごとに必ず1件ずつ出力し、candidate_idは各候補者の見出しの値をそのまま使用する
+- 各候補者はそれぞれ独立してターゲット従業員と比較する
+- 各スコアは0-100の整数
+- overallは5つの次元の平均（四捨五入）
+- strengthsは最大3つ、gapsは最大2つ
+- explanationは自然な日本語で1-2文
+- JSONのみを出力し、マークダウンコードブロックは使用しない"""
+
+
+def _batch_review_eval_system_prompt(language: str) -> str:
+    if language == "en":
+        return """You are an excellent HR evaluator. Analyze the review data (monthly and half-year reviews) of several candidates and evaluate how similar each candidate's performance and growth trajectory is to the target employee.
+
+Output must be in JSON format following this structure:
+{
+  "evaluations": [
+    {
+      "candidate_id": "12345",
+      "scores": {
+        "performance_alignment": 85,
+        "growth_trajectory": 80,
+        "goal_achievement": 75,
+        "career_alignment": 90,
+        "overall": 82
+      },
+      "strengths": [
+        "Similar performance patterns"
+      ],
+      "gaps": [
+        "Different growth trajectory"
+      ],
+      "explanation": "This candidate shows similar performance patterns and career alignment, but has a different growth trajectory."
+    }
+  ]
+}
+
+Important:
+- Return exactly one entry per candidate, with candidate_id copied from the candidate's heading
+- Evaluate every candidate independently against the target employee
+- Each score is an integer from 0-100
+- overall is the average of the 4 dimensions (rounded)
+- strengths: maximum 2, gaps: maximum 2
+- explanation: 1-2 sentences in natural English
+- Output JSON only, do not use markdown code blocks"""
+    return """あなたは優秀な人事評価者です。複数の候補者のレビューデータ（月次レビューと半期レビュー）を分析し、候補者ごとにターゲット従業員のパフォーマンスと成長軌道との類似度を評価してください。
+
+出力は必ずJSON形式で、以下の構造に従ってください：
+{
+  "evaluations": [
+    {
+      "candidate_id": "12345",
+      "scores": {
+        "performance_alignment": 85,
+        "growth_trajectory": 80,
+        "goal_achievement": 75,
+        "career_alignment": 90,
+        "overall": 82
+      },
+      "strengths": [
+        "類似したパフォーマンスパターン"
+      ],
+      "gaps": [
+        "異なる成長軌道"
+      ],
+      "explanation": "この候補者は類似したパフォーマンスパターンとキャリアの一致を示していますが、成長軌道が異なります。"
+    }
+  ]
+}
+
+重要：
+- 候補者ごとに必ず1件ずつ出力し、candidate_idは各候補者の見出しの値をそのまま使用する
+- 各候補者はそれぞれ独立してターゲット従業員と比較する
+- 各スコアは0-100の整数
+- overallは4つの次元の平均（四捨五入）
+- strengthsは最大2つ、gapsは最大2つ
+- explanationは自然な日本語で1-2文
+- JSONのみを出力し、マークダウンコードブロックは使用しない"""
+
+
+def format_target_info(language: str, target_employee: dict, target_persona: dict, target_resume: str, soft_criteria: dict) -> str:
+    """Target employee and search criteria block shared by every candidate prompt"""
+    if language == "en":
+        return f"""
+Target Employee:
+- Name: {target_employee.get('employee_name')}
+- Position: {target_employee.get('job_title')}
+- Department: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
+- Skills: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
+- Resume: {target_resume[:500]}...
+
+Search Criteria:
+- Key Skills: {', '.join(soft_criteria.get('key_skills', []))}
+- Domain Expertise: {', '.join(soft_criteria.get('domain_expertise', []))}
+- Experience Level: {soft_criteria.get('experience_level', '')}
+"""
+    return f"""
+ターゲット従業員:
+- 名前: {target_employee.get('employee_name')}
+- 役職: {target_employee.get('job_title')}
+- 部署: {target_employee.get('dept_3')} / {target_employee.get('dept_4')}
+- スキル: {', '.join([s.get('name', '') for s in target_persona.get('skills', [])])}
+- レジュメ: {target_resume[:500]}...
+
+検索条件:
+- 重要スキル: {', '.join(soft_criteria.get('key_skills', []))}
+- ドメイン専門性: {', '.join(soft_criteria.get('domain_expertise', []))}
+- 経験レベル: {soft_criteria.get('experience_level', '')}
+"""
+
+
+def format_candidate_info(
+    language: str,
+    candidate_emp: dict,
+    candidate_persona: dict,
+    candidate_resume: str,
+    candidate_id: Optional[str] = None
+) -> str:
+    """Candidate block; batched prompts label it with the candidate_id to echo back"""
+    if language == "en":
+        heading = f"Candidate (candidate_id: {candidate_id})" if candidate_id else "Candidate"
+        return f"""
+{heading}:
+- Name: {candidate_emp.get('employee_name')}
+- Position: {candidate_emp.get('job_title')}
+- Department: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
+- Skills: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
+- Resume: {candidate_resume[:500]}...
+"""
+    heading = f"候補者 (candidate_id: {candidate_id})" if candidate_id else "候補者"
+    return f"""
+{heading}:
+- 名前: {candidate_emp.get('employee_name')}
+- 役職: {candidate_emp.get('job_title')}
+- 部署: {candidate_emp.get('dept_3')} / {candidate_emp.get('dept_4')}
+- スキル: {', '.join([s.get('name', '') for s in candidate_persona.get('skills', [])])}
+- レジュメ: {candidate_resume[:500]}...
+"""
+
+
+def format_review_text(reviews: dict) -> str:
+    """Monthly and half-year review summary used in review prompts"""
+    review_text = ""
+    if reviews.get("monthly"):
+        m = reviews["monthly"]
+        review_text += f"Monthly Review: Goal: {m.get('monthly_goal', '')}, Review: {m.get('monthly_review', '')[:200]}\n"
+    if reviews.get("half_year"):
+        h = reviews["half_year"]
+        review_text += f"Half-Year Review: Score: {h.get('self_assessment_score', '')}, Growth: {h.get('half_year_self_review_achievement_growth', '')[:200]}, Career: {h.get('career_intentions', '')}\n"
+    return review_text
+
+
+# Built once per process: (kind, language) -> system prompt
+SYSTEM_PROMPTS: Dict[Tuple[str, str], str] = {
+    (kind, language): build(language)
+    for kind, build in (
+        ("resume", _resume_eval_system_prompt),
+        ("review", _review_eval_system_prompt),
+        ("batch_resume", _batch_resume_eval_system_prompt),
+        ("batch_review", _batch_review_eval_system_prompt),
+    )
+    for language in ("ja", "en")
+}
+
+_TEXT = {
+    "en": {
+        "no_reviews": "No review data available",
+        "target_reviews": "Target Employee Reviews:",
+        "candidate_reviews": "Candidate Reviews:",
+        "batch_candidate_reviews": "Candidate (candidate_id: {candidate_id}) Reviews:",
+        "resume_task": "Evaluate how similar this candidate is to the target employee across 5 dimensions.",
+        "review_task": "Evaluate how similar this candidate's performance and growth trajectory is to the target employee.",
+        "batch_resume_task": "Evaluate how similar each of these {count} candidates is to the target employee across 5 dimensions.",
+        "batch_review_task": "Evaluate how similar each of these {count} candidates' performance and growth trajectory is to the target employee.",
+    },
+    "ja": {
+        "no_reviews": "レビューデータなし",
+        "target_reviews": "ターゲット従業員のレビュー:",
+        "candidate_reviews": "候補者のレビュー:",
+        "batch_candidate_reviews": "候補者 (candidate_id: {candidate_id}) のレビュー:",
+        "resume_task": "この候補者がターゲット従業員とどの程度類似しているか、5つの次元で評価してください。",
+        "review_task": "この候補者のパフォーマンスと成長軌道がターゲット従業員とどの程度類似しているか評価してください。",
+        "batch_resume_task": "これら{count}人の候補者それぞれについて、ターゲット従業員とどの程度類似しているか、5つの次元で評価してください。",
+        "batch_review_task": "これら{count}人の候補者それぞれについて、パフォーマンスと成長軌道がターゲット従業員とどの程度類似しているか評価してください。",
+    },
+}
+
+
+class EvaluationPrompts:
+    """Evaluation prompts for one target: the target part is formatted once, candidates are appended."""
+
+    def __init__(self, language: str, target_info: str, target_review_text: str):
+        self.language = "en" if language == "en" else "ja"
+        self.text = _TEXT[self.language]
+        self.resume_prefix = f"{target_info}\n\n"
+        self.review_prefix = f"{self.text['target_reviews']}\n{target_review_text or self.text['no_reviews']}\n\n"
+
+    def _messages(self, kind: str, user_prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPTS[(kind, self.language)]},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def resume_messages(self, candidate_info: str) -> List[Dict[str, str]]:
+        return self._messages("resume", f"{self.resume_prefix}{candidate_info}\n\n{self.text['resume_task']}")
+
+    def review_messages(self, candidate_review_text: str) -> List[Dict[str, str]]:
+        return self._messages(
+            "review",
+            f"{self.review_prefix}{self.text['candidate_reviews']}\n"
+            f"{candidate_review_text or self.text['no_reviews']}\n\n{self.text['review_task']}"
+        )
+
+    def batch_resume_messages(self, candidate_infos: List[str]) -> List[Dict[str, str]]:
+        """One prompt for several candidates (infos labelled with candidate_id): the target block is sent once"""
+        blocks = "\n".join(candidate_infos)
+        task = self.text["batch_resume_task"].format(count=len(candidate_infos))
+        return self._messages("batch_resume", f"{self.resume_prefix}{blocks}\n\n{task}")
+
+    def batch_review_messages(self, candidates: List[Tuple[str, Optional[str]]]) -> List[Dict[str, str]]:
+        """candidates: (candidate_id, review text) pairs"""
+        blocks = "\n".join(
+            f"{self.text['batch_candidate_reviews'].format(candidate_id=candidate_id)}\n"
+            f"{review_text or self.text['no_reviews']}"
+            for candidate_id, review_text in candidates
+        )
+        task = self.text["batch_review_task"].format(count=len(candidates))
+        return self._messages("batch_review", f"{self.review_prefix}{blocks}\n\n{task}")
@@ -0,0 +1,390 @@
+"""
+Query Parser - Rule-based fast path for natural language search
+
+Many natural language queries are just a department, a job title, a gender and
+a tenure or age bound ("AI推進室の3年未満のエンジニア"). FastPathParser handles
+those locally: dictionary matching against the distinct values in the employee
+data plus regexes for tenure, age and join dates. It only answers when every
+meaningful part of the query was understood; otherwise the caller falls back to
+the LLM parser.
+
+Usage:
+    from query_parser import get_fast_path_parser
+
+    parsed = get_fast_path_parser(employees).parse("AI推進室の3年未満のエンジニア", "ja")
+    if parsed is not None:
+        filters = parsed["filters"]
+"""
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Fields whose distinct values form the dictionary, in priority order for terms
+# that appear in more than one field
+VOCABULARY_FIELDS = [
+    "dept_1", "dept_2", "dept_3", "dept_4", "dept_5", "dept_6",
+    "job_family", "job_title", "location", "employment_type",
+]
+
+# Words that carry no filter meaning once the criteria have been removed
+FILLER_WORDS_JA = [
+    "を探してください", "を探して", "を教えてください", "を教えて", "を表示", "を検索", "の一覧",
+    "ください", "従業員", "社員", "メンバー", "人材", "在籍中", "在籍", "現役", "所属", "勤務",
+    "全員", "一覧", "検索", "している", "して", "いる", "ある", "する", "かつ", "および", "または", "人", "方", "者",
+    "の", "で", "が", "を", "に", "と", "や", "は", "も", "な",
+]
+FILLER_WORDS_EN = [
+    "employees", "employee", "people", "person", "persons", "staff", "members", "member",
+    "who", "that", "are", "is", "in", "the", "at", "with", "of", "and",
+    "find", "show", "me", "all", "list", "search", "for", "working", "work", "works",
+    "current", "currently", "a", "an", "from", "department", "team", "please",
+]
+
+GENDER_TERMS = [
+    ("女性", "女"), ("男性", "男"),
+    ("female", "女"), ("women", "女"), ("woman", "女"),
+    ("male", "男"), ("men", "男"), ("man", "男"),
+]
+
+# Regex rules: (pattern, handler). Handlers receive the match and the filters
+# dict and return False when the match cannot be used.
+Rule = Tuple["re.Pattern[str]", Callable[["re.Match[str]", dict], bool]]
+
+
+# Filter bounds are inclusive, so an exclusive bound ("未満", "less than", "超",
+# "over") becomes the nearest value inside it: ages are whole years, tenure is
+# compared in years rounded to two decimals (filter_engine)
+AGE_STEP = 1
+TENURE_STEP = 0.01
+
+
+def _set_years_max(m: "re.Match[str]", filters: dict) -> bool:
+    filters["years_of_service_max"] = int(m.group(1))
+    return True
+
+
+def _set_years_below(m: "re.Match[str]", filters: dict) -> bool:
+    filters["years_of_service_max"] = round(int(m.group(1)) - TENURE_STEP, 2)
+    return True
+
+
+def _set_years_min(m: "re.Match[str]", filters: dict) -> bool:
+    filters["years_of_service_min"] = int(m.group(1))
+    return True
+
+
+def _set_years_above(m: "re.Match[str]", filters: dict) -> bool:
+    filters["years_of_service_min"] = round(int(m.group(1)) + TENURE_STEP, 2)
+    return True
+
+
+def _set_age_range(m: "re.Match[str]", filters: dict) -> bool:
+    low, high = int(m.group(1)), int(m.group(2))
+    if low > high:
+        return False
+    filters["age_min"], filters["age_max"] = low, high
+    return True
+
+
+def _set_age_decade(m: "re.Match[str]", filters: dict) -> bool:
+    decade = int(m.group(1))
+    if decade % 10 != 0 or not 10 <= decade <= 70:
+        return False
+    filters["age_min"], filters["age_max"] = decade, decade + 9
+    return True
+
+
+def _set_age_min(m: "re.Match[str]", filters: dict) -> bool:
+    filters["age_min"] = int(m.group(1))
+    return True
+
+
+def _set_age_above(m: "re.Match[str]", filters: dict) -> bool:
+    filters["age_min"] = int(m.group(1)) + AGE_STEP
+    return True
+
+
+def _set_age_max(m: "re.Match[str]", filters: dict) -> bool:
+    filters["age_max"] = int(m.group(1))
+    return True
+
+
+def _set_age_below(m: "re.Match[str]", filters: dict) -> bool:
+    filters["age_max"] = int(m.group(1)) - AGE_STEP
+    return True
+
+
+def _date_from_groups(year: str, month: Optional[str], day: Optional[str], end: bool) -> Optional[str]:
+    y = int(year)
+    if not month:
+        return f"{y:04d}-12-31" if end else f"{y:04d}-01-01"
+    mo = int(month)
+    if not 1 <= mo <= 12:
+        return None
+    if not day:
+        if not end:
+            return f"{y:04d}-{mo:02d}-01"
+        last_day = [31, 29 if y % 4 == 0 and (y % 100 != 0 or y % 400 == 0) else 28,
+                    31, 30, 31, 30, 31, 31, 30, 31, 30, 31][mo - 1]
+        return f"{y:04d}-{mo:02d}-{last_day:02d}"
+    d = int(day)
+    if not 1 <= d <= 31:
+        return None
+    return f"{y:04d}-{mo:02d}-{d:02d}"
+
+
+def _shift_date(value: Optional[str], days: int) -> Optional[str]:
+    try:
+        return (date.fromisoformat(value) + timedelta(days=days)).isoformat() if value else None
+    except ValueError:
+        return None
+
+
+def _set_entered_since(m: "re.Match[str]", filters: dict) -> bool:
+    """Joined in or after the given year / month / day (以降, since, from)"""
+    value = _date_from_groups(m.group(1), m.group(2), m.group(3), end=False)
+    if value is None:
+        return False
+    filters["entered_at_min"] = value
+    return True
+
+
+def _set_entered_after(m: "re.Match[str]", filters: dict) -> bool:
+    """Joined after the given period ends: "after 2022" starts at 2023-01-01"""
+    value = _shift_date(_date_from_groups(m.group(1), m.group(2), m.group(3), end=True), 1)
+    if value is None:
+        return False
+    filters["entered_at_min"] = value
+    return True
+
+
+def _set_entered_until(m: "re.Match[str]", filters: dict) -> bool:
+    """Joined in or before the given year / month / day (以前, まで, until)"""
+    value = _date_from_groups(m.group(1), m.group(2), m.group(3), end=True)
+    if value is None:
+        return False
+    filters["entered_at_max"] = value
+    return True
+
+
+def _set_entered_before(m: "re.Match[str]", filters: dict) -> bool:
+    """Joined before the given period starts: "before 2022" ends at 2021-12-31"""
+    value = _shift_date(_date_from_groups(m.group(1), m.group(2), m.group(3), end=False), -1)
+    if value is None:
+        return False
+    filters["entered_at_max"] = value
+    return True
+
+
+def _set_entered_in(m: "re.Match[str]", filters: dict) -> bool:
+    start = _date_from_groups(m.group(1), m.group(2), None, end=False)
+    end = _date_from_groups(m.group(1), m.group(2), None, end=True)
+    if start is None or end is None:
+        return False
+    filters["entered_at_min"], filters["entered_at_max"] = start, end
+    return True
+
+
+_DATE = r"(\d{4})(?:\s*[-/年]\s*(\d{1,2})(?:\s*[-/月]\s*(\d{1,2})\s*日?)?\s*月?)?\s*年?"
+_TENURE_JA = r"(?:勤続|在籍|経験|社歴)?(?:年数)?(?:が)?\s*"
+
+# Order matters: age and date rules run before the bare tenure rules
+RULES: List[Rule] = [
+    # Age (Japanese)
+    (re.compile(r"(\d{1,2})\s*(?:歳|才)?\s*(?:[〜~～\-]|から)\s*(\d{1,2})\s*(?:歳|才)(?:まで)?"), _set_age_range),
+    (re.compile(r"(\d{2})\s*代"), _set_age_decade),
+    (re.compile(r"(\d{1,2})\s*(?:歳|才)\s*以上"), _set_age_min),
+    (re.compile(r"(\d{1,2})\s*(?:歳|才)\s*(?:以下|まで)"), _set_age_max),
+    (re.compile(r"(\d{1,2})\s*(?:歳|才)\s*未満"), _set_age_below),
+    # Age (English)
+    (re.compile(r"aged?\s*(\d{1,2})\s*(?:-|to)\s*(\d{1,2})"), _set_age_range),
+    (re.compile(r"in\s+(?:their|his|her)\s+(\d0)s"), _set_age_decade),
+    (re.compile(r"at least\s*(\d{1,2})\s*(?:years? old|yo)"), _set_age_min),
+    (re.compile(r"(?:over|above|older than)\s*(\d{1,2})\s*(?:years? old|yo)"), _set_age_above),
+    (re.compile(r"(?:under|below|younger than)\s*(\d{1,2})\s*(?:years? old|yo)"), _set_age_below),
+    # Join dates (Japanese): 以降 / 以前 include the given period
+    (re.compile(_DATE + r"\s*(?:以降|以後|から)\s*(?:に)?\s*(?:入社|入った)"), _set_entered_since),
+    (re.compile(_DATE + r"\s*(?:以前|まで)\s*(?:に)?\s*(?:入社|入った)"), _set_entered_until),
+    (re.compile(r"(\d{4})\s*年\s*(?:(\d{1,2})\s*月\s*)?(?:に)?\s*入社"), _set_entered_in),
+    # Join dates (English): "since" / "until" include the given period, "after" / "before" do not
+    (re.compile(r"(?:joined|hired|entered)\s*(?:since|from)\s*" + _DATE), _set_entered_since),
+    (re.compile(r"(?:joined|hired|entered)\s*after\s*" + _DATE), _set_entered_after),
+    (re.compile(r"(?:joined|hired|entered)\s*until\s*" + _DATE), _set_entered_until),
+    (re.compile(r"(?:joined|hired|entered)\s*before\s*" + _DATE), _set_entered_before),
+    (re.compile(r"(?:joined|hired|entered)\s*in\s*(\d{4})()"), _set_entered_in),
+    # Tenure (Japanese)
+    (re.compile(_TENURE_JA + r"(\d{1,2})\s*年\s*未満"), _set_years_below),
+    (re.compile(_TENURE_JA + r"(\d{1,2})\s*年\s*(?:以下|以内|まで)"), _set_years_max),
+    (re.compile(_TENURE_JA + r"(\d{1,2})\s*年\s*以上"), _set_years_min),
+    (re.compile(_TENURE_JA + r"(\d{1,2})\s*年\s*超"), _set_years_above),
+    # Tenure (English)
+    (re.compile(r"(?:less than|under|fewer than)\s*(\d{1,2})\s*years?"
+                r"(?:\s*(?:of\s*)?(?:service|experience|tenure))?"), _set_years_below),
+    (re.compile(r"(?:at most|within)\s*(\d{1,2})\s*years?"
+                r"(?:\s*(?:of\s*)?(?:service|experience|tenure))?"), _set_years_max),
+    (re.compile(r"(?:more than|over)\s*(\d{1,2})\s*years?"
+                r"(?:\s*(?:of\s*)?(?:service|experience|tenure))?"), _set_years_above),
+    (re.compile(r"at least\s*(\d{1,2})\s*years?"
+                r"(?:\s*(?:of\s*)?(?:service|experience|tenure))?"), _set_years_min),
+]
+
+
+def normalize_query(query: str) -> str:
+    """NFKC-normalize (full-width digits/letters to ASCII) and lower-case a query"""
+    return unicodedata.normalize("NFKC", query).lower()
+
+
+class FastPathParser:
+    """Dictionary and regex parser built from the distinct values of the employee data."""
+
+    def __init__(self, employees: List[dict]):
+        self.employees = employees
+        self.size = len(employees)
+        # term (normalized) -> (field, original value); first field in VOCABULARY_FIELDS wins
+        self.vocabulary: Dict[str, Tuple[str, str]] = {}
+        for field in VOCABULARY_FIELDS:
+            for emp in employees:
+                value = emp.get(field)
+                if not value or not isinstance(value, str) or value in ("-",):
+                    continue
+                term = normalize_query(value).strip()
+                if len(term) >= 2 and term not in self.vocabulary:
+                    self.vocabulary[term] = (field, value)
+        # Longest terms first so "シニアエンジニア" wins over "エンジニア"
+        self._terms_by_first_char: Dict[str, List[str]] = {}
+        for term in sorted(self.vocabulary, key=len, reverse=True):
+            self._terms_by_first_char.setdefault(term[0], []).append(term)
+
+    def parse(self, query: str, language: str = "ja") -> Optional[dict]:
+        """
+        Parse a query without the LLM.
+
+        Returns:
+            Dictionary with filters and thinking_text when the whole query was
+            understood, otherwise None.
+        """
+        text = normalize_query(query).strip()
+        if not text:
+            return None
+
+        filters: dict = {"current_employee_flag": "●"}
+        chars = list(text)
+
+        def consume(start: int, end: int) -> None:
+            for i in range(start, end):
+                chars[i] = " "
+
+        # 1. Regex rules (tenure, age, dates)
+        for pattern, handler in RULES:
+            for m in pattern.finditer("".join(chars)):
+                if handler(m, filters):
+                    consume(m.start(), m.end())
+
+        # 2. Gender terms (word boundaries for English so "female" is not read as "male")
+        for term, value in GENDER_TERMS:
+            regex = re.escape(term) if not term.isascii() else r"\b" + re.escape(term) + r"\b"
+            for m in re.finditer(regex, "".join(chars)):
+                if filters.get("gender") not in (None, value):
+                    return None  # both genders mentioned: leave it to the LLM
+                filters["gender"] = value
+                consume(m.start(), m.end())
+
+        # 3. Dictionary match, longest term first at each position
+        matched_fields: Dict[str, List[str]] = {}
+        i = 0
+        while i < len(chars):
+            candidates = self._terms_by_first_char.get(chars[i], [])
+            hit = None
+            for term in candidates:
+                if "".join(chars[i:i + len(term)]) == term:
+                    hit = term
+                    break
+            if hit is None:
+                i += 1
+                continue
+            field, value = self.vocabulary[hit]
+            if value not in matched_fields.setdefault(field, []):
+                matched_fields[field].append(value)
+            consume(i, i + len(hit))
+            i += len(hit)
+
+        for field, values in matched_fields.items():
+            filters[field] = values[0] if len(values) == 1 else values
+
+        if len(filters) == 1:
+            return None  # only the default current-employee flag: nothing understood
+
+        # 4. Everything left must be filler
+        residue = "".join(chars)
+        fillers = FILLER_WORDS_JA + FILLER_WORDS_EN
+        residue = re.sub(r"[\s、。,.!?！？・/]+", " ", residue)
+        for word in sorted(fillers, key=len, reverse=True):
+            if word.isascii():
+                residue = re.sub(r"\b" + re.escape(word) + r"\b", " ", residue)
+            else:
+                residue = residue.replace(word, " ")
+        if residue.strip():
+            return None
+
+        return {
+            "filters": filters,
+            "thinking_text": describe_filters(filters, language),
+        }
+
+
+FIELD_LABELS = {
+    "ja": {
+        "dept": "部署", "job_family": "職種", "job_title": "役職", "location": "勤務地",
+        "employment_type": "雇用形態", "gender": "性別",
+    },
+    "en": {
+        "dept": "department", "job_family": "job family", "job_title": "job title",
+        "location": "location", "employment_type": "employment type", "gender": "gender",
+    },
+}
+
+
+def describe_filters(filters: dict, language: str = "ja") -> str:
+    """Build a short thinking_text describing the understood filters"""
+    labels = FIELD_LABELS["en" if language == "en" else "ja"]
+    parts = []
+    for field, value in filters.items():
+        if field == "current_employee_flag" or value is None:
+            continue
+        shown = ", ".join(value) if isinstance(value, list) else str(value)
+        if field.startswith("dept_"):
+            parts.append(f"{labels['dept']}={shown}")
+        elif field in labels:
+            parts.append(f"{labels[field]}={shown}")
+    if language == "en":
+        if "years_of_service_min" in filters:
+            parts.append(f"at least {filters['years_of_service_min']} years of service")
+        if "years_of_service_max" in filters:
+            parts.append(f"at most {filters['years_of_service_max']} years of service")
+        if "age_min" in filters or "age_max" in filters:
+            parts.append(f"age {filters.get('age_min', '')}-{filters.get('age_max', '')}")
+        if "entered_at_min" in filters or "entered_at_max" in filters:
+            parts.append(f"joined {filters.get('entered_at_min', '')}~{filters.get('entered_at_max', '')}")
+        return f"Searching current employees with {', '.join(parts)} (parsed locally)."
+    if "years_of_service_min" in filters:
+        parts.append(f"勤続{filters['years_of_service_min']}年以上")
+    if "years_of_service_max" in filters:
+        parts.append(f"勤続{filters['years_of_service_max']}年以下")
+    if "age_min" in filters or "age_max" in filters:
+        parts.append(f"年齢{filters.get('age_min', '')}〜{filters.get('age_max', '')}歳")
+    if "entered_at_min" in filters or "entered_at_max" in filters:
+        parts.append(f"入社日{filters.get('entered_at_min', '')}〜{filters.get('entered_at_max', '')}")
+    return f"{'、'.join(parts)}の現役従業員を検索します（ローカル解析）。"
+
+
+_parser_cache: Optional[FastPathParser] = None
+
+
+def get_fast_path_parser(employees: List[dict]) -> FastPathParser:
+    """Return the parser for an employee list, rebuilding it only when the list changes"""
+    global _parser_cache
+    if _parser_cache is None or _parser_cache.employees is not employees \
+            or _parser_cache.size != len(employees):
+        _parser_cache = FastPathParser(employees)
+    return _parser_cache
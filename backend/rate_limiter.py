@@ -0,0 +1,198 @@
+"""
+Rate Limiter - Token buckets and in-flight limits for LLM API calls
+
+One limiter exists per (provider, model/deployment) and is shared by every
+endpoint in the process. Each call reserves one request from the
+requests-per-minute bucket and its estimated tokens from the tokens-per-minute
+bucket, then waits only as long as the buckets require. Once the response
+arrives the token reservation is corrected with the reported usage.
+
+Configuration (environment or backend/.env), most specific first:
+    LLM_RATE_LIMITS='{"azure_openai:gpt-4o": {"rpm": 300, "tpm": 150000, "max_in_flight": 8}}'
+    AZURE_OPENAI_RPM / AZURE_OPENAI_TPM / AZURE_OPENAI_MAX_IN_FLIGHT
+    GOOGLE_GEMINI_RPM / GOOGLE_GEMINI_TPM / GOOGLE_GEMINI_MAX_IN_FLIGHT
+    LLM_RPM / LLM_TPM / LLM_MAX_IN_FLIGHT
+A value of 0 disables that limit.
+
+Usage:
+    from rate_limiter import get_rate_limiter, estimate_tokens
+
+    limiter = get_rate_limiter("azure_openai", "gpt-4o")
+    async with limiter.acquire(estimate_tokens(messages)) as lease:
+        result = await post(...)
+        lease.record_usage(result["usage"]["total_tokens"])
+"""
+import json
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], completion_tokens: int = 0) -> int:
+    """
+    Rough token estimate for chat messages without a tokenizer.
+
+    ASCII text averages about 4 characters per token; Japanese and other
+    non-ASCII text is closer to one token per character.
+    """
+    total = 0
+    for msg in messages:
+        content = msg.get("content") or ""
+        ascii_chars = sum(1 for ch in content if ord(ch) < 128)
+        total += ascii_chars // 4 + (len(content) - ascii_chars) + 4
+    return total + completion_tokens
+
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity equals one minute of quota."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` from the bucket, going into debt if needed.
+
+        Returns:
+            Seconds the caller must wait before the reservation is covered
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RateLease:
+    """Handle for one admitted call, used to reconcile the token estimate."""
+
+    def __init__(self, limiter: "RateLimiter", estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+
+    def record_usage(self, total_tokens: Optional[int]) -> None:
+        """Correct the tokens-per-minute bucket with the actual usage"""
+        if total_tokens is None:
+            return
+        self.limiter.used_tokens += total_tokens
+        if self.limiter.token_bucket is not None:
+            self.limiter.token_bucket.adjust(self.estimated_tokens - total_tokens)
+
+
+class RateLimiter:
+    """Requests/minute and tokens/minute buckets plus a max-in-flight semaphore."""
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, max_in_flight: int = 0):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_in_flight = max_in_flight
+        self.request_bucket = TokenBucket(rpm) if rpm > 0 else None
+        self.token_bucket = TokenBucket(tpm) if tpm > 0 else None
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled_calls = 0
+        self.total_wait_seconds = 0.0
+        self.used_tokens = 0
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0):
+        """Wait for a free slot and enough quota, then yield a RateLease"""
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            wait = 0.0
+            if self.request_bucket is not None:
+                wait = max(wait, self.request_bucket.reserve(1))
+            if self.token_bucket is not None:
+                wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+            if wait > 0:
+                self.throttled_calls += 1
+                self.total_wait_seconds += wait
+                logger.debug(f"Rate limiter {self.name}: waiting {wait:.2f}s")
+                await asyncio.sleep(wait)
+
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                yield RateLease(self, estimated_tokens)
+            finally:
+                self.in_flight -= 1
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "rpm": self.rpm or None,
+            "tpm": self.tpm or None,
+            "max_in_flight": self.max_in_flight or None,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "throttled_calls": self.throttled_calls,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "used_tokens": self.used_tokens,
+        }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def _limit_setting(get_setting, provider: str, name: str, overrides: dict, default: str) -> int:
+    if name.lower() in overrides:
+        return int(overrides[name.lower()])
+    value = get_setting(f"{provider.upper()}_{name}", "")
+    if value == "":
+        value = get_setting(f"LLM_{name}", default)
+    return int(value)
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    """Return the process-wide limiter for a provider and model/deployment"""
+    name = f"{provider}:{model}"
+    limiter = _limiters.get(name)
+    if limiter is None:
+        from llm_service import get_setting
+
+        overrides = {}
+        raw = get_setting("LLM_RATE_LIMITS", "")
+        if raw:
+            try:
+                overrides = {k.lower(): v for k, v in json.loads(raw).get(name, {}).items()}
+            except (json.JSONDecodeError, AttributeError) as e:
+                logger.warning(f"Invalid LLM_RATE_LIMITS, ignoring: {e}")
+
+        limiter = RateLimiter(
+            name,
+            rpm=_limit_setting(get_setting, provider, "RPM", overrides, "0"),
+            tpm=_limit_setting(get_setting, provider, "TPM", overrides, "0"),
+            max_in_flight=_limit_setting(get_setting, provider, "MAX_IN_FLIGHT", overrides, "8"),
+        )
+        _limiters[name] = limiter
+        logger.info(
+            f"Rate limiter {name}: rpm={limiter.rpm or 'unlimited'}, "
+            f"tpm={limiter.tpm or 'unlimited'}, max_in_flight={limiter.max_in_flight or 'unlimited'}"
+        )
+    return limiter
+
+
+def get_rate_limiter_stats() -> List[Dict[str, Any]]:
+    """Stats for every limiter created in this process"""
+    return [limiter.stats() for limiter in _limiters.values()]
@@ -0,0 +1,283 @@
+"""
+Resilience - Retry with backoff and circuit breaking for LLM API calls
+
+Retries use exponential backoff with full jitter, honour a server supplied
+Retry-After, and stop once the next attempt would not fit in the call's
+deadline. A circuit breaker per (provider, model) fails fast after repeated
+failures and lets a single probe through once the reset timeout has passed.
+
+Exceptions are classified by their attributes, so any error type can opt in:
+    retryable    - True if the call may succeed when repeated (429, 5xx, timeouts)
+    retry_after  - Seconds the server asked us to wait, or None
+
+Usage:
+    from resilience import RetryPolicy, get_circuit_breaker, call_with_retry
+
+    result = await call_with_retry(
+        lambda: post(...),
+        policy=RetryPolicy(max_attempts=4),
+        breaker=get_circuit_breaker("azure_openai:gpt-4o"),
+        deadline=time.monotonic() + 60
+    )
+"""
+import time
+import random
+import asyncio
+import logging
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / Retry-After headers (seconds or HTTP date)"""
+    if headers is None:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000.0)
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+    # Do not start an attempt with less time than this left before the deadline
+    min_attempt_seconds: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit is open."""
+
+    retryable = False
+    retry_after = None
+    status_code = 503
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit open for {name}; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open probe after a timeout."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now"""
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self.probe_in_flight:
+                self.rejected_calls += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self.probe_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    f"Circuit {self.name} opened after {self.consecutive_failures} failures; "
+                    f"failing fast for {self.reset_timeout:.0f}s"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls,
+        }
+
+
+class RetryStats:
+    """Counters for one provider/model."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.successes = 0
+        self.failures = 0
+        self.retry_after_honoured = 0
+        self.deadline_exhausted = 0
+        self.total_backoff_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retry_after_honoured": self.retry_after_honoured,
+            "deadline_exhausted": self.deadline_exhausted,
+            "total_backoff_seconds": round(self.total_backoff_seconds, 3),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_retry_stats: Dict[str, RetryStats] = {}
+
+
+def get_circuit_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider/model"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        _breakers[name] = breaker
+    return breaker
+
+
+def get_retry_stats(name: str) -> RetryStats:
+    stats = _retry_stats.get(name)
+    if stats is None:
+        stats = RetryStats(name)
+        _retry_stats[name] = stats
+    return stats
+
+
+def get_resilience_stats() -> Dict[str, List[Dict[str, Any]]]:
+    """Retry counters and breaker states for every provider/model used so far"""
+    return {
+        "retries": [stats.to_dict() for stats in _retry_stats.values()],
+        "circuit_breakers": [breaker.stats() for breaker in _breakers.values()],
+    }
+
+
+async def call_with_retry(
+    func: Callable[[], Awaitable[Any]],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    deadline: Optional[float] = None,
+    stats: Optional[RetryStats] = None
+) -> Any:
+    """
+    Run `func` until it succeeds, fails with a non-retryable error, runs out
+    of attempts, or the deadline (time.monotonic() value) leaves no room for
+    another attempt. The last error is re-raised.
+    """
+    if stats is not None:
+        stats.calls += 1
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                if stats is not None:
+                    stats.failures += 1
+                raise
+        if stats is not None:
+            stats.attempts += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # A cancelled call (hedge lost, timeout, client gone) says nothing
+            # about provider health, but a half-open probe must be released
+            if breaker is not None:
+                breaker.probe_in_flight = False
+            raise
+        except Exception as e:
+            retryable = getattr(e, "retryable", False)
+            if breaker is not None and retryable:
+                # Client errors (400, 401, ...) say nothing about provider health
+                breaker.record_failure()
+            elif breaker is not None:
+                breaker.probe_in_flight = False
+
+            if not retryable or attempt >= policy.max_attempts:
+                if stats is not None:
+                    stats.failures += 1
+                raise
+
+            delay = policy.backoff(attempt)
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, policy.max_delay * 3))
+                if stats is not None:
+                    stats.retry_after_honoured += 1
+
+            if deadline is not None and time.monotonic() + delay + policy.min_attempt_seconds > deadline:
+                if stats is not None:
+                    stats.failures += 1
+                    stats.deadline_exhausted += 1
+                logger.warning(f"Not retrying after attempt {attempt}: deadline too close ({e})")
+                raise
+
+            if stats is not None:
+                stats.retries += 1
+                stats.total_backoff_seconds += delay
+            logger.warning(f"Attempt {attempt} failed ({e}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if breaker is not None:
+            breaker.record_success()
+        if stats is not None:
+            stats.successes += 1
+        return result
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Load-test the similar-employee search and natural language search endpoints
+against the local fake LLM server (scripts/fake_llm_server.py), so no real
+LLM quota is spent.
+
+The fake server runs on a background thread and LLMService is pointed at it
+as an Azure OpenAI endpoint. Each simulated user of the "similar" scenario
+runs the three UI stages in sequence (analysis, filter, streaming
+evaluation); the "nl" scenario sends natural language searches. The backend
+app is served by uvicorn on another background thread, so streamed events
+are timed as a browser would see them. The LLM response and evaluation
+caches are disabled unless --response-cache is given, so every prompt
+reaches the fake server.
+
+With --cassette-mode record the LLM responses are also written to a
+cassette (LLM_CASSETTE_PATH, see cassette.py); --cassette-mode replay
+serves them from it without starting the fake server, which makes runs
+reproducible and leaves only the backend's own work to measure.
+
+--model-route sends the X-LLM-Route header; several comma-separated routes
+are assigned to users in turn, and the stage latencies are then reported per
+route (routes come from LLM_MODEL_ROUTES, see model_routing.py).
+
+Usage:
+    python scripts/bench_evaluate.py [--scenario similar] [--users 10] [--concurrency 5]
+    python scripts/bench_evaluate.py --scenario nl --users 50 --latency-ms 300 --rate-limit-rate 0.05
+    python scripts/bench_evaluate.py --batch-size 5 --candidates 30
+    python scripts/bench_evaluate.py --users 2 --eval-concurrency 1
+    python scripts/bench_evaluate.py --truncate-rate 0.2 --stream-tokens
+    LLM_MODEL_ROUTES='{"fast": {"evaluation_review": "mini", "nl_parse": "mini"}}' \
+        python scripts/bench_evaluate.py --model-route base,fast --model-speed '{"mini": 3}'
+    python scripts/bench_evaluate.py --users 5 --cassette-mode record --cassette /tmp/bench.jsonl
+    python scripts/bench_evaluate.py --users 5 --cassette-mode replay --cassette /tmp/bench.jsonl
+
+The fake server options (--latency, --latency-ms, --error-rate, ...) are the
+same as for scripts/fake_llm_server.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from fake_llm_server import add_config_arguments, config_from_args, serve_in_thread, start_in_thread  # noqa: E402
+
+NL_QUERIES = [
+    "エンジニア職で勤続3年以上の人",
+    "東京勤務のデータサイエンティスト",
+    "Senior engineers in the AI division",
+    "マネージャー職で30代の社員",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(round(len(values) * p / 100)) - 1)]
+
+
+def summarize(label: str, values: List[float]) -> None:
+    if not values:
+        print(f"{label:<22} no samples")
+        return
+    print(
+        f"{label:<22} n={len(values):<4} mean {statistics.mean(values):8.1f} ms  "
+        f"p50 {percentile(values, 50):8.1f} ms  p95 {percentile(values, 95):8.1f} ms  "
+        f"max {max(values):8.1f} ms"
+    )
+
+
+async def read_events(response: httpx.Response):
+    async for line in response.aiter_lines():
+        if line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
+
+async def similar_search(
+    client: httpx.AsyncClient, target: dict, args, timings: Dict[str, List[float]], headers: Dict[str, str]
+) -> None:
+    """Analysis, filter and streaming evaluation for one target, as the UI does"""
+    started = time.perf_counter()
+    response = await client.post("/api/search/similar-employees", headers=headers, json={
+        "target_employee": target, "language": args.language
+    })
+    response.raise_for_status()
+    analysis = response.json()
+    timings["analysis"].append((time.perf_counter() - started) * 1000)
+
+    stage_started = time.perf_counter()
+    response = await client.post("/api/search/filter", headers=headers, json={
+        "search_id": analysis["search_id"],
+        "hard_filters": {k: v for k, v in analysis["analysis_result"]["hard_filters"].items() if v is not None},
+        "target_employee_id": target["employee_id"],
+        "language": args.language
+    })
+    response.raise_for_status()
+    candidate_ids = response.json()["candidate_ids"][:args.candidates]
+    timings["filter"].append((time.perf_counter() - stage_started) * 1000)
+
+    stage_started = time.perf_counter()
+    first_event_ms: Optional[float] = None
+    async with client.stream("POST", "/api/search/evaluate/stream", headers=headers, json={
+        "search_id": analysis["search_id"],
+        "target_employee": target,
+        "candidate_ids": candidate_ids,
+        "soft_criteria": analysis["analysis_result"]["soft_criteria"],
+        "language": args.language,
+        "batch_size": args.batch_size,
+        "concurrency": args.eval_concurrency,
+        "stream_tokens": args.stream_tokens
+    }) as response:
+        response.raise_for_status()
+        async for event in read_events(response):
+            if first_event_ms is None:
+                first_event_ms = (time.perf_counter() - stage_started) * 1000
+            if event.get("type") == "complete":
+                timings["evaluated_candidates"].append(event["stats"]["evaluated_count"])
+                timings["cached_candidates"].append(event["stats"]["cached_count"])
+    timings["evaluate_first_event"].append(first_event_ms or 0.0)
+    timings["evaluate_total"].append((time.perf_counter() - stage_started) * 1000)
+    timings["session_total"].append((time.perf_counter() - started) * 1000)
+
+
+async def nl_search(
+    client: httpx.AsyncClient, index: int, args, timings: Dict[str, List[float]], headers: Dict[str, str]
+) -> None:
+    # A distinct query per user, so the parse cache does not answer them
+    query = f"{NL_QUERIES[index % len(NL_QUERIES)]} ({index})"
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/search/natural-language", headers=headers, json={"query": query, "language": args.language}
+    )
+    response.raise_for_status()
+    timings["nl_search"].append((time.perf_counter() - started) * 1000)
+
+
+async def run(args) -> None:
+    replay = args.cassette_mode == "replay"
+    # Replays never reach a provider, so there is nothing to serve
+    server, base_url = (None, "http://127.0.0.1:9/") if replay else start_in_thread(config_from_args(args))
+    tmpdir = tempfile.mkdtemp()
+    os.environ.update({
+        "LLM_PROVIDER": "azure_openai",
+        "AZURE_OPENAI_ENDPOINT": base_url,
+        "AZURE_OPENAI_API_KEY": "fake",
+        "AZURE_OPENAI_DEPLOYMENT": "fake",
+        "LLM_SECONDARY_PROVIDER": "",
+        "LLM_RESPONSE_CACHE_ENABLED": "true" if args.response_cache else "false",
+        "EVALUATION_CACHE_ENABLED": "true" if args.response_cache else "false",
+        "CACHE_DB_PATH": os.path.join(tmpdir, "cache.sqlite3"),
+        "LOG_LEVEL": "WARNING",
+        "LLM_CASSETTE_MODE": args.cassette_mode,
+    })
+    if args.cassette:
+        os.environ["LLM_CASSETTE_PATH"] = args.cassette
+
+    import main
+
+    backend, backend_url = serve_in_thread(main.app)
+    timings: Dict[str, List[float]] = {
+        "analysis": [], "filter": [], "evaluate_first_event": [], "evaluate_total": [],
+        "session_total": [], "evaluated_candidates": [], "cached_candidates": [], "nl_search": []
+    }
+    employees = [e for e in main.load_employees() if e.get("employee_id")]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = 0
+    routes = [r.strip() for r in args.model_route.split(",")] if args.model_route else []
+
+    async with httpx.AsyncClient(base_url=backend_url, timeout=600.0) as client:
+        async def one(index: int):
+            nonlocal failures
+            headers = {"X-LLM-Route": routes[index % len(routes)]} if routes else {}
+            async with semaphore:
+                try:
+                    if args.scenario == "similar":
+                        await similar_search(client, employees[index % len(employees)], args, timings, headers)
+                    else:
+                        await nl_search(client, index, args, timings, headers)
+                except Exception as e:
+                    failures += 1
+                    print(f"user {index} failed: {type(e).__name__}: {e}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.users)))
+        wall_ms = (time.perf_counter() - started) * 1000
+        metrics = (await client.get("/api/metrics/llm")).json()
+
+    # Shutting down runs the app lifespan, which closes LLMService
+    backend.should_exit = True
+    if server is not None:
+        server.should_exit = True
+
+    if replay:
+        llm = f"replayed from {metrics['cassette']['path']} (latency scale {metrics['cassette']['latency_scale']})"
+    else:
+        llm = (
+            f"fake LLM {args.latency} {args.latency_ms:.0f} ms, {args.tokens_per_second:.0f} tok/s, "
+            f"error rate {args.error_rate}, 429 rate {args.rate_limit_rate}, truncate rate {args.truncate_rate}"
+        )
+    print(f"{args.users} users ({args.scenario}), concurrency {args.concurrency}, {llm}")
+    for label in ("analysis", "filter", "evaluate_first_event", "evaluate_total", "session_total", "nl_search"):
+        if timings[label]:
+            summarize(label, timings[label])
+    if timings["evaluated_candidates"]:
+        print(
+            f"candidates evaluated per search: {statistics.mean(timings['evaluated_candidates']):.1f} "
+            f"({statistics.mean(timings['cached_candidates']):.1f} from the evaluation cache)"
+        )
+    print(f"failed users: {failures}  wall {wall_ms / 1000:.1f} s")
+    if server is not None:
+        print("fake LLM requests:", json.dumps(server.config.app.state.fake.stats, ensure_ascii=False))
+    if args.cassette_mode != "off":
+        print("cassette:", json.dumps(metrics["cassette"]))
+    print("JSON responses:", json.dumps(metrics["structured_output"]))
+    by_stage = metrics.get("telemetry", {}).get("by_stage", {})
+    print("LLM calls by stage:", json.dumps(
+        {
+            stage: {
+                "calls": s["calls"], "errors": s["errors"], "retries": s["retries"],
+                "prompt_tokens": s["prompt_tokens"], "cached_prompt_tokens": s["cached_prompt_tokens"]
+            }
+            for stage, s in by_stage.items()
+        }
+    ))
+    if len(routes) > 1:
+        for route, stages in metrics["telemetry"]["by_route"].items():
+            print(f"route {route}:", json.dumps(
+                {stage: {"calls": s["calls"], "latency_ms_mean": s["latency_ms_mean"], "models": s["models"]}
+                 for stage, s in stages.items()}
+            ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=["similar", "nl"], default="similar")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=30, help="Candidates evaluated per similar search")
+    parser.add_argument("--batch-size", type=int, default=None, help="Candidates per evaluation request")
+    parser.add_argument("--eval-concurrency", type=int, default=None, help="Candidates evaluated at once per search")
+    parser.add_argument("--stream-tokens", action="store_true", help="Request partial evaluation results")
+    parser.add_argument("--language", choices=["ja", "en"], default="ja")
+    parser.add_argument(
+        "--response-cache", action="store_true", help="Keep the LLM response and evaluation caches enabled"
+    )
+    parser.add_argument("--cassette-mode", choices=["off", "record", "replay"], default="off")
+    parser.add_argument("--cassette", help="Cassette file (default: LLM_CASSETTE_PATH)")
+    parser.add_argument("--model-route", help="X-LLM-Route for every user, or comma-separated routes to alternate")
+    add_config_arguments(parser)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-call latency of a fresh HTTP client per request versus the
+pooled client shared by LLMService, against a local stand-in for the
+Azure OpenAI chat completions endpoint.
+
+Usage:
+    python scripts/bench_llm_client.py [--calls 60] [--concurrency 1] [--tls]
+
+--tls serves HTTPS with a throwaway self-signed certificate (requires the
+openssl command), which makes the handshake cost visible.
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+RESPONSE_BODY = json.dumps({
+    "choices": [{"message": {"role": "assistant", "content": "{\"ok\": true}"}}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+}).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a fixed chat completion, keeping the connection open"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY a reused
+    # connection stalls on delayed ACKs and hides the pooling gain
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_self_signed_cert(directory: str):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_server(tls_files=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    if tls_files:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*tls_files)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_calls(call, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, (time.perf_counter() - start) * 1000
+
+
+def summarize(label: str, latencies, wall_ms: float):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{label:<8} mean {statistics.mean(latencies):7.2f} ms  "
+        f"median {statistics.median(latencies):7.2f} ms  "
+        f"p95 {p95:7.2f} ms  wall {wall_ms:8.1f} ms"
+    )
+    return statistics.mean(latencies)
+
+
+async def main(args):
+    tmpdir = tempfile.mkdtemp()
+    tls_files = make_self_signed_cert(tmpdir) if args.tls else None
+    server = start_server(tls_files)
+    scheme = "https" if args.tls else "http"
+    endpoint = f"{scheme}://127.0.0.1:{server.server_address[1]}/"
+
+    os.environ["LLM_PROVIDER"] = "azure_openai"
+    os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+    os.environ["AZURE_OPENAI_API_KEY"] = "bench"
+    os.environ["AZURE_OPENAI_DEPLOYMENT"] = "bench"
+    if tls_files:
+        # Trusted by both the fresh clients and the pooled client
+        os.environ["SSL_CERT_FILE"] = tls_files[0]
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    from llm_service import LLMService
+
+    url = f"{endpoint}openai/deployments/bench/chat/completions"
+    messages = [{"role": "user", "content": "ping"}]
+
+    async def fresh_call():
+        # What LLMService did before: a new client (and connection) per call
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                url, params={"api-version": "2024-02-15-preview"},
+                headers={"api-key": "bench"}, json={"messages": messages}, timeout=30.0
+            )
+            response.raise_for_status()
+
+    service = LLMService()
+
+    async def pooled_call():
+        await service.call(messages, temperature=0.0)
+
+    # Warm up both paths (imports, first TLS context, pool)
+    await fresh_call()
+    await pooled_call()
+
+    print(f"{args.calls} calls, concurrency {args.concurrency}, {scheme.upper()} stand-in server")
+    fresh_mean = summarize("fresh", *await run_calls(fresh_call, args.calls, args.concurrency))
+    pooled_mean = summarize("pooled", *await run_calls(pooled_call, args.calls, args.concurrency))
+    print(f"pooled saves {fresh_mean - pooled_mean:.2f} ms per call ({fresh_mean / pooled_mean:.1f}x faster)")
+
+    await service.aclose()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--tls", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Azure OpenAI chat completions API and the Gemini
+REST API, for load-testing the backend without spending real quota.
+
+The server recognizes the backend's prompts by their system prompt and
+answers with JSON that matches the schema each one asks for (analysis,
+natural language parsing, resume and review evaluation in both the
+single-candidate and batch forms, persona). Scores are pseudo-random but
+deterministic per prompt, so response caches behave as with a real model.
+Anything else gets a short plain-text reply.
+
+Latency, errors and rate limiting are configurable:
+    --latency             Distribution of the time to first token:
+                          fixed, uniform, normal or lognormal
+    --latency-ms          Median time to first token (default: 800)
+    --latency-spread      uniform: +/- ms; normal: standard deviation in ms;
+                          lognormal: sigma of log(latency) (default: 0.5)
+    --tokens-per-second   Generation speed after the first token (default: 80)
+    --error-rate          Share of requests answered with a 500
+    --rate-limit-rate     Share of requests answered with a 429
+    --retry-after         Retry-After seconds sent with a 429 (default: 1)
+    --truncate-rate       Share of responses cut short, as if the output token
+                          limit was hit (finish_reason "length" / MAX_TOKENS)
+    --model-speed         JSON of speed-ups by deployment/model name, e.g.
+                          '{"gpt-4o-mini": 3}' answers that deployment three
+                          times faster (latency and generation)
+
+Prompt prefix caching is simulated the way Azure OpenAI does it: once a
+prompt of at least 1024 tokens has been seen, later prompts sharing its
+prefix report the shared part (in 128-token steps) as cached tokens.
+
+Streaming is supported on both APIs ("stream": true for Azure OpenAI,
+:streamGenerateContent with or without alt=sse for Gemini). GET /stats
+returns request counts per prompt kind and status.
+
+Usage:
+    python scripts/fake_llm_server.py --port 8765 --latency lognormal --rate-limit-rate 0.05
+
+    # backend/.env (or environment) for Azure OpenAI
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8765/
+    AZURE_OPENAI_API_KEY=fake
+
+    # or for Gemini (REST transport; the SDK's async calls need gRPC, so use the executor)
+    GOOGLE_GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+    GOOGLE_GEMINI_API_KEY=fake
+    GEMINI_CALL_MODE=executor
+
+    # from a benchmark
+    from fake_llm_server import FakeLLMConfig, start_in_thread
+    server, base_url = start_in_thread(FakeLLMConfig(latency_ms=300))
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger("fake_llm_server")
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+CHARS_PER_TOKEN = 4
+STREAM_CHUNK_CHARS = 16
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_STEP_TOKENS = 128
+
+RESUME_SCORE_FIELDS = ("technical_skills", "domain_expertise", "experience_level", "role_alignment", "soft_skills")
+REVIEW_SCORE_FIELDS = ("performance_alignment", "growth_trajectory", "goal_achievement", "career_alignment")
+CANDIDATE_ID_PATTERN = re.compile(r"candidate_id: ([^)\s]+)\)")
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: str = "lognormal"
+    latency_ms: float = 800.0
+    latency_spread: float = 0.5
+    tokens_per_second: float = 80.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    truncate_rate: float = 0.0
+    model_speed: Dict[str, float] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+
+# --- Prompt recognition and responses -------------------------------------
+
+def classify_prompt(system_prompt: str) -> str:
+    """Prompt kind from the markers in the backend's system prompts"""
+    batch = '"evaluations"' in system_prompt
+    if "technical_skills" in system_prompt:
+        return "resume_eval_batch" if batch else "resume_eval"
+    if "performance_alignment" in system_prompt:
+        return "review_eval_batch" if batch else "review_eval"
+    if "hard_filters" in system_prompt:
+        return "analysis"
+    if '"filters"' in system_prompt:
+        return "nl_parse"
+    if '"skills"' in system_prompt and '"career"' in system_prompt:
+        return "persona"
+    return "text"
+
+
+def _evaluation(rng: random.Random, fields, english: bool) -> dict:
+    scores = {field: rng.randint(40, 95) for field in fields}
+    scores["overall"] = round(sum(scores.values()) / len(fields))
+    if english:
+        strengths = ["Comparable hands-on experience", "Similar domain background", "Works in a related team"]
+        gaps = ["Fewer years in a lead role", "Different main technology stack"]
+        explanation = "Stand-in evaluation generated by the local fake LLM server."
+    else:
+        strengths = ["同等の実務経験がある", "類似したドメイン経験", "関連するチームに所属している"]
+        gaps = ["リード経験の年数が少ない", "主要な技術スタックが異なる"]
+        explanation = "ローカルのフェイクLLMサーバーが生成した評価です。"
+    return {
+        "scores": scores,
+        "strengths": strengths[:rng.randint(1, 3 if len(fields) == 5 else 2)],
+        "gaps": gaps[:rng.randint(1, 2)],
+        "explanation": explanation
+    }
+
+
+def build_response(kind: str, system_prompt: str, user_prompt: str, seed: Optional[int]) -> str:
+    """Response text for one request; deterministic for a given prompt and seed"""
+    digest = hashlib.sha256(f"{seed}\n{system_prompt}\n{user_prompt}".encode("utf-8")).digest()
+    rng = random.Random(int.from_bytes(digest[:8], "big"))
+    english = "Output must be in JSON format" in system_prompt
+
+    if kind in ("resume_eval", "review_eval"):
+        fields = RESUME_SCORE_FIELDS if kind == "resume_eval" else REVIEW_SCORE_FIELDS
+        payload = _evaluation(rng, fields, english)
+    elif kind in ("resume_eval_batch", "review_eval_batch"):
+        fields = RESUME_SCORE_FIELDS if kind == "resume_eval_batch" else REVIEW_SCORE_FIELDS
+        candidate_ids = list(dict.fromkeys(CANDIDATE_ID_PATTERN.findall(user_prompt)))
+        payload = {"evaluations": [
+            {"candidate_id": candidate_id, **_evaluation(random.Random(f"{digest.hex()}:{candidate_id}"), fields, english)}
+            for candidate_id in candidate_ids
+        ]}
+    elif kind == "analysis":
+        # No structural filters beyond current employees, so every target yields candidates
+        payload = {
+            "hard_filters": {"current_employee_flag": "●"},
+            "soft_criteria": {
+                "key_skills": ["Python", "SQL", "Cloud"],
+                "domain_expertise": ["Data Analysis"],
+                "experience_level": "Mid-level" if english else "中堅",
+                "role_alignment": "Engineering" if english else "エンジニアリング",
+                "preferred_departments": []
+            },
+            "thinking_text": (
+                "Stand-in analysis: searching all current employees."
+                if english else "フェイクLLMサーバーによる分析です。在籍中の全従業員を対象にします。"
+            )
+        }
+    elif kind == "nl_parse":
+        payload = {
+            "filters": {"current_employee_flag": "●"},
+            "thinking_text": (
+                "Stand-in parse: searching all current employees."
+                if english else "フェイクLLMサーバーによる解析です。在籍中の全従業員を検索します。"
+            )
+        }
+    elif kind == "persona":
+        payload = {
+            "skills": [
+                {"name": name, "experience": rng.randint(1, 10), "description": "フェイクLLMサーバーの出力"}
+                for name in rng.sample(["Python", "SQL", "TypeScript", "Go", "Azure", "GCP", "Kubernetes"], 3)
+            ],
+            "career": [{
+                "start_month": "2020-04",
+                "end_month": "2024-03",
+                "company": "サンプル株式会社",
+                "position": "メンバー",
+                "role": "Engineer",
+                "description": "フェイクLLMサーバーの出力"
+            }]
+        }
+    else:
+        return "OK"
+    return json.dumps(payload, ensure_ascii=False)
+
+
+# --- Server ---------------------------------------------------------------
+
+class FakeLLM:
+    """Latency, failure injection and bookkeeping shared by both API flavours."""
+
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.prefix_hashes = set()
+
+    def cached_tokens(self, prompt_text: str) -> int:
+        """Simulated provider prefix cache: tokens of the longest prefix seen before"""
+        step = PREFIX_CACHE_STEP_TOKENS * CHARS_PER_TOKEN
+        cached = 0
+        for end in range(PREFIX_CACHE_MIN_TOKENS * CHARS_PER_TOKEN, len(prompt_text) + 1, step):
+            digest = hashlib.sha256(prompt_text[:end].encode("utf-8")).digest()
+            if digest in self.prefix_hashes:
+                cached = end // CHARS_PER_TOKEN
+            else:
+                self.prefix_hashes.add(digest)
+        return cached
+
+    def count(self, kind: str, status: str) -> None:
+        by_status = self.stats.setdefault(kind, {})
+        by_status[status] = by_status.get(status, 0) + 1
+
+    def speed(self, model: Optional[str]) -> float:
+        return float(self.config.model_speed.get(model or "", 1.0)) or 1.0
+
+    def first_token_seconds(self, model: Optional[str] = None) -> float:
+        c = self.config
+        if c.latency == "fixed":
+            ms = c.latency_ms
+        elif c.latency == "uniform":
+            ms = self.rng.uniform(c.latency_ms - c.latency_spread, c.latency_ms + c.latency_spread)
+        elif c.latency == "normal":
+            ms = self.rng.gauss(c.latency_ms, c.latency_spread)
+        else:
+            ms = self.rng.lognormvariate(0.0, c.latency_spread) * c.latency_ms
+        return max(ms, 0.0) / 1000 / self.speed(model)
+
+    def generation_seconds(self, text: str, model: Optional[str] = None) -> float:
+        if self.config.tokens_per_second <= 0:
+            return 0.0
+        return len(text) / CHARS_PER_TOKEN / (self.config.tokens_per_second * self.speed(model))
+
+    def injected_failure(self, kind: str) -> Optional[JSONResponse]:
+        """A 429 or 500 for the configured share of requests"""
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            self.count(kind, "429")
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Rate limit exceeded (fake LLM server)"}},
+                status_code=429,
+                headers={"Retry-After": str(self.config.retry_after)}
+            )
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.count(kind, "500")
+            return JSONResponse(
+                {"error": {"code": "500", "message": "Internal server error (fake LLM server)"}},
+                status_code=500
+            )
+        return None
+
+    def maybe_truncate(self, kind: str, text: str) -> Tuple[str, bool]:
+        """Cut the configured share of responses to 50-95% of their length"""
+        if self.config.truncate_rate <= 0 or self.rng.random() >= self.config.truncate_rate:
+            return text, False
+        self.count(kind, "truncated")
+        return text[:int(len(text) * self.rng.uniform(0.5, 0.95))], True
+
+    async def chunks(self, text: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield the text in small pieces at the configured generation speed"""
+        await asyncio.sleep(self.first_token_seconds(model))
+        for start in range(0, len(text), STREAM_CHUNK_CHARS):
+            piece = text[start:start + STREAM_CHUNK_CHARS]
+            await asyncio.sleep(self.generation_seconds(piece, model))
+            yield piece
+
+
+def _usage(prompt_text: str, completion_text: str) -> Tuple[int, int]:
+    return max(1, len(prompt_text) // CHARS_PER_TOKEN), max(1, len(completion_text) // CHARS_PER_TOKEN)
+
+
+def _message_text(content) -> str:
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def _gemini_text(content: Optional[dict]) -> str:
+    return "".join(part.get("text", "") for part in (content or {}).get("parts", []))
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    fake = FakeLLM(config)
+    app = FastAPI(title="Fake LLM server")
+    app.state.fake = fake
+
+    @app.get("/stats")
+    async def stats():
+        return {"config": vars(config), "requests": fake.stats}
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def azure_chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        system_prompt = "\n".join(_message_text(m.get("content")) for m in messages if m.get("role") == "system")
+        user_prompt = "\n".join(_message_text(m.get("content")) for m in messages if m.get("role") != "system")
+        kind = classify_prompt(system_prompt)
+        failure = fake.injected_failure(kind)
+        if failure is not None:
+            return failure
+
+        text, truncated = fake.maybe_truncate(kind, build_response(kind, system_prompt, user_prompt, config.seed))
+        finish_reason = "length" if truncated else "stop"
+        prompt_tokens, completion_tokens = _usage(system_prompt + user_prompt, text)
+        cached_tokens = fake.cached_tokens(system_prompt + user_prompt)
+        completion_id = f"chatcmpl-fake-{int(time.time() * 1000)}"
+
+        if body.get("stream"):
+            async def events():
+                async for piece in fake.chunks(text, deployment):
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": deployment,
+                             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                final = {"id": completion_id, "object": "chat.completion.chunk", "model": deployment,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+                fake.count(kind, "200")
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(fake.first_token_seconds(deployment) + fake.generation_seconds(text, deployment))
+        fake.count(kind, "200")
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "model": deployment,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    @app.post("/{version}/models/{model_action}")
+    async def gemini_generate(version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            return JSONResponse({"error": {"code": 404, "message": f"Unknown method '{action}'"}}, status_code=404)
+        body = await request.json()
+        system = body.get("systemInstruction") or body.get("system_instruction")
+        system_prompt = _gemini_text(system)
+        user_prompt = "\n".join(_gemini_text(c) for c in body.get("contents", []))
+        kind = classify_prompt(system_prompt)
+        failure = fake.injected_failure(kind)
+        if failure is not None:
+            return failure
+
+        text, truncated = fake.maybe_truncate(kind, build_response(kind, system_prompt, user_prompt, config.seed))
+        prompt_tokens, completion_tokens = _usage(system_prompt + user_prompt, text)
+        cached_tokens = fake.cached_tokens(system_prompt + user_prompt)
+
+        def response_body(piece: str, finished: bool) -> dict:
+            candidate = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+            result = {"candidates": [candidate], "modelVersion": model}
+            if finished:
+                candidate["finishReason"] = "MAX_TOKENS" if truncated else "STOP"
+                result["usageMetadata"] = {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": completion_tokens,
+                    "totalTokenCount": prompt_tokens + completion_tokens,
+                    "cachedContentTokenCount": cached_tokens
+                }
+            return result
+
+        if action == "streamGenerateContent":
+            sse = request.query_params.get("alt") == "sse"
+
+            async def events():
+                first = True
+                async for piece, last in _with_last(fake.chunks(text, model)):
+                    payload = json.dumps(response_body(piece, last), ensure_ascii=False)
+                    if sse:
+                        yield f"data: {payload}\r\n\r\n"
+                    else:
+                        # REST streaming without alt=sse is one JSON array, element by element
+                        yield ("[" if first else ",\r\n") + payload
+                    first = False
+                if not sse:
+                    yield "[]" if first else "]"
+                fake.count(kind, "200")
+
+            media_type = "text/event-stream" if sse else "application/json"
+            return StreamingResponse(events(), media_type=media_type)
+
+        await asyncio.sleep(fake.first_token_seconds(model) + fake.generation_seconds(text, model))
+        fake.count(kind, "200")
+        return response_body(text, True)
+
+    return app
+
+
+async def _with_last(iterator: AsyncIterator[str]) -> AsyncIterator[Tuple[str, bool]]:
+    """Pair each item with whether it is the last one"""
+    previous = None
+    async for item in iterator:
+        if previous is not None:
+            yield previous, False
+        previous = item
+    if previous is not None:
+        yield previous, True
+
+
+def serve_in_thread(app, host: str = "127.0.0.1", port: int = 0) -> Tuple[uvicorn.Server, str]:
+    """Serve an ASGI app on a background thread; returns the server (set .should_exit to stop) and its base URL"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://{host}:{sock.getsockname()[1]}/"
+
+
+def start_in_thread(config: FakeLLMConfig, host: str = "127.0.0.1", port: int = 0) -> Tuple[uvicorn.Server, str]:
+    """Start the fake LLM server on a background thread"""
+    return serve_in_thread(create_app(config), host, port)
+
+
+def config_from_args(args) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_spread=args.latency_spread,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        truncate_rate=args.truncate_rate,
+        model_speed=json.loads(args.model_speed) if args.model_speed else {},
+        seed=args.seed
+    )
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = FakeLLMConfig()
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-spread", type=float, default=defaults.latency_spread)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--truncate-rate", type=float, default=defaults.truncate_rate)
+    parser.add_argument("--model-speed", default="", help="JSON of speed-ups by deployment/model name")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Pre-evaluate candidates for frequently searched targets so interactive
+similar-employee searches for them are answered from the LLM response cache.
+
+For each target employee the job runs the same stages as the UI:
+    1. Analysis (one regular LLM call, cached as usual)
+    2. Hard-filter search
+    3. Resume and review evaluation of the first 30 filtered candidates
+
+The stage 3 requests of all targets are submitted together through the
+Azure OpenAI Batch API (file upload + /openai/batches, 24h completion
+window, roughly half the price of interactive calls and outside the
+interactive rate limits). Gemini has no batch interface in the SDK we use,
+so with LLM_PROVIDER=google_gemini (or --mode local) the requests run
+locally through LLMService instead. Either way each response is stored
+under the key an identical interactive request looks up.
+
+Only single-candidate prompts are pre-evaluated, i.e. what the
+/api/search/evaluate endpoints send with EVALUATION_BATCH_SIZE=1. Stages
+routed to another deployment (LLM_MODEL_ROUTES, default route) are cached
+under that deployment; the batch job only covers the default deployment,
+so routed requests run locally.
+
+Usage:
+    python scripts/pre_evaluate.py 12345 23456 [--language ja en]
+    python scripts/pre_evaluate.py --targets-file targets.txt --mode local
+
+Settings (environment or backend/.env):
+    AZURE_OPENAI_BATCH_DEPLOYMENT   Global-Batch deployment (default: AZURE_OPENAI_DEPLOYMENT)
+    PRE_EVALUATE_POLL_SECONDS       Batch status poll interval (default: 30)
+    PRE_EVALUATE_TIMEOUT_SECONDS    Give up waiting for a batch after this long (default: 86400)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import main  # noqa: E402
+from llm_service import LLMProvider, LLMServiceError, get_llm_service, get_setting  # noqa: E402
+from structured_output import response_schema  # noqa: E402
+
+logger = logging.getLogger("pre_evaluate")
+
+EVALUATION_TEMPERATURE = 0.2
+MAX_CANDIDATES = 30  # Same limit as the evaluation endpoints
+BATCH_TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+async def build_target_requests(target_id: str, language: str, employees_by_id: Dict[str, dict], personas: dict) -> List[dict]:
+    """Analysis and filter stages for one target, then its evaluation requests"""
+    target_employee = employees_by_id.get(target_id)
+    if target_employee is None:
+        logger.warning(f"Target {target_id} not found; skipping")
+        return []
+
+    analysis = await main.start_similar_search(
+        main.SimilarEmployeeSearchRequest(target_employee=target_employee, language=language)
+    )
+    filtered = await main.filter_candidates(main.FilterSearchRequest(
+        search_id=analysis.search_id,
+        hard_filters=analysis.analysis_result.hard_filters.model_dump(exclude_none=True),
+        target_employee_id=target_id,
+        language=language
+    ))
+    soft_criteria = analysis.analysis_result.soft_criteria.model_dump()
+
+    target = main._prepare_evaluation_target(language, target_employee, soft_criteria, personas)
+    requests = []
+    for candidate_id in filtered.candidate_ids[:MAX_CANDIDATES]:
+        candidate_emp = employees_by_id.get(candidate_id)
+        if candidate_emp is None:
+            continue
+        candidate = main._prepare_evaluation_candidate(language, candidate_emp, personas)
+        requests.append({
+            "endpoint": "evaluation",
+            "messages": target["prompts"].resume_messages(candidate["info"]),
+            "schema": response_schema(main.ResumeEvaluationOutput)
+        })
+        if target["has_reviews"] or candidate["has_reviews"]:
+            requests.append({
+                "endpoint": "evaluation_review",
+                "messages": target["prompts"].review_messages(candidate["review_text"]),
+                "schema": response_schema(main.ReviewEvaluationOutput)
+            })
+    logger.info(
+        f"Target {target_id} ({language}): {len(filtered.candidate_ids)} filtered candidates, "
+        f"{len(requests)} evaluation requests"
+    )
+    return requests
+
+
+class AzureBatchRunner:
+    """Submit chat completions as one Azure OpenAI batch job and wait for the output file."""
+
+    def __init__(self, service, poll_seconds: float, timeout_seconds: float):
+        self.service = service
+        self.deployment = get_setting("AZURE_OPENAI_BATCH_DEPLOYMENT", "") or service.deployment
+        self.poll_seconds = poll_seconds
+        self.timeout_seconds = timeout_seconds
+
+    def _url(self, path: str) -> str:
+        return f"{self.service.endpoint}openai/{path}"
+
+    async def _request(self, method: str, path: str, **kwargs):
+        client = self.service._get_http_client()
+        response = await client.request(
+            method, self._url(path),
+            params={"api-version": self.service.api_version},
+            headers={"api-key": self.service.azure_api_key},
+            **kwargs
+        )
+        if response.status_code >= 400:
+            raise LLMServiceError(
+                f"Azure OpenAI batch API error: Status: {response.status_code}, Response: {response.text}",
+                status_code=response.status_code
+            )
+        return response
+
+    async def run(self, requests: Dict[str, dict]) -> Dict[str, dict]:
+        lines = []
+        for custom_id, request in requests.items():
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {
+                    "model": self.deployment,
+                    "messages": request["messages"],
+                    "temperature": EVALUATION_TEMPERATURE,
+                    "response_format": (
+                        request["schema"].azure_response_format()
+                        if self.service.structured_output_enabled else {"type": "json_object"}
+                    )
+                }
+            }, ensure_ascii=False))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        upload = await self._request(
+            "POST", "files",
+            data={"purpose": "batch"},
+            files={"file": ("pre_evaluate.jsonl", payload, "application/jsonl")}
+        )
+        input_file_id = upload.json()["id"]
+        created = await self._request("POST", "batches", json={
+            "input_file_id": input_file_id,
+            "endpoint": "/chat/completions",
+            "completion_window": "24h"
+        })
+        batch = created.json()
+        logger.info(f"Submitted batch {batch['id']} with {len(requests)} requests ({len(payload)} bytes)")
+
+        started = time.monotonic()
+        while batch.get("status") not in BATCH_TERMINAL_STATES:
+            if time.monotonic() - started > self.timeout_seconds:
+                raise TimeoutError(
+                    f"Batch {batch['id']} still '{batch.get('status')}' after {self.timeout_seconds:.0f}s; "
+                    "results will not be cached by this run"
+                )
+            await asyncio.sleep(self.poll_seconds)
+            batch = (await self._request("GET", f"batches/{batch['id']}")).json()
+            counts = batch.get("request_counts") or {}
+            logger.info(
+                f"Batch {batch['id']}: {batch.get('status')} "
+                f"({counts.get('completed', 0)}/{counts.get('total', len(requests))} completed, "
+                f"{counts.get('failed', 0)} failed)"
+            )
+
+        if batch["status"] != "completed":
+            logger.warning(f"Batch {batch['id']} ended as '{batch['status']}'; keeping any completed results")
+        results: Dict[str, dict] = {}
+        if batch.get("output_file_id"):
+            content = await self._request("GET", f"files/{batch['output_file_id']}/content")
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") == 200 and response.get("body", {}).get("choices"):
+                    results[item["custom_id"]] = response["body"]
+        return results
+
+
+async def run_local(service, requests: Dict[str, dict]) -> Dict[str, dict]:
+    """Stand-in for a provider batch interface: regular calls, paced by the shared rate limiter"""
+    results: Dict[str, dict] = {}
+
+    async def one(custom_id: str, request: dict):
+        try:
+            results[custom_id] = await service.call(
+                request["messages"], temperature=EVALUATION_TEMPERATURE, use_json_format=True,
+                endpoint=request["endpoint"], response_schema=request["schema"]
+            )
+        except Exception as e:
+            logger.warning(f"Request {custom_id} ({request['endpoint']}) failed: {e}")
+
+    await asyncio.gather(*(one(custom_id, request) for custom_id, request in requests.items()))
+    return results
+
+
+async def pre_evaluate(target_ids: List[str], languages: List[str], mode: str, refresh: bool) -> Dict[str, int]:
+    service = get_llm_service()
+    if not service.response_cache_enabled:
+        raise SystemExit("LLM_RESPONSE_CACHE_ENABLED=false: pre-evaluated results would not be used")
+
+    employees_by_id = {e.get("employee_id"): e for e in main.load_employees()}
+    personas = main.load_personas()
+
+    pending: Dict[str, dict] = {}
+    already_cached = 0
+    duplicates = 0
+    for language in languages:
+        for target_id in target_ids:
+            try:
+                requests = await build_target_requests(target_id, language, employees_by_id, personas)
+            except Exception as e:
+                logger.error(f"Analysis/filter failed for target {target_id} ({language}): {e}")
+                continue
+            for request in requests:
+                key = service.response_cache_key(
+                    request["messages"], EVALUATION_TEMPERATURE, True, request["endpoint"]
+                )
+                if key in pending:
+                    # Identical prompts, e.g. review prompts of candidates without review data
+                    duplicates += 1
+                    continue
+                if not refresh and service.response_cache.get(key) is not None:
+                    already_cached += 1
+                    continue
+                pending[key] = request
+
+    # Cache keys double as batch custom_ids: unique and stable per prompt
+    stats = {"targets": len(target_ids), "requests": len(pending), "already_cached": already_cached,
+             "duplicates": duplicates, "stored": 0}
+    if not pending:
+        logger.info("Nothing to evaluate: every request is already cached")
+        return stats
+
+    if mode == "auto":
+        mode = "batch" if service.provider == LLMProvider.AZURE_OPENAI else "local"
+    if mode == "batch":
+        if service.provider != LLMProvider.AZURE_OPENAI:
+            raise SystemExit("--mode batch requires LLM_PROVIDER=azure_openai")
+        runner = AzureBatchRunner(
+            service,
+            poll_seconds=float(get_setting("PRE_EVALUATE_POLL_SECONDS", "30")),
+            timeout_seconds=float(get_setting("PRE_EVALUATE_TIMEOUT_SECONDS", str(24 * 3600)))
+        )
+        batched = {
+            custom_id: request for custom_id, request in pending.items()
+            if service._provider_model(service.provider, request["endpoint"]) == service.deployment
+        }
+        routed = {custom_id: request for custom_id, request in pending.items() if custom_id not in batched}
+        if routed:
+            logger.info(f"{len(routed)} requests are routed to other deployments and run locally")
+        results = {custom_id: (result, f"{service.provider.value}:batch")
+                   for custom_id, result in (await runner.run(batched)).items()} if batched else {}
+        results.update({custom_id: (result, None) for custom_id, result in (await run_local(service, routed)).items()})
+    else:
+        results = {custom_id: (result, None) for custom_id, result in (await run_local(service, pending)).items()}
+
+    for custom_id, (result, answered_by) in results.items():
+        request = pending[custom_id]
+        if service.store_response(
+            request["messages"], EVALUATION_TEMPERATURE, True, result,
+            endpoint=request["endpoint"], answered_by=answered_by
+        ):
+            stats["stored"] += 1
+    return stats
+
+
+def read_targets(args) -> List[str]:
+    targets = list(args.targets)
+    if args.targets_file:
+        for line in Path(args.targets_file).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                targets.append(line)
+    return list(dict.fromkeys(targets))
+
+
+async def amain(args) -> int:
+    target_ids = read_targets(args)
+    if not target_ids:
+        logger.error("No targets given")
+        return 2
+    started = time.perf_counter()
+    try:
+        stats = await pre_evaluate(target_ids, args.language, args.mode, args.refresh)
+    finally:
+        await main.close_llm_service()
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    print(json.dumps(stats))
+    return 0 if stats["stored"] == stats["requests"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("targets", nargs="*", help="Target employee IDs")
+    parser.add_argument("--targets-file", help="File with one target employee ID per line")
+    parser.add_argument("--language", nargs="+", default=["ja"], choices=["ja", "en"])
+    parser.add_argument(
+        "--mode", choices=["auto", "batch", "local"], default="auto",
+        help="batch: Azure OpenAI Batch API; local: regular calls; auto: batch on Azure, local otherwise"
+    )
+    parser.add_argument("--refresh", action="store_true", help="Re-evaluate requests that are already cached")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    sys.exit(asyncio.run(amain(parser.parse_args())))
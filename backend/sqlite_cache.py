@@ -0,0 +1,315 @@
+"""
+SQLite Cache - Small persistent key/value cache shared across worker processes
+
+Entries are JSON values stored in a single SQLite file, grouped by namespace.
+Each namespace has its own TTL and maximum entry count; when the maximum is
+exceeded the least recently used entries are evicted.
+
+Hits only touch the database to read: their last-access time and hit count
+are buffered and written in one transaction every TOUCH_FLUSH_SECONDS (or
+TOUCH_FLUSH_BATCH hits), and expired / over-capacity entries are evicted
+every EVICT_EVERY_SETS writes rather than on each one. The a-prefixed
+methods (aget, aget_many, aset, adelete, aclear, aentries, astats) run the
+same calls on a worker thread, so async code does not block the event loop
+on the file lock.
+
+Usage:
+    from sqlite_cache import SQLiteCache
+
+    cache = SQLiteCache(namespace="nl_parse", ttl_seconds=86400, max_entries=5000)
+    cache.set(key, {"filters": {...}}, meta={"query": "..."})
+    value = cache.get(key)
+    value = await cache.aget(key)
+"""
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent
+DEFAULT_CACHE_DB = BASE_DIR / ".cache" / "cache.sqlite3"
+CACHE_DB_PATH = Path(os.getenv("CACHE_DB_PATH", str(DEFAULT_CACHE_DB)))
+
+# Buffered last-access updates are written after this long or this many hits
+TOUCH_FLUSH_SECONDS = 5.0
+TOUCH_FLUSH_BATCH = 100
+# Writes between eviction passes; a namespace may briefly exceed max_entries by this much
+EVICT_EVERY_SETS = 50
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Build a stable SHA-256 key from JSON-serializable parts"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """Persistent JSON cache for one namespace, with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        db_path: Optional[Path] = None
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.max_entries = max_entries if max_entries and max_entries > 0 else None
+        self.db_path = Path(db_path or CACHE_DB_PATH)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # key -> (last access time, hits since the last flush)
+        self._touches: Dict[str, Tuple[float, int]] = {}
+        self._touches_flushed_at = time.monotonic()
+        self._sets_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, check_same_thread=False)
+            # WAL lets several uvicorn workers read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    meta TEXT,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, last_accessed)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or an expired entry"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value, created_at = row
+                if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    )
+                    conn.commit()
+                    self.misses += 1
+                    return None
+                self._touch(conn, key, now)
+                self.hits += 1
+            return json.loads(value)
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning(f"Cache read failed ({self.namespace}): {e}")
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Cached values by key for the keys that hit, in one query"""
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                placeholders = ",".join("?" * len(keys))
+                rows = conn.execute(
+                    f"SELECT key, value, created_at FROM cache_entries "
+                    f"WHERE namespace = ? AND key IN ({placeholders})",
+                    (self.namespace, *keys)
+                ).fetchall()
+                for key, value, created_at in rows:
+                    # Expired entries are left for the next eviction pass
+                    if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                        continue
+                    found[key] = json.loads(value)
+                    self._touch(conn, key, now)
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logger.warning(f"Cache read failed ({self.namespace}): {e}")
+            found = {}
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def _touch(self, conn: sqlite3.Connection, key: str, now: float) -> None:
+        """Buffer a hit's last-access update; write the buffer when it is due"""
+        _, count = self._touches.get(key, (now, 0))
+        self._touches[key] = (now, count + 1)
+        if (len(self._touches) >= TOUCH_FLUSH_BATCH
+                or time.monotonic() - self._touches_flushed_at >= TOUCH_FLUSH_SECONDS):
+            self._flush_touches(conn)
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        self._touches_flushed_at = time.monotonic()
+        if not self._touches:
+            return
+        touches, self._touches = self._touches, {}
+        conn.executemany(
+            "UPDATE cache_entries SET last_accessed = MAX(last_accessed, ?), hit_count = hit_count + ? "
+            "WHERE namespace = ? AND key = ?",
+            [(accessed, count, self.namespace, key) for key, (accessed, count) in touches.items()]
+        )
+        conn.commit()
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset(self, key: str, value: Any, meta: Optional[dict] = None) -> None:
+        await asyncio.to_thread(self.set, key, value, meta)
+
+    async def adelete(self, key: str) -> bool:
+        return await asyncio.to_thread(self.delete, key)
+
+    async def aclear(self) -> int:
+        return await asyncio.to_thread(self.clear)
+
+    async def aentries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.entries, limit)
+
+    async def astats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.stats)
+
+    def set(self, key: str, value: Any, meta: Optional[dict] = None) -> None:
+        """Store a value; every EVICT_EVERY_SETS writes, evict expired and least recently used entries"""
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            meta_payload = json.dumps(meta, ensure_ascii=False) if meta is not None else None
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries "
+                    "(namespace, key, value, meta, created_at, last_accessed, hit_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (self.namespace, key, payload, meta_payload, now, now)
+                )
+                self._sets_since_evict += 1
+                if self._sets_since_evict >= EVICT_EVERY_SETS:
+                    self._sets_since_evict = 0
+                    # LRU order needs the buffered access times
+                    self._flush_touches(conn)
+                    self._evict(conn, now)
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Cache write failed ({self.namespace}): {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds is not None:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl_seconds)
+            )
+        if self.max_entries is not None:
+            conn.execute(
+                """DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.namespace, self.namespace, self.max_entries)
+            )
+
+    def delete(self, key: str) -> bool:
+        """Delete one entry. Returns True if it existed."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                cursor = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+                conn.commit()
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.warning(f"Cache delete failed ({self.namespace}): {e}")
+            return False
+
+    def clear(self) -> int:
+        """Delete every entry in this namespace. Returns the number removed."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                cursor = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                )
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Cache clear failed ({self.namespace}): {e}")
+            return 0
+
+    def entries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """List the most recently used entries (metadata only, not values)"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                self._flush_touches(conn)
+                rows = conn.execute(
+                    "SELECT key, meta, created_at, last_accessed, hit_count FROM cache_entries "
+                    "WHERE namespace = ? ORDER BY last_accessed DESC LIMIT ?",
+                    (self.namespace, limit)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache listing failed ({self.namespace}): {e}")
+            return []
+        return [
+            {
+                "key": key,
+                "meta": json.loads(meta) if meta else None,
+                "created_at": created_at,
+                "last_accessed": last_accessed,
+                "hit_count": hit_count,
+            }
+            for key, meta, created_at, last_accessed, hit_count in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count for the namespace plus this process's hit/miss counters"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                (count,) = conn.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache stats failed ({self.namespace}): {e}")
+            count = None
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "entries": count,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,170 @@
+"""
+Structured Output - JSON schemas for LLM responses and tolerant parsing
+
+A ResponseSchema is built from a pydantic model and turned into what each
+provider needs to constrain its output to that model:
+
+- Azure OpenAI: response_format {"type": "json_schema", ...}. Strict mode
+  needs every property listed as required and no additional properties, so
+  Optional fields become "type or null". Models with free-form objects
+  (Dict fields) cannot be strict and are sent non-strict.
+- Gemini: generation_config response_schema (an OpenAPI subset: nullable
+  instead of null unions, no additionalProperties). Models with free-form
+  objects only get the JSON mime type.
+
+parse_json_response() is the one place responses are turned into data. It
+accepts code fences and text around the JSON, and repairs a truncated
+response (see partial_json.py) instead of failing, so fields that arrived
+complete are not thrown away and no second LLM call is needed. With a model
+the result is validated, so callers get typed values or a
+StructuredOutputError (a ValueError).
+
+Usage:
+    from structured_output import parse_json_response, response_schema
+
+    schema = response_schema(AnalysisResult)
+    response = await call_llm(messages, use_json_format=True, response_schema=schema)
+    result = parse_json_response(response["choices"][0]["message"]["content"], AnalysisResult)
+"""
+import copy
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from partial_json import parse_partial_json
+
+logger = logging.getLogger(__name__)
+
+_CODE_FENCE = re.compile(r"```(?:json)?\s*")
+
+# How responses were parsed, for /api/metrics/llm
+parse_counters = {"parsed": 0, "repaired": 0, "failed": 0}
+
+
+class StructuredOutputError(ValueError):
+    """An LLM response that could not be parsed into the expected shape."""
+
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(defs[node["$ref"].split("/")[-1]], defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+def _has_free_form_object(node: Any) -> bool:
+    if isinstance(node, dict):
+        if node.get("type") == "object" and "properties" not in node:
+            return True
+        return any(_has_free_form_object(v) for v in node.values())
+    if isinstance(node, list):
+        return any(_has_free_form_object(v) for v in node)
+    return False
+
+
+def _strict(node: Any) -> Any:
+    """OpenAI strict schema: all properties required, nothing else allowed"""
+    if isinstance(node, list):
+        return [_strict(v) for v in node]
+    if not isinstance(node, dict):
+        return node
+    node = {k: _strict(v) for k, v in node.items() if k not in ("title", "default")}
+    if node.get("type") == "object" and "properties" in node:
+        node["required"] = list(node["properties"])
+        node["additionalProperties"] = False
+    return node
+
+
+def _gemini(node: Any) -> Any:
+    """Gemini response_schema: OpenAPI types, nullable instead of null unions"""
+    if isinstance(node, list):
+        return [_gemini(v) for v in node]
+    if not isinstance(node, dict):
+        return node
+    variants = node.get("anyOf")
+    if variants:
+        non_null = [v for v in variants if v.get("type") != "null"]
+        if len(non_null) == 1:
+            converted = _gemini(non_null[0])
+            if len(non_null) < len(variants):
+                converted["nullable"] = True
+            return converted
+    converted = {}
+    for key, value in node.items():
+        if key in ("title", "default", "additionalProperties", "anyOf"):
+            continue
+        if key == "type":
+            converted[key] = value.upper()
+        else:
+            converted[key] = _gemini(value)
+    return converted
+
+
+class ResponseSchema:
+    """JSON schema of a pydantic model, in the form each provider expects"""
+
+    def __init__(self, model: Type[BaseModel], name: Optional[str] = None):
+        self.model = model
+        self.name = name or model.__name__
+        schema = model.model_json_schema()
+        defs = schema.pop("$defs", {})
+        self.json_schema = _inline_refs(schema, defs)
+        self.strict = not _has_free_form_object(self.json_schema)
+
+    def azure_response_format(self) -> Dict[str, Any]:
+        schema = _strict(self.json_schema) if self.strict else copy.deepcopy(self.json_schema)
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": self.name, "schema": schema, "strict": self.strict}
+        }
+
+    def gemini_schema(self) -> Optional[Dict[str, Any]]:
+        if not self.strict:
+            return None
+        return _gemini(self.json_schema)
+
+
+@lru_cache(maxsize=None)
+def response_schema(model: Type[BaseModel]) -> ResponseSchema:
+    """ResponseSchema for a model, built once"""
+    return ResponseSchema(model)
+
+
+def parse_json_response(content: str, model: Optional[Type[BaseModel]] = None) -> Any:
+    """
+    Parse an LLM JSON response, tolerating code fences, surrounding text and
+    truncation. Returns a model instance when a model is given, else the data.
+    """
+    text = _CODE_FENCE.sub("", content or "").strip()
+    repaired = False
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # parse_partial_json skips leading text, stops at the end of the
+        # value and closes off whatever was cut short
+        data = parse_partial_json(text)
+        if data is None:
+            parse_counters["failed"] += 1
+            raise StructuredOutputError(f"No JSON in LLM response: {text[:80]!r}")
+        repaired = True
+
+    if model is not None:
+        try:
+            data = model.model_validate(data)
+        except ValidationError as e:
+            parse_counters["failed"] += 1
+            raise StructuredOutputError(f"LLM response does not match {model.__name__}: {e}") from e
+
+    if repaired:
+        parse_counters["repaired"] += 1
+        logger.warning(f"Repaired malformed or truncated LLM response ({len(text)} chars)")
+    else:
+        parse_counters["parsed"] += 1
+    return data
@@ -0,0 +1,255 @@
+"""
+Telemetry - Token, cost and latency accounting for LLM calls
+
+Every LLMService call is recorded against the HTTP endpoint it was made for
+(set per request by a middleware in main.py) and its stage, the caller name
+passed to call()/call_stream() (analysis, persona, nl_parse, evaluation,
+evaluation_review, ...). Each (endpoint, stage, model route) series keeps
+counters and fixed-bucket histograms in process memory; nothing is exported
+elsewhere. Per-stage totals are also reported per model route (see
+model_routing.py), so two routes can be compared stage by stage.
+
+Token counts come from the provider's usage block. When it is missing
+(streamed responses, some Gemini responses) both counts are estimated
+locally and the call is counted under usage_estimated.
+
+Prompt tokens the provider served from its prefix cache (usage
+prompt_tokens_details.cached_tokens) are counted separately as
+cached_prompt_tokens; they are included in prompt_tokens.
+
+Cost is only reported for models with a configured price (USD per 1K tokens).
+Cached prompt tokens use the optional "cached_prompt" price, else "prompt":
+    LLM_PRICING='{"azure_openai:gpt-4o": {"prompt": 0.0025, "cached_prompt": 0.00125, "completion": 0.01}}'
+
+Usage:
+    from telemetry import current_endpoint, get_llm_telemetry
+
+    current_endpoint.set("/api/search/evaluate")
+    get_llm_telemetry().record("evaluation", latency_ms=812.0, prompt_tokens=900, completion_tokens=150)
+"""
+import json
+import logging
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# HTTP endpoint the current request is serving; None outside requests (scripts, startup)
+current_endpoint: ContextVar[Optional[str]] = ContextVar("llm_current_endpoint", default=None)
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 15000, 30000, 60000, 120000)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+class Histogram:
+    """Fixed upper-bound buckets plus count/sum/min/max; percentiles are bucket estimates."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the p-th percentile (the max for +Inf)"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return float(self.bounds[i]) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": [
+                {"le": bound, "count": count}
+                for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts)
+            ],
+        }
+
+
+class SeriesStats:
+    """Counters and histograms for one (endpoint, stage, route)."""
+
+    def __init__(self, endpoint: str, stage: str, route: str):
+        self.endpoint = endpoint
+        self.stage = stage
+        self.route = route
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.usage_estimated = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.models: Dict[str, int] = {}
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.prompt_tokens_hist = Histogram(TOKEN_BUCKETS)
+        self.completion_tokens_hist = Histogram(TOKEN_BUCKETS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "stage": self.stage,
+            "route": self.route,
+            "calls": self.calls,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "retries": self.retries,
+            "usage_estimated": self.usage_estimated,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "prompt_cache_hit_rate": round(self.cached_prompt_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "models": dict(self.models),
+            "latency_ms": self.latency_ms.to_dict(),
+            "prompt_tokens_per_call": self.prompt_tokens_hist.to_dict(),
+            "completion_tokens_per_call": self.completion_tokens_hist.to_dict(),
+        }
+
+
+class LLMTelemetry:
+    """Process-wide LLM call statistics keyed by (endpoint, stage, route)."""
+
+    def __init__(self, pricing: Optional[Dict[str, Dict[str, float]]] = None):
+        self.pricing = pricing or {}
+        self._series: Dict[Tuple[str, str, str], SeriesStats] = {}
+
+    def _get_series(self, stage: Optional[str], route: Optional[str]) -> SeriesStats:
+        key = (current_endpoint.get() or "unknown", stage or "unknown", route or "default")
+        series = self._series.get(key)
+        if series is None:
+            series = SeriesStats(*key)
+            self._series[key] = series
+        return series
+
+    def record(
+        self,
+        stage: Optional[str],
+        latency_ms: float,
+        model: Optional[str] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_prompt_tokens: int = 0,
+        usage_estimated: bool = False,
+        retries: int = 0,
+        cache_hit: bool = False,
+        error: bool = False,
+        route: Optional[str] = None
+    ) -> None:
+        """Record one finished call (cache hits and errors included)"""
+        series = self._get_series(stage, route)
+        series.calls += 1
+        series.latency_ms.observe(latency_ms)
+        series.retries += retries
+        if error:
+            series.errors += 1
+            return
+        if cache_hit:
+            # Served locally: no tokens spent
+            series.cache_hits += 1
+            return
+        if model:
+            series.models[model] = series.models.get(model, 0) + 1
+        if usage_estimated:
+            series.usage_estimated += 1
+        series.prompt_tokens += prompt_tokens
+        series.cached_prompt_tokens += cached_prompt_tokens
+        series.completion_tokens += completion_tokens
+        series.prompt_tokens_hist.observe(prompt_tokens)
+        series.completion_tokens_hist.observe(completion_tokens)
+        price = self.pricing.get(model or "")
+        if price:
+            prompt_price = float(price.get("prompt", 0))
+            cached_price = float(price.get("cached_prompt", prompt_price))
+            series.cost_usd += (
+                (prompt_tokens - cached_prompt_tokens) * prompt_price
+                + cached_prompt_tokens * cached_price
+                + completion_tokens * float(price.get("completion", 0))
+            ) / 1000
+
+    @staticmethod
+    def _add_to_totals(totals: Dict[str, Dict[str, Any]], s: SeriesStats) -> None:
+        total = totals.setdefault(s.stage, {
+            "calls": 0, "errors": 0, "cache_hits": 0, "retries": 0, "prompt_tokens": 0,
+            "cached_prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency_ms_sum": 0.0,
+            "latency_ms_mean": 0.0, "models": {}
+        })
+        total["calls"] += s.calls
+        total["errors"] += s.errors
+        total["cache_hits"] += s.cache_hits
+        total["retries"] += s.retries
+        total["prompt_tokens"] += s.prompt_tokens
+        total["cached_prompt_tokens"] += s.cached_prompt_tokens
+        total["completion_tokens"] += s.completion_tokens
+        total["cost_usd"] = round(total["cost_usd"] + s.cost_usd, 6)
+        total["latency_ms_sum"] = round(total["latency_ms_sum"] + s.latency_ms.total, 3)
+        total["latency_ms_mean"] = round(total["latency_ms_sum"] / total["calls"], 2) if total["calls"] else 0.0
+        for model, calls in s.models.items():
+            total["models"][model] = total["models"].get(model, 0) + calls
+
+    def stats(self) -> Dict[str, Any]:
+        """Every series plus per-stage totals, overall and per model route"""
+        series = [s.to_dict() for s in self._series.values()]
+        totals: Dict[str, Dict[str, Any]] = {}
+        by_route: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for s in self._series.values():
+            self._add_to_totals(totals, s)
+            self._add_to_totals(by_route.setdefault(s.route, {}), s)
+        return {
+            "priced_models": sorted(self.pricing),
+            "by_stage": totals,
+            "by_route": by_route,
+            "series": series,
+        }
+
+    def reset(self) -> None:
+        self._series.clear()
+
+
+_telemetry: Optional[LLMTelemetry] = None
+
+
+def get_llm_telemetry() -> LLMTelemetry:
+    """Return the process-wide telemetry, reading LLM_PRICING on first use"""
+    global _telemetry
+    if _telemetry is None:
+        from llm_service import get_setting
+
+        pricing = {}
+        raw = get_setting("LLM_PRICING", "")
+        if raw:
+            try:
+                pricing = {k: dict(v) for k, v in json.loads(raw).items()}
+            except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+                logger.warning(f"Invalid LLM_PRICING, ignoring: {e}")
+        _telemetry = LLMTelemetry(pricing)
+    return _telemetry
+
+
+def get_llm_telemetry_stats() -> Dict[str, Any]:
+    return get_llm_telemetry().stats()
@@ -0,0 +1,5 @@
+"""Make the backend modules importable as in main.py (flat, from backend/)"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,385 @@
+"""
+Reference for test_filter_engine.py: the per-employee loop that
+natural_language_search ran before filter_engine.py, copied unchanged from
+main.py (only indented into a function)
+"""
+import re
+from datetime import datetime
+
+
+def calculate_years_of_experience(entered_at: str) -> float:
+    """Calculate years of experience from entered_at date string"""
+    if not entered_at:
+        return 0.0
+    try:
+        entered_date = datetime.strptime(entered_at, '%Y-%m-%d')
+        current_date = datetime.now()
+        delta = current_date - entered_date
+        years = delta.days / 365.25
+        return round(years, 2)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def legacy_filter(employees: list, filters: dict) -> list:
+    filtered_employees = []
+
+    for emp in employees:
+        match = True
+
+        # Check employee_id
+        if filters.get("employee_id"):
+            filter_id = filters.get("employee_id")
+            if isinstance(filter_id, list):
+                if emp.get("employee_id") not in filter_id:
+                    match = False
+            else:
+                if emp.get("employee_id") != filter_id:
+                    match = False
+
+        # Check employee_name (partial match)
+        if match and filters.get("employee_name"):
+            filter_name = filters.get("employee_name")
+            emp_name = emp.get("employee_name", "")
+            if isinstance(filter_name, list):
+                if not any(fn.lower() in emp_name.lower() or emp_name.lower() in fn.lower() for fn in filter_name):
+                    match = False
+            else:
+                if filter_name.lower() not in emp_name.lower() and emp_name.lower() not in filter_name.lower():
+                    match = False
+
+        # Check mail (partial match)
+        if match and filters.get("mail"):
+            filter_mail = filters.get("mail")
+            emp_mail = emp.get("mail", "")
+            if isinstance(filter_mail, list):
+                if not any(fm.lower() in emp_mail.lower() for fm in filter_mail):
+                    match = False
+            else:
+                if filter_mail.lower() not in emp_mail.lower():
+                    match = False
+
+        # Check nickname
+        if match and filters.get("nickname"):
+            filter_nickname = filters.get("nickname")
+            emp_nickname = emp.get("nickname", "")
+            if isinstance(filter_nickname, list):
+                if emp_nickname not in filter_nickname:
+                    match = False
+            else:
+                if emp_nickname != filter_nickname:
+                    match = False
+
+        # Check employment_type
+        if match and filters.get("employment_type"):
+            filter_emp_type = filters.get("employment_type")
+            emp_emp_type = emp.get("employment_type", "")
+            if isinstance(filter_emp_type, list):
+                if emp_emp_type not in filter_emp_type:
+                    match = False
+            else:
+                if emp_emp_type != filter_emp_type:
+                    match = False
+
+        # Check current_employee_flag
+        if match and filters.get("current_employee_flag"):
+            if emp.get("current_employee_flag") != filters.get("current_employee_flag"):
+                match = False
+
+        # Check entered_at (date range)
+        if match and (filters.get("entered_at_min") or filters.get("entered_at_max")):
+            entered_at = emp.get("entered_at")
+            if entered_at:
+                try:
+                    entered_date = datetime.strptime(entered_at, "%Y-%m-%d").date()
+                    if filters.get("entered_at_min"):
+                        min_date = datetime.strptime(filters.get("entered_at_min"), "%Y-%m-%d").date()
+                        if entered_date < min_date:
+                            match = False
+                    if match and filters.get("entered_at_max"):
+                        max_date = datetime.strptime(filters.get("entered_at_max"), "%Y-%m-%d").date()
+                        if entered_date > max_date:
+                            match = False
+                except (ValueError, TypeError):
+                    pass
+
+        # Check last_day_at
+        if match and filters.get("last_day_at"):
+            filter_date = filters.get("last_day_at")
+            emp_date = emp.get("last_day_at")
+            if emp_date != filter_date:
+                match = False
+
+        # Check retired_at
+        if match and filters.get("retired_at"):
+            filter_date = filters.get("retired_at")
+            emp_date = emp.get("retired_at")
+            if emp_date != filter_date:
+                match = False
+
+        # Check fulltime_employee_hired_at
+        if match and filters.get("fulltime_employee_hired_at"):
+            filter_date = filters.get("fulltime_employee_hired_at")
+            emp_date = emp.get("fulltime_employee_hired_at")
+            if emp_date != filter_date:
+                match = False
+
+        # Check fulltime_employee_retired_at
+        if match and filters.get("fulltime_employee_retired_at"):
+            filter_date = filters.get("fulltime_employee_retired_at")
+            emp_date = emp.get("fulltime_employee_retired_at")
+            if emp_date != filter_date:
+                match = False
+
+        # Check employment_category
+        if match and filters.get("employment_category"):
+            filter_cat = filters.get("employment_category")
+            emp_cat = emp.get("employment_category", "")
+            if isinstance(filter_cat, list):
+                if emp_cat not in filter_cat:
+                    match = False
+            else:
+                if emp_cat != filter_cat:
+                    match = False
+
+        # Check recruitment_category_new_graduate
+        if match and filters.get("recruitment_category_new_graduate"):
+            filter_cat = filters.get("recruitment_category_new_graduate")
+            emp_cat = emp.get("recruitment_category_new_graduate", "")
+            if isinstance(filter_cat, list):
+                if emp_cat not in filter_cat:
+                    match = False
+            else:
+                if emp_cat != filter_cat:
+                    match = False
+
+        # Check gender
+        if match and filters.get("gender"):
+            if emp.get("gender", "") != filters.get("gender"):
+                match = False
+
+        # Check birthday (date range)
+        if match and (filters.get("birthday_min") or filters.get("birthday_max")):
+            birthday = emp.get("birthday")
+            if birthday:
+                try:
+                    birth_date = datetime.strptime(birthday, "%Y-%m-%d").date()
+                    if filters.get("birthday_min"):
+                        min_date = datetime.strptime(filters.get("birthday_min"), "%Y-%m-%d").date()
+                        if birth_date < min_date:
+                            match = False
+                    if match and filters.get("birthday_max"):
+                        max_date = datetime.strptime(filters.get("birthday_max"), "%Y-%m-%d").date()
+                        if birth_date > max_date:
+                            match = False
+                except (ValueError, TypeError):
+                    pass
+
+        # Check age (numeric range)
+        if match and (filters.get("age_min") is not None or filters.get("age_max") is not None):
+            emp_age = emp.get("age")
+            if emp_age is not None:
+                if filters.get("age_min") is not None:
+                    if emp_age < filters.get("age_min"):
+                        match = False
+                if match and filters.get("age_max") is not None:
+                    if emp_age > filters.get("age_max"):
+                        match = False
+            elif filters.get("age_min") is not None or filters.get("age_max") is not None:
+                # If age filter is set but employee age is null, exclude
+                match = False
+
+        # Check years_of_service (numeric range)
+        if match and (filters.get("years_of_service_min") is not None or filters.get("years_of_service_max") is not None):
+            years_str = emp.get("years_of_service", "")
+            entered_at = emp.get("entered_at")
+            years = 0.0
+
+            if entered_at:
+                years = calculate_years_of_experience(entered_at)
+            elif years_str:
+                # Parse string like "1年3ヵ月" or "1 year 3 months"
+                match_years = re.search(r'(\d+)年', years_str)
+                if match_years:
+                    years = float(match_years.group(1))
+
+            if filters.get("years_of_service_min") is not None:
+                if years < filters.get("years_of_service_min"):
+                    match = False
+
+            if match and filters.get("years_of_service_max") is not None:
+                if years > filters.get("years_of_service_max"):
+                    match = False
+
+        # Check dept_1
+        if match and filters.get("dept_1"):
+            filter_dept = filters.get("dept_1")
+            emp_dept = emp.get("dept_1", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check dept_2
+        if match and filters.get("dept_2"):
+            filter_dept = filters.get("dept_2")
+            emp_dept = emp.get("dept_2", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check dept_3
+        if match and filters.get("dept_3"):
+            filter_dept = filters.get("dept_3")
+            emp_dept = emp.get("dept_3", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    # Allow flexible matching for AI/data-related departments
+                    dept_lower = emp_dept.lower()
+                    is_related = False
+                    for fd in filter_dept:
+                        fd_lower = fd.lower()
+                        ai_keywords = ["ai", "機械学習", "データ", "ml", "データサイエンス", "ai推進", "aiアクセラレーション"]
+                        if any(keyword in dept_lower or keyword in fd_lower for keyword in ai_keywords):
+                            is_related = True
+                            break
+                    if not is_related:
+                        match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check dept_4
+        if match and filters.get("dept_4"):
+            filter_dept = filters.get("dept_4")
+            emp_dept = emp.get("dept_4", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check dept_5
+        if match and filters.get("dept_5"):
+            filter_dept = filters.get("dept_5")
+            emp_dept = emp.get("dept_5", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check dept_6
+        if match and filters.get("dept_6"):
+            filter_dept = filters.get("dept_6")
+            emp_dept = emp.get("dept_6", "")
+            if isinstance(filter_dept, list):
+                if emp_dept not in filter_dept:
+                    match = False
+            else:
+                if filter_dept.lower() not in emp_dept.lower() and emp_dept.lower() not in filter_dept.lower():
+                    match = False
+
+        # Check location
+        if match and filters.get("location"):
+            filter_location = filters.get("location")
+            emp_location = emp.get("location", "")
+            if isinstance(filter_location, list):
+                if not any(fl.lower() in emp_location.lower() or emp_location.lower() in fl.lower() for fl in filter_location):
+                    match = False
+            else:
+                if filter_location.lower() not in emp_location.lower() and emp_location.lower() not in filter_location.lower():
+                    match = False
+
+        # Check job_title
+        if match and filters.get("job_title"):
+            filter_title = filters.get("job_title")
+            emp_title = emp.get("job_title", "")
+            if isinstance(filter_title, list):
+                if emp_title not in filter_title:
+                    # Allow similar roles
+                    is_similar = False
+                    engineer_keywords = ["エンジニア", "engineer"]
+                    emp_title_lower = emp_title.lower()
+                    for ft in filter_title:
+                        ft_lower = ft.lower()
+                        if any(kw in emp_title_lower and kw in ft_lower for kw in engineer_keywords):
+                            is_similar = True
+                            break
+                    if not is_similar:
+                        match = False
+            else:
+                if filter_title.lower() not in emp_title.lower() and emp_title.lower() not in filter_title.lower():
+                    match = False
+
+        # Check job_family
+        if match and filters.get("job_family"):
+            if emp.get("job_family", "") != filters.get("job_family"):
+                match = False
+
+        # Check latest_job_grade
+        if match and filters.get("latest_job_grade"):
+            filter_grade = filters.get("latest_job_grade")
+            emp_grade = emp.get("latest_job_grade", "")
+            if isinstance(filter_grade, list):
+                if emp_grade not in filter_grade:
+                    match = False
+            else:
+                if emp_grade != filter_grade:
+                    match = False
+
+        # Check latest_org_grade
+        if match and filters.get("latest_org_grade"):
+            filter_grade = filters.get("latest_org_grade")
+            emp_grade = emp.get("latest_org_grade", "")
+            if isinstance(filter_grade, list):
+                if emp_grade not in filter_grade:
+                    match = False
+            else:
+                if emp_grade != filter_grade:
+                    match = False
+
+        # Check grade_combined
+        if match and filters.get("grade_combined"):
+            filter_grade = filters.get("grade_combined")
+            emp_grade = emp.get("grade_combined", "")
+            if isinstance(filter_grade, list):
+                if emp_grade not in filter_grade:
+                    match = False
+            else:
+                if emp_grade != filter_grade:
+                    match = False
+
+        # Check salary_table
+        if match and filters.get("salary_table"):
+            filter_table = filters.get("salary_table")
+            emp_table = emp.get("salary_table", "")
+            if isinstance(filter_table, list):
+                if emp_table not in filter_table:
+                    match = False
+            else:
+                if emp_table != filter_table:
+                    match = False
+
+        # Check jp_non_jp_classification
+        if match and filters.get("jp_non_jp_classification"):
+            filter_class = filters.get("jp_non_jp_classification")
+            emp_class = emp.get("jp_non_jp_classification", "")
+            if isinstance(filter_class, list):
+                if emp_class not in filter_class:
+                    match = False
+            else:
+                if filter_class.lower() not in emp_class.lower() and emp_class.lower() not in filter_class.lower():
+                    match = False
+
+        if match:
+            filtered_employees.append(emp)
+
+    return filtered_employees
@@ -0,0 +1,206 @@
+import random
+from datetime import date
+
+import pytest
+
+from filter_engine import FILTER_SPECS, MatchKind, apply_filters, iter_matching_rows
+from legacy_filter_loop import legacy_filter
+
+# Field values for generated employees; a filter value is drawn from the same
+# pool (sometimes with a different case, or as a fragment) so that matches happen
+VALUES = {
+    "employee_id": ["1001", "1002", "1003", "2001", "9999"],
+    "employee_name": ["得上 竜一", "山田 花子", "Taro Suzuki", "SUZUKI Jiro"],
+    "mail": ["tokugami.ryuichi@example.com", "yamada@example.com", "Suzuki@Example.com"],
+    "nickname": ["りゅう", "hana", "taro"],
+    "employment_type": ["正社員", "業務委託", "契約社員"],
+    "current_employee_flag": ["●", "-"],
+    "last_day_at": ["2024-03-31", "2025-01-31"],
+    "retired_at": ["2024-03-31", "2025-01-31"],
+    "fulltime_employee_hired_at": ["2020-04-01", "2022-10-01"],
+    "fulltime_employee_retired_at": ["2024-03-31"],
+    "employment_category": ["総合職", "専門職"],
+    "recruitment_category_new_graduate": ["新卒", "中途"],
+    "gender": ["男", "女"],
+    "dept_1": ["株式会社マネーフォワード", "MF Cloud"],
+    "dept_2": ["-", "CTO室", "Business"],
+    "dept_3": ["AI推進室", "データ戦略室", "経理本部", "Sales", "ML Platform"],
+    "dept_4": ["AIアクセラレーション部", "経理部", "Platform"],
+    "dept_5": ["-", "基盤グループ"],
+    "dept_6": ["-", "チームA"],
+    "location": ["本社", "大阪", "Fukuoka", "本社 (田町)"],
+    "job_title": ["シニアエンジニア", "エンジニア", "Software Engineer", "経理", "マネージャー"],
+    "job_family": ["エンジニア", "コーポレート", "ビジネス"],
+    "latest_job_grade": ["G3", "G4", "G5"],
+    "latest_org_grade": ["M1", "M2"],
+    "grade_combined": ["G3/M1", "G4/M2"],
+    "salary_table": ["A", "B"],
+    "jp_non_jp_classification": ["JP", "Non-JP", "-"],
+}
+DATES = ["1980-01-15", "1990-06-30", "1999-10-23", "2015-04-01", "2019-12-31", "2020-01-01",
+         "2022-07-15", "2024-02-15", "not-a-date"]
+YEARS_TEXT = ["1年3ヵ月", "5年", "10年2ヵ月", "3 years", ""]
+
+
+def _employee(rng: random.Random, index: int) -> dict:
+    emp = {}
+    for name, pool in VALUES.items():
+        roll = rng.random()
+        if roll < 0.08:
+            continue  # missing key
+        if roll < 0.14:
+            emp[name] = ""
+        else:
+            emp[name] = rng.choice(pool)
+    emp["employee_id"] = str(1000 + index) if rng.random() < 0.5 else emp.get("employee_id", "0")
+    emp["entered_at"] = rng.choice(DATES + [None])
+    emp["birthday"] = rng.choice(DATES + [None])
+    emp["age"] = rng.choice([None, 22, 26, 30, 31, 45, 60])
+    emp["years_of_service"] = rng.choice(YEARS_TEXT + [None])
+    return emp
+
+
+def _filter_value(rng: random.Random, pool: list, allow_list: bool = True):
+    def one():
+        value = rng.choice(pool)
+        roll = rng.random()
+        if roll < 0.2:
+            return value.upper()
+        if roll < 0.35 and len(value) > 2:
+            return value[:len(value) // 2]
+        return value
+    if rng.random() < 0.4 and allow_list:
+        return [one() for _ in range(rng.randint(1, 3))]
+    return one()
+
+
+VALID_DATES = [d for d in DATES if d != "not-a-date"]
+
+# The old loop compared these with == only, so a list matched nobody; the
+# engine treats a list as "any of" (compared separately below)
+SCALAR_ONLY = {
+    "current_employee_flag", "last_day_at", "retired_at", "fulltime_employee_hired_at",
+    "fulltime_employee_retired_at", "gender", "job_family",
+}
+
+
+def _filters(rng: random.Random) -> dict:
+    filters = {}
+    for _ in range(rng.randint(1, 4)):
+        spec = rng.choice(FILTER_SPECS)
+        if spec.kind == MatchKind.DATE_RANGE:
+            if rng.random() < 0.7:
+                filters[f"{spec.name}_min"] = rng.choice(VALID_DATES)
+            if rng.random() < 0.7:
+                # A bad max next to a valid min: the min still applies (the old loop parsed min first)
+                filters[f"{spec.name}_max"] = rng.choice(VALID_DATES + ["2023/01/01", "garbage"])
+        elif spec.kind == MatchKind.NUMBER_RANGE:
+            if rng.random() < 0.7:
+                filters[f"{spec.name}_min"] = rng.choice([0, 1, 3, 25, 30.5])
+            if rng.random() < 0.7:
+                filters[f"{spec.name}_max"] = rng.choice([2, 5, 10, 30, 45])
+        else:
+            filters[spec.name] = _filter_value(rng, VALUES[spec.name], spec.name not in SCALAR_ONLY)
+    return filters
+
+
+@pytest.fixture(scope="module")
+def employees():
+    rng = random.Random(1234)
+    return [_employee(rng, i) for i in range(300)]
+
+
+def test_matches_the_legacy_loop(employees):
+    rng = random.Random(42)
+    nonempty = 0
+    for _ in range(2000):
+        filters = _filters(rng)
+        expected = legacy_filter(employees, filters)
+        assert apply_filters(employees, filters) == expected, filters
+        nonempty += bool(expected)
+    # The generated filters exercise matches, not only empty results
+    assert nonempty > 500
+
+
+@pytest.mark.parametrize("name", VALUES)
+def test_each_field_matches_the_legacy_loop(employees, name):
+    rng = random.Random(name)
+    for _ in range(100):
+        filters = {name: _filter_value(rng, VALUES[name], name not in SCALAR_ONLY)}
+        assert apply_filters(employees, filters) == legacy_filter(employees, filters), filters
+
+
+@pytest.mark.parametrize("name", sorted(SCALAR_ONLY))
+def test_scalar_only_fields_accept_a_list(employees, name):
+    values = VALUES[name][:2]
+    expected = [emp for emp in employees if emp.get(name) in values]
+    assert expected
+    assert apply_filters(employees, {name: values}) == expected
+
+
+def test_empty_and_null_filters_match_everyone(employees):
+    for filters in [None, {}, {"dept_3": None, "age_min": None, "entered_at_min": ""}, {"unknown": "x"}]:
+        assert apply_filters(employees, filters) == employees
+
+
+def _join_dates(matches):
+    return sorted(emp["entered_at"] for emp in matches)
+
+
+JOINED = [{"entered_at": d} for d in ["2019-05-01", "2021-05-01", "2023-05-01"]] + [{"entered_at": None}]
+
+
+def test_bad_max_keeps_the_min():
+    filters = {"entered_at_min": "2020-01-01", "entered_at_max": "garbage"}
+    assert apply_filters(JOINED, filters) == legacy_filter(JOINED, filters)
+    assert [emp["entered_at"] for emp in apply_filters(JOINED, filters)] == ["2021-05-01", "2023-05-01", None]
+
+
+def test_bad_min_keeps_the_max():
+    # The old loop gave up on the whole range here; each valid bound now applies
+    filters = {"entered_at_min": "bad", "entered_at_max": "2022-01-01"}
+    assert [emp["entered_at"] for emp in apply_filters(JOINED, filters)] == ["2019-05-01", "2021-05-01", None]
+
+
+def test_two_bad_bounds_filter_nothing():
+    filters = {"entered_at_min": "bad", "entered_at_max": 20220101}
+    assert apply_filters(JOINED, filters) == JOINED
+
+
+def test_missing_age_is_excluded_but_missing_join_date_is_kept():
+    people = [{"age": 30, "entered_at": "2020-01-01"}, {"age": None, "entered_at": None}]
+    assert apply_filters(people, {"age_min": 20}) == people[:1]
+    assert apply_filters(people, {"entered_at_min": "2019-01-01"}) == people
+
+
+def test_years_of_service_prefers_the_join_date():
+    today = date.today()
+    recent = f"{today.year - 2}-{today.month:02d}-01"
+    people = [
+        {"entered_at": recent, "years_of_service": "10年"},
+        {"entered_at": None, "years_of_service": "10年"},
+        {"entered_at": None, "years_of_service": None},
+        {"entered_at": "2019/04/01", "years_of_service": "10年"},
+    ]
+    assert apply_filters(people, {"years_of_service_min": 5}) == people[1:2]
+    # An unparseable join date counts as 0 years; the text is only used without one
+    assert apply_filters(people, {"years_of_service_max": 3}) == [people[0], people[2], people[3]]
+
+
+def test_related_keywords():
+    people = [{"dept_3": "データ戦略室", "job_title": "Software Engineer"},
+              {"dept_3": "経理本部", "job_title": "経理"}]
+    # A keyword in the filter itself accepts every department
+    assert apply_filters(people, {"dept_3": ["AI推進室"]}) == people
+    assert apply_filters(people, {"dept_3": ["経理部"]}) == people[:1]
+    # Job titles need the keyword on both sides
+    assert apply_filters(people, {"job_title": ["シニアエンジニア"]}) == []
+    assert apply_filters(people, {"job_title": ["Backend Engineer"]}) == people[:1]
+
+
+def test_batches_cover_the_same_rows_in_order(employees):
+    filters = {"dept_3": ["AI推進室", "Sales"], "age_max": 45}
+    whole = [i for rows in iter_matching_rows(filters, employees) for i in rows]
+    batches = list(iter_matching_rows(filters, employees, batch_size=7))
+    assert [i for rows in batches for i in rows] == whole
+    assert len(batches) == -(-len(employees) // 7)
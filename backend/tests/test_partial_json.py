@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+import partial_json
+from partial_json import IncrementalJSONParser, parse_partial_json
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": [1, 2]}', {"a": 1, "b": [1, 2]}),
+    ('```json\n{"a": [1, 2]}\n```', {"a": [1, 2]}),
+    ('Sure: {"a": {"b": [1, {"c": "d', {"a": {"b": [1, {"c": "d"}]}}),
+    ('[1, 2, 3', [1, 2]),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+    ("no json here", None),
+    ("", None),
+])
+def test_parse_partial_json(text, expected):
+    assert parse_partial_json(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": 8', {"a": 1}),
+    ('{"a": -1.5e', {}),
+    ('{"a": 1.', {}),
+    ('{"a": tru', {}),
+    ('{"a": nul', {}),
+    ('[10, 2', [10]),
+])
+def test_incomplete_numbers_and_literals_are_dropped(text, expected):
+    assert parse_partial_json(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": "x\\', {"a": "x"}),
+    ('{"a": "x\\"y', {"a": 'x"y'}),
+    ('{"a": "x\\\\', {"a": "x\\"}),
+    ('{"a": "ab\\u', {"a": "ab"}),
+    ('{"a": "ab\\u00e', {"a": "ab"}),
+    ('{"a": "\\u00e9x', {"a": "éx"}),
+    # An escaped backslash followed by plain "u12" is not a cut escape
+    ('{"a": "ab\\\\u12', {"a": "ab\\u12"}),
+    ('{"a": "ab\\\\\\u1', {"a": "ab\\"}),
+])
+def test_truncated_strings_with_dangling_escapes(text, expected):
+    assert parse_partial_json(text) == expected
+
+
+def _document() -> str:
+    return json.dumps({
+        "scores": {"technical_skills": 85, "domain_expertise": 72.5, "overall": 80},
+        "reasoning": "Strong \"backend\" match\nwith café \\ escapes " + "x" * 300,
+        "flags": [True, False, None],
+        "nested": [{"k": i} for i in range(20)]
+    }, ensure_ascii=True)
+
+
+def test_incremental_matches_parse_partial_json_at_every_prefix(monkeypatch):
+    # Parse on every feed so each result can be compared
+    monkeypatch.setattr(partial_json, "MIN_REPARSE_CHARS", 0)
+    monkeypatch.setattr(partial_json, "REPARSE_GROWTH", 0)
+    document = _document()
+    parser = IncrementalJSONParser()
+    for end in range(1, len(document) + 1):
+        assert parser.feed(document[end - 1]) == parse_partial_json(document[:end]), document[:end]
+    assert parser.feed("") == json.loads(document)
+
+
+def test_incremental_final_value_and_text():
+    document = _document()
+    stream = "```json\n" + document + "\n```"
+    parser = IncrementalJSONParser()
+    results = [parser.feed(stream[i:i + 7]) for i in range(0, len(stream), 7)]
+    assert results[-1] == json.loads(document)
+    assert parser.text == stream
+
+
+def test_incremental_ignores_text_after_the_value():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1}') == {"a": 1}
+    assert parser.feed(' and {"b": 2}') == {"a": 1}
+
+
+def test_incremental_reparses_only_after_enough_growth(monkeypatch):
+    calls = []
+    original = partial_json._Scanner.parse
+
+    def counting_parse(self, text):
+        calls.append(len(text))
+        return original(self, text)
+
+    monkeypatch.setattr(partial_json._Scanner, "parse", counting_parse)
+    parser = IncrementalJSONParser()
+    body = '{"reasoning": "' + "x" * 20000
+    for ch in body:
+        parser.feed(ch)
+
+    # Geometric growth: a few dozen parses, not one per character
+    assert len(calls) < 100
+    assert calls[0] >= partial_json.MIN_REPARSE_CHARS
+    for previous, current in zip(calls, calls[1:]):
+        assert current - previous >= previous * partial_json.REPARSE_GROWTH
+    # Total parsed text stays linear in the stream length
+    assert sum(calls) < 10 * len(body)
+
+
+def test_incremental_returns_previous_value_below_threshold():
+    parser = IncrementalJSONParser()
+    first = parser.feed('{"a": 1, "b": "' + "x" * 40)
+    assert first == {"a": 1, "b": "x" * 40}
+    # Too little growth to parse again
+    assert parser.feed("yy") == first
+
+
+def test_incremental_parses_completed_value_immediately():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": "' + "x" * 100)
+    assert parser.feed('"}') == {"a": "x" * 100}
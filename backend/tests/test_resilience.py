@@ -0,0 +1,264 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, RetryStats, call_with_retry, parse_retry_after
+
+
+class FakeError(Exception):
+    def __init__(self, retryable=True, retry_after=None):
+        super().__init__("retryable" if retryable else "client error")
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _failing(*errors, result="ok"):
+    """Async callable raising the given errors in turn, then returning result"""
+    calls = []
+
+    async def func():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    func.calls = calls
+    return func
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    """Let the reset timeout of an open breaker pass"""
+    breaker.opened_at -= breaker.reset_timeout
+
+
+def _open_breaker(threshold=2) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_timeout=30.0)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.0, min_attempt_seconds=0.0)
+
+
+# Circuit breaker transitions
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected_calls == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = _open_breaker()
+    _expire(breaker)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.probe_in_flight
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = _open_breaker()
+    _expire(breaker)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.probe_in_flight
+    # A fresh timeout: still failing fast
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_probe_closes_the_breaker():
+    breaker = _open_breaker()
+    _expire(breaker)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+    breaker.before_call()
+
+
+def test_zero_threshold_disables_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=0)
+    for _ in range(10):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+# call_with_retry
+
+def test_retries_until_success():
+    func = _failing(FakeError(), FakeError())
+    stats = RetryStats("test")
+    assert asyncio.run(call_with_retry(func, FAST, stats=stats)) == "ok"
+    assert len(func.calls) == 3
+    assert (stats.attempts, stats.retries, stats.successes, stats.failures) == (3, 2, 1, 0)
+
+
+def test_gives_up_after_max_attempts():
+    errors = [FakeError() for _ in range(3)]
+    func = _failing(*errors)
+    stats = RetryStats("test")
+    with pytest.raises(FakeError) as raised:
+        asyncio.run(call_with_retry(func, FAST, stats=stats))
+    assert raised.value is errors[-1]
+    assert len(func.calls) == 3
+    assert stats.failures == 1
+
+
+def test_non_retryable_error_is_raised_at_once_and_spares_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    func = _failing(FakeError(retryable=False))
+    with pytest.raises(FakeError):
+        asyncio.run(call_with_retry(func, FAST, breaker=breaker))
+    assert len(func.calls) == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_non_retryable_error_releases_the_probe():
+    breaker = _open_breaker()
+    _expire(breaker)
+    with pytest.raises(FakeError):
+        asyncio.run(call_with_retry(_failing(FakeError(retryable=False)), FAST, breaker=breaker))
+    assert not breaker.probe_in_flight
+    assert asyncio.run(call_with_retry(_failing(), FAST, breaker=breaker)) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_fails_fast_without_calling():
+    breaker = _open_breaker()
+    func = _failing()
+    stats = RetryStats("test")
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call_with_retry(func, FAST, breaker=breaker, stats=stats))
+    assert func.calls == []
+    assert stats.failures == 1
+
+
+def test_retryable_failures_open_the_breaker_mid_retry():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    func = _failing(FakeError(), FakeError(), FakeError())
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call_with_retry(func, FAST, breaker=breaker))
+    assert len(func.calls) == 2
+
+
+def test_cancelled_probe_releases_the_breaker():
+    breaker = _open_breaker()
+    _expire(breaker)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        task = asyncio.create_task(call_with_retry(hang, FAST, breaker=breaker))
+        await started.wait()
+        assert breaker.probe_in_flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert not breaker.probe_in_flight
+    # The next call is let through as the probe and closes the breaker
+    assert asyncio.run(call_with_retry(_failing(), FAST, breaker=breaker)) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancellation_is_not_counted_as_a_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def scenario():
+        task = asyncio.create_task(call_with_retry(lambda: asyncio.sleep(60), FAST, breaker=breaker))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_deadline_stops_retries():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.0, min_attempt_seconds=2.0)
+    func = _failing(FakeError(), FakeError())
+    stats = RetryStats("test")
+    with pytest.raises(FakeError):
+        asyncio.run(call_with_retry(func, policy, deadline=time.monotonic() + 1.0, stats=stats))
+    assert len(func.calls) == 1
+    assert stats.deadline_exhausted == 1
+    assert stats.retries == 0
+
+
+def test_retry_after_counts_against_the_deadline():
+    policy = RetryPolicy(max_attempts=5, base_delay=0.0, min_attempt_seconds=0.0)
+    func = _failing(FakeError(retry_after=10.0))
+    stats = RetryStats("test")
+    with pytest.raises(FakeError):
+        asyncio.run(call_with_retry(func, policy, deadline=time.monotonic() + 5.0, stats=stats))
+    assert len(func.calls) == 1
+    assert stats.retry_after_honoured == 1
+    assert stats.deadline_exhausted == 1
+
+
+def test_retry_after_is_waited_for():
+    func = _failing(FakeError(retry_after=0.05))
+    stats = RetryStats("test")
+    assert asyncio.run(call_with_retry(func, FAST, stats=stats)) == "ok"
+    assert func.calls[1] - func.calls[0] >= 0.05
+    assert stats.retry_after_honoured == 1
+
+
+def test_backoff_stays_within_bounds():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(1, 10):
+        for _ in range(50):
+            assert 0 <= policy.backoff(attempt) <= min(4.0, 0.5 * 2 ** (attempt - 1))
+
+
+@pytest.mark.parametrize("headers, expected", [
+    (None, None),
+    ({}, None),
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after": "-1"}, 0.0),
+    ({"retry-after-ms": "1500", "retry-after": "9"}, 1.5),
+    ({"retry-after-ms": "bad", "retry-after": "2"}, 2.0),
+    ({"retry-after": "not a date"}, None),
+])
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(headers) == expected
+
+
+def test_parse_retry_after_http_date():
+    headers = {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert parse_retry_after(headers) == 0.0
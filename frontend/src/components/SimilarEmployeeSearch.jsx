@@ -239,9 +239,9 @@ const SimilarEmployeeSearch = ({ targetEmployee }) => {
                     <div className="score-bar-container">
                       <div 
                         className={`score-bar ${getScoreColor(result.evaluation.scores.technical_skills)}`}
-                        style={{ width: `${result.evaluation.scores.technical_skills}%` }}
+                        style={{ width: `${result.evaluation.scores.technical_skills ?? 0}%` }}
                       ></div>
-                      <span className="score-number">{result.evaluation.scores.technical_skills}</span>
+                      <span className="score-number">{result.evaluation.scores.technical_skills ?? '-'}</span>
                     </div>
                   </div>
                   <div className="score-item">
@@ -249,9 +249,9 @@ const SimilarEmployeeSearch = ({ targetEmployee }) => {
                     <div className="score-bar-container">
                       <div 
                         className={`score-bar ${getScoreColor(result.evaluation.scores.domain_expertise)}`}
-                        style={{ width: `${result.evaluation.scores.domain_expertise}%` }}
+                        style={{ width: `${result.evaluation.scores.domain_expertise ?? 0}%` }}
                       ></div>
-                      <span className="score-number">{result.evaluation.scores.domain_expertise}</span>
+                      <span className="score-number">{result.evaluation.scores.domain_expertise ?? '-'}</span>
                     </div>
                   </div>
                   <div className="score-item">
@@ -259,9 +259,9 @@ const SimilarEmployeeSearch = ({ targetEmployee }) => {
                     <div className="score-bar-container">
                       <div 
                         className={`score-bar ${getScoreColor(result.evaluation.scores.experience_level)}`}
-                        style={{ width: `${result.evaluation.scores.experience_level}%` }}
+                        style={{ width: `${result.evaluation.scores.experience_level ?? 0}%` }}
                       ></div>
-                      <span className="score-number">{result.evaluation.scores.experience_level}</span>
+                      <span className="score-number">{result.evaluation.scores.experience_level ?? '-'}</span>
                     </div>
                   </div>
                   <div className="score-item">
@@ -269,9 +269,9 @@ const SimilarEmployeeSearch = ({ targetEmployee }) => {
                     <div className="score-bar-container">
                       <div 
                         className={`score-bar ${getScoreColor(result.evaluation.scores.role_alignment)}`}
-                        style={{ width: `${result.evaluation.scores.role_alignment}%` }}
+                        style={{ width: `${result.evaluation.scores.role_alignment ?? 0}%` }}
                       ></div>
-                      <span className="score-number">{result.evaluation.scores.role_alignment}</span>
+                      <span className="score-number">{result.evaluation.scores.role_alignment ?? '-'}</span>
                     </div>
                   </div>
                   <div className="score-item">
@@ -279,9 +279,9 @@ const SimilarEmployeeSearch = ({ targetEmployee }) => {
                     <div className="score-bar-container">
                       <div 
                         className={`score-bar ${getScoreColor(result.evaluation.scores.soft_skills)}`}
-                        style={{ width: `${result.evaluation.scores.soft_skills}%` }}
+                        style={{ width: `${result.evaluation.scores.soft_skills ?? 0}%` }}
                       ></div>
-                      <span className="score-number">{result.evaluation.scores.soft_skills}</span>
+                      <span className="score-number">{result.evaluation.scores.soft_skills ?? '-'}</span>
                     </div>
                   </div>
                 </div>